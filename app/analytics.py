@@ -0,0 +1,299 @@
+import multiprocessing
+import os
+import time as clock
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, time, timedelta, timezone as dt_timezone
+from itertools import islice
+
+import django
+import numpy as np
+from django.conf import settings
+from django.db import connections
+from django.db.models import FloatField, Func
+from django.utils import timezone
+
+from .models import Attendance, AttendanceArchive, EmployeeUser, Roster
+from .rosters import ROSTER_COLUMNS, rostered_shift
+
+METRICS = [
+    "days",
+    "late_days",
+    "late_seconds",
+    "worked_seconds",
+    "overtime_seconds",
+    "missing_clock_outs",
+    "break_overruns",
+    "lunch_overruns",
+]
+# Anomalies HR wants flagged per employee
+FLAG_METRICS = ["late_days", "missing_clock_outs", "break_overruns", "lunch_overruns"]
+
+# Columns of each fetched row, all as float seconds since the epoch
+USER, DAY, CLOCK_IN, CLOCK_OUT, BREAK_IN, BREAK_OUT, LUNCH_IN, LUNCH_OUT = range(8)
+EPOCH_COLUMNS = ["date", "clock_in", "clock_out", "break_in", "break_out", "lunch_in", "lunch_out"]
+
+SECONDS_PER_DAY = 86400
+# (user, day) pairs are packed into one int64 as user_id * DAY_KEYS + days since the epoch
+DAY_KEYS = 1 << 20
+
+
+class EpochSeconds(Func):
+    """A date/datetime column as float seconds since 1970-01-01 UTC (dates at UTC midnight)."""
+
+    output_field = FloatField()
+    template = "EXTRACT(EPOCH FROM %(expressions)s)"
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        return self.as_sql(
+            compiler, connection, template="((julianday(%(expressions)s) - 2440587.5) * 86400.0)", **extra_context
+        )
+
+    def as_postgresql(self, compiler, connection, **extra_context):
+        # EXTRACT returns numeric on PostgreSQL 14+, which would arrive as Decimal
+        return self.as_sql(
+            compiler, connection, template="EXTRACT(EPOCH FROM %(expressions)s)::double precision", **extra_context
+        )
+
+    def as_mysql(self, compiler, connection, **extra_context):
+        return self.as_sql(compiler, connection, template="UNIX_TIMESTAMP(%(expressions)s)", **extra_context)
+
+
+class Totals:
+    """Per-metric sums indexed by user id, grown as larger ids show up."""
+
+    def __init__(self):
+        self.sums = np.zeros((len(METRICS), 0))
+
+    def _grow(self, size):
+        if size > self.sums.shape[1]:
+            self.sums = np.pad(self.sums, ((0, 0), (0, size - self.sums.shape[1])))
+
+    def add(self, users, values):
+        size = int(users.max()) + 1 if len(users) else 0
+        self._grow(size)
+        for i, column in enumerate(values):
+            self.sums[i, :size] += np.bincount(users, weights=column, minlength=size)
+
+    def merge(self, sums):
+        self._grow(sums.shape[1])
+        self.sums[:, : sums.shape[1]] += sums
+
+    def rows(self):
+        """(user_id, {metric: value}) for every user with a non-zero metric."""
+        seen = np.flatnonzero(self.sums.any(axis=0))
+        for user_id in seen:
+            yield int(user_id), {metric: round(self.sums[i, user_id]) for i, metric in enumerate(METRICS)}
+
+
+def _day_thresholds(days, shift_start, grace):
+    """Shift start and late cut-off in epoch seconds for each distinct UTC-midnight `days` value."""
+    starts = np.empty(len(days))
+    for i, day in enumerate(days):
+        local = date(1970, 1, 1) + timedelta(days=int(day // SECONDS_PER_DAY))
+        starts[i] = timezone.make_aware(datetime.combine(local, shift_start)).timestamp()
+    return starts, starts + grace
+
+
+def roster_thresholds(start, end, user_filter=None):
+    """
+    Rostered shifts in [start, end] as sorted (user, day) keys with their
+    start and late cut-off in epoch seconds, for `chunk_metrics`.
+    """
+    rosters = Roster.objects.filter(date__range=(start, end))
+    if user_filter is not None:
+        rosters = rosters.filter(user__in=user_filter)
+    shifts = [rostered_shift(*row) for row in rosters.values_list(*ROSTER_COLUMNS)]
+    keys = np.array(
+        [shift.user_id * DAY_KEYS + (shift.day - date(1970, 1, 1)).days for shift in shifts], dtype=np.int64
+    )
+    order = np.argsort(keys)
+    starts = np.array([shift.starts.timestamp() for shift in shifts])
+    late_after = np.array([shift.late_after.timestamp() for shift in shifts])
+    return keys[order], starts[order], late_after[order]
+
+
+def chunk_metrics(rows, rules, today, rosters=None):
+    """
+    Metric columns for one chunk of rows (an N x 8 float array, NaN for missing punches).
+
+    Lateness is judged against the employee's rostered shift, as the daily
+    rollup does, where `rosters` (from `roster_thresholds`) has one; other
+    days use the shift start and grace in `rules`. Everything is
+    whole-array arithmetic; the only Python loop is over the chunk's
+    distinct days, to place each day's shift start in local time.
+    """
+    clock_in, clock_out = rows[:, CLOCK_IN], rows[:, CLOCK_OUT]
+    clocked_in = ~np.isnan(clock_in)
+
+    days, day_index = np.unique(rows[:, DAY], return_inverse=True)
+    shift_starts, late_after = _day_thresholds(days, rules["shift_start"], rules["late_grace_seconds"])
+    shift_starts, late_after = shift_starts[day_index], late_after[day_index]
+    if rosters is not None and len(rosters[0]):
+        roster_keys, roster_starts, roster_late_after = rosters
+        keys = rows[:, USER].astype(np.int64) * DAY_KEYS + (rows[:, DAY] // SECONDS_PER_DAY).astype(np.int64)
+        position = np.minimum(np.searchsorted(roster_keys, keys), len(roster_keys) - 1)
+        rostered = roster_keys[position] == keys
+        shift_starts = np.where(rostered, roster_starts[position], shift_starts)
+        late_after = np.where(rostered, roster_late_after[position], late_after)
+    late = clocked_in & (clock_in > late_after)
+
+    with np.errstate(invalid="ignore"):
+        worked = np.nan_to_num(np.maximum(clock_out - clock_in, 0))
+        breaks = rows[:, BREAK_OUT] - rows[:, BREAK_IN]
+        lunches = rows[:, LUNCH_OUT] - rows[:, LUNCH_IN]
+        return [
+            clocked_in,
+            late,
+            np.where(late, clock_in - shift_starts, 0),
+            worked,
+            np.maximum(worked - rules["standard_work_seconds"], 0),
+            clocked_in & np.isnan(clock_out) & (rows[:, DAY] < today),
+            breaks > rules["break_allowance_seconds"],
+            lunches > rules["lunch_allowance_seconds"],
+        ]
+
+
+def shift_rules(shift_start=None, late_grace_minutes=None, standard_work_seconds=None,
+                break_allowance_minutes=None, lunch_allowance_minutes=None):
+    """Settings-based shift rules, with any of them overridden."""
+
+    def pick(value, default):
+        return default if value is None else value
+
+    return {
+        "shift_start": pick(shift_start, time.fromisoformat(settings.ATTENDANCE_SHIFT_START)),
+        "late_grace_seconds": 60 * pick(late_grace_minutes, settings.ATTENDANCE_LATE_GRACE_MINUTES),
+        "standard_work_seconds": pick(standard_work_seconds, settings.ATTENDANCE_STANDARD_WORK_SECONDS),
+        "break_allowance_seconds": 60 * pick(break_allowance_minutes, settings.ATTENDANCE_BREAK_ALLOWANCE_MINUTES),
+        "lunch_allowance_seconds": 60 * pick(lunch_allowance_minutes, settings.ATTENDANCE_LUNCH_ALLOWANCE_MINUTES),
+    }
+
+
+# ---------------- Sources ----------------
+def _hot_chunks(start, end, user_filter, chunk_size):
+    rows = Attendance.objects.filter(date__range=(start, end))
+    if user_filter is not None:
+        rows = rows.filter(user__in=user_filter)
+    rows = rows.values_list("user_id", *(EpochSeconds(column) for column in EPOCH_COLUMNS))
+
+    # Every column is already a plain number, so skip the ORM's per-row
+    # converters and hand the raw cursor batches straight to NumPy.
+    sql, params = rows.query.sql_with_params()
+    with connections[rows.db].cursor() as cursor:
+        cursor.execute(sql, params)
+        while chunk := cursor.fetchmany(chunk_size):
+            # Rounded to the millisecond to drop the float noise of SQLite's julianday()
+            yield np.round(np.array(chunk, dtype=np.float64), 3)
+
+
+def _archived_chunks(start, end, user_filter, chunk_size):
+    """Same chunks built from `attendance_rows`, for ranges reaching into archived months (slower)."""
+    from .archive import attendance_rows
+
+    user_ids = set(user_filter.values_list("id", flat=True)) if user_filter is not None else None
+    epoch = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+    def seconds(value):
+        if value is None:
+            return np.nan
+        if isinstance(value, datetime):
+            return (value - epoch).total_seconds()
+        return (value - epoch.date()).days * SECONDS_PER_DAY
+
+    rows = (
+        [row["user_id"], *(seconds(row[column]) for column in EPOCH_COLUMNS)]
+        for row in attendance_rows(start, end)
+        if user_ids is None or row["user_id"] in user_ids
+    )
+    while chunk := list(islice(rows, chunk_size)):
+        yield np.array(chunk, dtype=np.float64)
+
+
+# ---------------- Report ----------------
+def _employees(employee_id=None, department=None):
+    employees = EmployeeUser.objects.all()
+    if employee_id:
+        employees = employees.filter(employee_id=employee_id)
+    if department:
+        employees = employees.filter(department=department)
+    return employees
+
+
+def reduce_range(start, end, rules, today, employee_id=None, department=None, chunk_size=None):
+    """Per-user metric sums (a metrics x user-id array) and the row count for [start, end]."""
+    chunk_size = chunk_size or settings.ATTENDANCE_ANALYTICS_CHUNK_SIZE
+    users = _employees(employee_id, department) if employee_id or department else None
+    archived = AttendanceArchive.objects.filter(month__gte=start.replace(day=1), month__lte=end).exists()
+
+    rosters = roster_thresholds(start, end, users)
+
+    totals, row_count = Totals(), 0
+    for rows in (_archived_chunks if archived else _hot_chunks)(start, end, users, chunk_size):
+        row_count += len(rows)
+        totals.add(rows[:, USER].astype(np.int64), chunk_metrics(rows, rules, today, rosters))
+    return totals.sums, row_count
+
+
+def _split_days(start, end, parts):
+    days = (end - start).days + 1
+    bounds = [start + timedelta(days=days * i // parts) for i in range(parts + 1)]
+    return [(bounds[i], bounds[i + 1] - timedelta(days=1)) for i in range(parts) if bounds[i] < bounds[i + 1]]
+
+
+def analyze_attendance(start, end, employee_id=None, department=None, workers=None, **rules):
+    """
+    Late arrivals, overtime, missing clock-outs and break/lunch overruns per employee over [start, end].
+
+    Attendance is read as flat float columns (epoch seconds, computed by
+    the database) in chunks of ATTENDANCE_ANALYTICS_CHUNK_SIZE rows, and
+    each chunk is reduced into per-user sums with NumPy, so memory is
+    bounded by the chunk size and the number of employees. Fetching rows
+    is the bottleneck, so the date range is split across a process pool
+    (`workers=0` reduces in-process), each with its own connection.
+    Rostered days are judged late against their shift, like the daily
+    rollup; the shift rule overrides apply to the other days.
+    """
+    started = clock.perf_counter()
+    rules = shift_rules(**rules)
+    today = (timezone.localdate() - date(1970, 1, 1)).days * SECONDS_PER_DAY
+    workers = settings.ATTENDANCE_ANALYTICS_WORKERS if workers is None else workers
+    workers = min(os.cpu_count() if workers is None else workers, (end - start).days + 1)
+
+    totals, row_count = Totals(), 0
+    if workers <= 1:
+        parts = [reduce_range(start, end, rules, today, employee_id, department)]
+    else:
+        # Spawned rather than forked, so no child inherits an open database connection
+        with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn"), initializer=django.setup) as pool:
+            parts = list(pool.map(
+                reduce_range, *zip(*[
+                    (slice_start, slice_end, rules, today, employee_id, department)
+                    for slice_start, slice_end in _split_days(start, end, workers)
+                ])
+            ))
+    for sums, count in parts:
+        totals.merge(sums)
+        row_count += count
+
+    per_user = dict(totals.rows())
+    results = []
+    for user_id, employee, first_name, last_name, user_department in _employees(employee_id, department).order_by(
+        "employee_id"
+    ).values_list("id", "employee_id", "first_name", "last_name", "department"):
+        metrics = per_user.get(user_id)
+        if metrics:
+            results.append({
+                "employee_id": employee,
+                "first_name": first_name,
+                "last_name": last_name,
+                "department": user_department,
+                **metrics,
+                "flagged": any(metrics[metric] for metric in FLAG_METRICS),
+            })
+
+    return {
+        "rows": row_count,
+        "seconds": round(clock.perf_counter() - started, 3),
+        "totals": {metric: sum(row[metric] for row in results) for metric in METRICS},
+        "results": results,
+    }
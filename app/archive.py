@@ -0,0 +1,272 @@
+import csv
+import gzip
+import hashlib
+import logging
+import os
+import tempfile
+from array import array
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from .models import Attendance, AttendanceArchive
+from .rollup import ATTENDANCE_COLUMNS
+
+logger = logging.getLogger(__name__)
+
+READ_CHUNK_SIZE = 2000
+ARCHIVED_MONTHS_KEY = "attendance-archive:months"
+
+
+class ArchiveCorrupted(Exception):
+    pass
+
+
+def month_start(day):
+    return day.replace(day=1)
+
+
+def next_month(month):
+    return (month.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+def hot_cutoff(today=None, keep_months=None):
+    """First day that stays in the hot table: the start of the month `keep_months` before the current one."""
+    month = month_start(today or timezone.localdate())
+    for _ in range(settings.ATTENDANCE_HOT_MONTHS if keep_months is None else keep_months):
+        month = month_start(month - timedelta(days=1))
+    return month
+
+
+def archivable_months(cutoff):
+    """Months before `cutoff` that still have rows in the hot table."""
+    return list(Attendance.objects.filter(date__lt=cutoff).dates("date", "month"))
+
+
+# ---------------- Files ----------------
+def write_archive(path, rows):
+    """Write Attendance `values()` rows as gzipped CSV; returns (row count, sha256 of the file)."""
+    count = 0
+    with gzip.open(path, "wt", newline="") as target:
+        writer = csv.writer(target)
+        writer.writerow(ATTENDANCE_COLUMNS)
+        for row in rows:
+            writer.writerow([_format(row[column]) for column in ATTENDANCE_COLUMNS])
+            count += 1
+    return count, file_sha256(path)
+
+
+def read_archive(path):
+    with gzip.open(path, "rt", newline="") as source:
+        for row in csv.DictReader(source):
+            yield {
+                "user_id": int(row["user_id"]),
+                "date": parse_date(row["date"]),
+                **{field: parse_datetime(row[field]) if row[field] else None for field in Attendance.PUNCH_FIELDS},
+            }
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as source:
+        for block in iter(lambda: source.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _format(value):
+    if value is None:
+        return ""
+    return value.isoformat() if hasattr(value, "isoformat") else value
+
+
+def merge_rows(archived, late):
+    """
+    Overlay hot rows written after a month was archived onto its archived rows.
+
+    Late rows come from punches or muster approvals for an already archived
+    day; their punches win, columns they leave empty keep the archived value.
+    """
+    late = {(row["user_id"], row["date"]): row for row in late}
+    for row in archived:
+        newer = late.pop((row["user_id"], row["date"]), None)
+        if newer:
+            row.update({field: newer[field] for field in Attendance.PUNCH_FIELDS if newer[field] is not None})
+        yield row
+    yield from late.values()
+
+
+# ---------------- Archive / restore ----------------
+def archive_month(month, directory=None):
+    """
+    Move one month of Attendance rows from the hot table to a csv.gz file.
+
+    The file is written, catalogued in AttendanceArchive and the hot rows
+    deleted in one transaction; each version of a month gets its own file
+    name, so a failed run never leaves the catalogue pointing at the wrong
+    contents. Archiving a month again folds in rows that arrived since.
+    Returns the AttendanceArchive row, or None when there was nothing to move.
+    """
+    directory = str(directory or settings.ATTENDANCE_ARCHIVE_DIR)
+    os.makedirs(directory, exist_ok=True)
+    month = month_start(month)
+    hot = Attendance.objects.filter(date__gte=month, date__lt=next_month(month)).order_by("date", "user_id")
+    archived_ids = array("q")
+
+    def take_ids(rows):
+        for row in rows:
+            archived_ids.append(row.pop("id"))
+            yield row
+
+    with transaction.atomic():
+        if not hot.exists():
+            return None
+        previous = AttendanceArchive.objects.select_for_update().filter(month=month).first()
+        rows = take_ids(hot.select_for_update().values("id", *ATTENDANCE_COLUMNS).iterator(chunk_size=READ_CHUNK_SIZE))
+        if previous:
+            rows = merge_rows(read_verified(previous), rows)
+
+        fd, temp_path = tempfile.mkstemp(prefix=f".attendance-{month:%Y-%m}-", suffix=".csv.gz", dir=directory)
+        os.close(fd)
+        try:
+            count, sha256 = write_archive(temp_path, rows)
+            path = os.path.join(directory, f"attendance-{month:%Y-%m}-{sha256[:12]}.csv.gz")
+            os.replace(temp_path, path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+        for start in range(0, len(archived_ids), settings.PUNCH_BATCH_SIZE):
+            Attendance.objects.filter(pk__in=archived_ids[start:start + settings.PUNCH_BATCH_SIZE]).delete()
+        archive, _ = AttendanceArchive.objects.update_or_create(
+            month=month, defaults={"path": path, "rows": count, "sha256": sha256}
+        )
+        if previous and previous.path != path:
+            transaction.on_commit(lambda: _remove(previous.path))
+        _catalog_changed()
+    return archive
+
+
+def restore_month(month):
+    """
+    Move an archived month back into the hot table and drop its archive.
+
+    Rows that reached the hot table after archiving keep their punches; the
+    archive only fills columns they leave empty. Returns the number of
+    archived rows restored.
+    """
+    month = month_start(month)
+    with transaction.atomic():
+        archive = AttendanceArchive.objects.select_for_update().get(month=month)
+        hot = {
+            (row.user_id, row.date): row
+            for row in Attendance.objects.filter(date__gte=month, date__lt=next_month(month))
+        }
+        batch_size = settings.PUNCH_BATCH_SIZE
+        created, updated, restored = [], [], 0
+        for row in read_verified(archive):
+            restored += 1
+            current = hot.get((row["user_id"], row["date"]))
+            if current is None:
+                created.append(Attendance(**row))
+                if len(created) >= batch_size:
+                    Attendance.objects.bulk_create(created, batch_size=batch_size)
+                    created = []
+                continue
+            for field in Attendance.PUNCH_FIELDS:
+                if getattr(current, field) is None:
+                    setattr(current, field, row[field])
+            updated.append(current)
+        Attendance.objects.bulk_create(created, batch_size=batch_size)
+        Attendance.objects.bulk_update(updated, Attendance.PUNCH_FIELDS, batch_size=batch_size)
+        archive.delete()
+        transaction.on_commit(lambda: _remove(archive.path))
+        _catalog_changed()
+    return restored
+
+
+def read_verified(archive):
+    if file_sha256(archive.path) != archive.sha256:
+        raise ArchiveCorrupted(f"{archive.path} does not match its recorded checksum")
+    return read_archive(archive.path)
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        logger.warning("Archive file %s was already gone", path)
+
+
+def _catalog_changed():
+    cache.delete(ARCHIVED_MONTHS_KEY)
+    transaction.on_commit(lambda: cache.delete(ARCHIVED_MONTHS_KEY))
+
+
+# ---------------- Reading ----------------
+def archived_months():
+    """
+    Months held in archive files. Every punch checks this, so it is cached
+    for up to ATTENDANCE_ARCHIVE_CATALOG_TTL seconds.
+    """
+    months = cache.get(ARCHIVED_MONTHS_KEY)
+    if months is None:
+        months = frozenset(AttendanceArchive.objects.values_list("month", flat=True))
+        cache.set(ARCHIVED_MONTHS_KEY, months, settings.ATTENDANCE_ARCHIVE_CATALOG_TTL)
+    return months
+
+
+def with_archived(rows):
+    """
+    Complete Attendance `values()` rows for days in archived months from their archive.
+
+    A punch or muster correction for an archived day reaches the hot table
+    as a row holding only the corrected columns; its rollup has to be built
+    from the archived punches with the late ones laid over them.
+    """
+    rows = list(rows)
+    months = archived_months()
+    late = defaultdict(list)
+    for row in rows:
+        if month_start(row["date"]) in months:
+            late[month_start(row["date"])].append(row)
+    if not late:
+        return rows
+
+    merged = {}
+    for archive in AttendanceArchive.objects.filter(month__in=late):
+        keys = {(row["user_id"], row["date"]) for row in late[archive.month]}
+        archived = (row for row in read_verified(archive) if (row["user_id"], row["date"]) in keys)
+        for row in merge_rows(archived, late[archive.month]):
+            merged[(row["user_id"], row["date"])] = row
+    return [merged.get((row["user_id"], row["date"]), row) for row in rows]
+
+
+def attendance_rows(start=None, end=None):
+    """
+    Attendance `values()` rows in [start, end] from the hot table and the
+    archive files alike, one row per (user, date).
+    """
+    hot = Attendance.objects.all()
+    archives = AttendanceArchive.objects.all()
+    if start:
+        hot = hot.filter(date__gte=start)
+        archives = archives.filter(month__gte=month_start(start))
+    if end:
+        hot = hot.filter(date__lte=end)
+        archives = archives.filter(month__lte=end)
+
+    for archive in archives:
+        month_range = {"date__gte": archive.month, "date__lt": next_month(archive.month)}
+        late = hot.filter(**month_range).values(*ATTENDANCE_COLUMNS)
+        for row in merge_rows(read_verified(archive), late):
+            if (not start or row["date"] >= start) and (not end or row["date"] <= end):
+                yield row
+        hot = hot.exclude(**month_range)
+    yield from hot.values(*ATTENDANCE_COLUMNS).iterator(chunk_size=READ_CHUNK_SIZE)
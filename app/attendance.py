@@ -0,0 +1,183 @@
+from collections import defaultdict
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .db import retry_on_lock
+from .events import get_broker, publish_attendance_changes
+from .models import Attendance, EmployeeUser
+from .rollup import attendance_values, refresh_daily_rollups, refreshed_rollups, save_rollups
+from .rosters import ashift_day, shift_day, shift_days
+from .serializers import PunchEventSerializer
+from .summary import ainvalidate_attendance_summary, invalidate_attendance_summary
+
+
+def record_punch(user, field, when=None):
+    """
+    Set one punch column on the user's attendance row for the day.
+
+    The day is the one the punch's rostered shift started on, so a night
+    shift's clock-out after midnight lands on the clock-in's row; without
+    a roster it is the punch's local date. With PUNCH_BUFFER_ENABLED the
+    punch is only appended to the local journal here and applied in bulk
+    by the flusher (see punch_buffer).
+    Otherwise the common case is a single conditional UPDATE of that column; the row
+    is only inserted when it does not exist yet. A concurrent insert from
+    another device trips the (user, date) constraint and falls back to the
+    UPDATE, so neither duplicate rows nor lost punches can occur.
+    """
+    when = when or timezone.now()
+    day = shift_day(user.pk, when)
+    if settings.PUNCH_BUFFER_ENABLED:
+        # Journaled now, written by the buffer's flusher moments later
+        from .punch_buffer import get_punch_buffer
+
+        get_punch_buffer().append(user.pk, field, when)
+        return day
+
+    _store_punch(user, field, when, day)
+    invalidate_attendance_summary(day)
+    publish_attendance_changes([(user.pk, day)])
+    return day
+
+
+@retry_on_lock
+def _store_punch(user, field, when, day):
+    rows = Attendance.objects.filter(user=user, date=day)
+
+    if not rows.update(**{field: when}):
+        try:
+            with transaction.atomic():
+                Attendance.objects.create(user=user, date=day, **{field: when})
+        except IntegrityError:
+            rows.update(**{field: when})
+    refresh_daily_rollups([(user.pk, day)])
+
+
+async def arecord_punch(user, field, when=None):
+    """
+    Async twin of `record_punch` for the ASGI views.
+
+    Same conditional UPDATE / INSERT fallback, through the async ORM; the
+    rollup refresh reuses the sync code in a worker thread.
+    """
+    when = when or timezone.now()
+    day = await ashift_day(user.pk, when)
+    if settings.PUNCH_BUFFER_ENABLED:
+        from .punch_buffer import get_punch_buffer
+
+        await sync_to_async(get_punch_buffer().append, thread_sensitive=False)(user.pk, field, when)
+        return day
+
+    await _astore_punch(user, field, when, day)
+    await ainvalidate_attendance_summary(day)
+    if get_broker().active:
+        await sync_to_async(publish_attendance_changes)([(user.pk, day)])
+    return day
+
+
+@retry_on_lock
+async def _astore_punch(user, field, when, day):
+    rows = Attendance.objects.filter(user=user, date=day)
+
+    if not await rows.aupdate(**{field: when}):
+        try:
+            await Attendance.objects.acreate(user=user, date=day, **{field: when})
+        except IntegrityError:
+            await rows.aupdate(**{field: when})
+    await sync_to_async(refresh_daily_rollups)([(user.pk, day)])
+
+
+@retry_on_lock
+def apply_punches(punches):
+    """
+    Write many punches in one transaction.
+
+    `punches` is an iterable of (user_id, field, timestamp). Punches are
+    applied in timestamp order, so the latest punch for a field wins just
+    like consecutive single punches would. Returns the set of touched
+    (user_id, date) pairs.
+    """
+    punches = sorted(punches, key=lambda punch: punch[2])
+    days = shift_days((user_id, when) for user_id, _, when in punches)
+    latest = {}
+    for user_id, field, when in punches:
+        latest.setdefault((user_id, days[(user_id, when)]), {})[field] = when
+    if not latest:
+        return set()
+
+    user_ids = {user_id for user_id, _ in latest}
+    days = {day for _, day in latest}
+    batch_size = settings.PUNCH_BATCH_SIZE
+
+    with transaction.atomic():
+        # Make sure every (user, date) row exists; rows created concurrently
+        # by single punches are left alone thanks to the unique constraint.
+        Attendance.objects.bulk_create(
+            [Attendance(user_id=user_id, date=day) for user_id, day in latest],
+            batch_size=batch_size,
+            ignore_conflicts=True,
+        )
+        rows = {
+            (row.user_id, row.date): row
+            for row in Attendance.objects.filter(user_id__in=user_ids, date__in=days)
+        }
+
+        # Only write the columns each row was punched on, grouped so rows
+        # sharing the same set of columns go out in one UPDATE.
+        groups = defaultdict(list)
+        for key, values in latest.items():
+            row = rows[key]
+            for field, when in values.items():
+                setattr(row, field, when)
+            groups[tuple(sorted(values))].append(row)
+        for fields, group in groups.items():
+            Attendance.objects.bulk_update(group, fields, batch_size=batch_size)
+
+        save_rollups(refreshed_rollups(attendance_values(rows[key]) for key in latest))
+        publish_attendance_changes(latest)
+
+    for day in days:
+        invalidate_attendance_summary(day)
+    return set(latest)
+
+
+def ingest_punch_events(events):
+    """
+    Validate and apply a batch of (employee_id, action, timestamp) events.
+
+    Returns one result per event, in input order. Invalid events and events
+    for unknown or inactive employees are reported and skipped; the rest are
+    written together through `apply_punches`.
+    """
+    results = []
+    valid = []
+    for index, event in enumerate(events):
+        serializer = PunchEventSerializer(data=event)
+        if serializer.is_valid():
+            valid.append((index, serializer.validated_data))
+            results.append({"index": index, "status": "ok"})
+        else:
+            results.append({"index": index, "status": "error", "errors": serializer.errors})
+
+    employee_ids = {data["employee_id"] for _, data in valid}
+    users = dict(
+        EmployeeUser.objects.filter(employee_id__in=employee_ids, is_active=True).values_list("employee_id", "id")
+    )
+
+    punches = []
+    for index, data in valid:
+        user_id = users.get(data["employee_id"])
+        if user_id is None:
+            results[index] = {
+                "index": index,
+                "status": "error",
+                "errors": {"employee_id": ["Unknown or inactive employee"]},
+            }
+            continue
+        punches.append((user_id, data["action"], data["timestamp"]))
+
+    apply_punches(punches)
+    return results
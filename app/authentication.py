@@ -0,0 +1,133 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core import signing
+from django.db import transaction
+from django.utils import timezone
+from rest_framework import exceptions
+from rest_framework.authentication import BaseAuthentication, get_authorization_header
+
+from .models import RefreshToken
+from .principals import aget_principal, get_principal, principal_user
+
+ACCESS = "access"
+REFRESH = "refresh"
+
+
+def _token_ttl(kind):
+    return settings.AUTH_TOKEN_ACCESS_TTL if kind == ACCESS else settings.AUTH_TOKEN_REFRESH_TTL
+
+
+def issue_token(user, kind, **claims):
+    payload = {"uid": user.pk, "ver": user.token_version, "typ": kind, **claims}
+    return signing.dumps(payload, salt=f"app.auth.{kind}")
+
+
+def issue_tokens(user, family=None):
+    """An access token and a single-use refresh token, for a new login or continuing `family`."""
+    # Rows past the refresh lifetime can no longer be exchanged or reused
+    RefreshToken.objects.filter(
+        user_id=user.pk, created_at__lt=timezone.now() - timedelta(seconds=settings.AUTH_TOKEN_REFRESH_TTL)
+    ).delete()
+    refresh = RefreshToken.objects.create(user_id=user.pk, **({"family": family} if family else {}))
+    return {
+        "access": issue_token(user, ACCESS),
+        "refresh": issue_token(user, REFRESH, jti=str(refresh.jti)),
+        "expires_in": settings.AUTH_TOKEN_ACCESS_TTL,
+    }
+
+
+def refresh_tokens(token):
+    """
+    Exchange a refresh token for a new pair, spending it.
+
+    A refresh token that was already spent has been copied: every token of
+    its login is spent as well, so both holders must log in again. Other
+    logins of the same user keep working (unlike `revoke_tokens`).
+    """
+    payload = _load_payload(token, REFRESH)
+    user = _principal_user(get_principal(payload["uid"]), payload)
+    issued = RefreshToken.objects.filter(pk=payload.get("jti"), user_id=user.pk)
+    with transaction.atomic():
+        family = issued.values_list("family", flat=True).first()
+        if family is None:
+            raise exceptions.AuthenticationFailed("Invalid token")
+        if issued.filter(spent_at__isnull=True).update(spent_at=timezone.now()):
+            return issue_tokens(user, family=family)
+        RefreshToken.objects.filter(family=family, spent_at__isnull=True).update(spent_at=timezone.now())
+    # Raised after the block commits, so the family stays spent
+    raise exceptions.AuthenticationFailed("Token already used")
+
+
+def _load_payload(token, kind):
+    try:
+        return signing.loads(token, salt=f"app.auth.{kind}", max_age=_token_ttl(kind))
+    except signing.SignatureExpired:
+        raise exceptions.AuthenticationFailed("Token expired")
+    except signing.BadSignature:
+        raise exceptions.AuthenticationFailed("Invalid token")
+
+
+def _principal_user(principal, payload):
+    if principal is None:
+        raise exceptions.AuthenticationFailed("Invalid token")
+    if principal["token_version"] != payload["ver"]:
+        raise exceptions.AuthenticationFailed("Token revoked")
+    if not principal["is_active"]:
+        raise exceptions.AuthenticationFailed("User is inactive")
+    return principal_user(principal)
+
+
+def verify_token(token, kind):
+    """
+    Return the user a token was issued to.
+
+    Only an HMAC check and a cached principal lookup are needed, so most
+    requests authenticate without a query. Raises AuthenticationFailed for
+    expired, tampered or revoked tokens.
+    """
+    payload = _load_payload(token, kind)
+    return _principal_user(get_principal(payload["uid"]), payload)
+
+
+async def averify_token(token, kind):
+    payload = _load_payload(token, kind)
+    return _principal_user(await aget_principal(payload["uid"]), payload)
+
+
+def bearer_token(request):
+    """The token from an `Authorization: Bearer <token>` header, or None when another scheme is used."""
+    auth = get_authorization_header(request).split()
+    if not auth or auth[0].lower() != SignedTokenAuthentication.keyword.lower().encode():
+        return None
+    if len(auth) != 2:
+        raise exceptions.AuthenticationFailed("Invalid token header")
+
+    try:
+        return auth[1].decode()
+    except UnicodeError:
+        raise exceptions.AuthenticationFailed("Invalid token header")
+
+
+def revoke_tokens(user):
+    user.token_version += 1
+    user.save(update_fields=["token_version"])
+
+
+class SignedTokenAuthentication(BaseAuthentication):
+    """
+    Clients authenticate by passing an access token from the login endpoint:
+
+        Authorization: Bearer <access token>
+    """
+
+    keyword = "Bearer"
+
+    def authenticate(self, request):
+        token = bearer_token(request)
+        if token is None:
+            return None
+        return verify_token(token, ACCESS), token
+
+    def authenticate_header(self, request):
+        return self.keyword
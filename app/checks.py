@@ -0,0 +1,20 @@
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    """Cache invalidation (token principals above all) only reaches other processes through a shared cache."""
+    if settings.CACHES["default"]["BACKEND"] != "django.core.cache.backends.locmem.LocMemCache":
+        return []
+    return [
+        Warning(
+            "The default cache is per-process LocMemCache.",
+            hint=(
+                "With several worker processes, revoked tokens, deactivated users and role changes keep "
+                "working in the other processes for up to AUTH_PRINCIPAL_CACHE_TTL seconds. Set REDIS_URL "
+                "(or another shared cache in CACHES)."
+            ),
+            id="app.W001",
+        )
+    ]
@@ -0,0 +1,59 @@
+import asyncio
+import functools
+import inspect
+import logging
+import random
+import time
+
+from django.conf import settings
+from django.db import OperationalError, connection
+
+logger = logging.getLogger(__name__)
+
+
+def is_lock_error(exc):
+    return isinstance(exc, OperationalError) and "database is locked" in str(exc)
+
+
+def retry_on_lock(func):
+    """
+    Retry `func` when SQLite reports lock contention.
+
+    The busy timeout already makes writers wait for each other; this covers
+    the cases where SQLite gives up early or the timeout runs out under a
+    burst. Calls made inside an outer transaction are not retried, since
+    the transaction is already broken and only its owner can restart it.
+    """
+
+    if inspect.iscoroutinefunction(func):
+        # Async ORM calls each run in their own autocommit block, so there
+        # is never an outer transaction to respect here.
+        @functools.wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            for attempt in range(settings.DB_LOCK_RETRIES + 1):
+                try:
+                    return await func(*args, **kwargs)
+                except OperationalError as exc:
+                    if not is_lock_error(exc) or attempt == settings.DB_LOCK_RETRIES:
+                        raise
+                    await asyncio.sleep(_backoff(func, attempt))
+
+        return async_wrapper
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        for attempt in range(settings.DB_LOCK_RETRIES + 1):
+            try:
+                return func(*args, **kwargs)
+            except OperationalError as exc:
+                if not is_lock_error(exc) or connection.in_atomic_block or attempt == settings.DB_LOCK_RETRIES:
+                    raise
+                time.sleep(_backoff(func, attempt))
+
+    return wrapper
+
+
+def _backoff(func, attempt):
+    delay = settings.DB_LOCK_RETRY_DELAY * 2**attempt
+    logger.info("%s hit a locked database, retrying in %.3fs", func.__qualname__, delay)
+    return delay * random.uniform(0.5, 1.5)
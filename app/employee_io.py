@@ -0,0 +1,151 @@
+import csv
+import io
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.db import IntegrityError, transaction
+
+from .models import EmployeeUser
+from .serializers import EmployeeImportRowSerializer
+
+FORMATS = ["csv", "ndjson"]
+EXPORT_FIELDS = ["employee_id", "first_name", "last_name", "department", "role", "is_active"]
+
+
+def detect_format(filename, default=None):
+    extension = os.path.splitext(filename or "")[1].lower()
+    if extension == ".csv":
+        return "csv"
+    if extension in [".ndjson", ".jsonl"]:
+        return "ndjson"
+    return default
+
+
+def parse_rows(stream, file_format):
+    """
+    Yield (line_number, row) pairs from a binary CSV or NDJSON stream.
+
+    Rows are read one at a time, so the whole file is never held in memory.
+    A row that cannot be decoded is yielded as an Exception instance.
+    """
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    if file_format == "csv":
+        # Line 1 is the header
+        for line_number, row in enumerate(csv.DictReader(text), start=2):
+            yield line_number, row
+        return
+
+    for line_number, line in enumerate(text, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as exc:
+            yield line_number, exc
+            continue
+        yield line_number, row if isinstance(row, dict) else ValueError("Expected a JSON object")
+
+
+def _hash_passwords(passwords, executor):
+    """Hash in the process pool; blank passwords become unusable without paying for a hash."""
+    hashed = [make_password(None) for _ in passwords]
+    positions = [i for i, password in enumerate(passwords) if password]
+    to_hash = [passwords[i] for i in positions]
+    if executor:
+        results = executor.map(make_password, to_hash, chunksize=16)
+    else:
+        results = map(make_password, to_hash)
+    for i, value in zip(positions, results):
+        hashed[i] = value
+    return hashed
+
+
+def _import_chunk(chunk, seen, executor):
+    errors, valid = [], []
+    for line_number, row in chunk:
+        if isinstance(row, Exception):
+            errors.append({"line": line_number, "errors": str(row)})
+            continue
+        serializer = EmployeeImportRowSerializer(data=row)
+        if not serializer.is_valid():
+            errors.append({"line": line_number, "errors": serializer.errors})
+        elif serializer.validated_data["employee_id"] in seen:
+            errors.append({"line": line_number, "errors": {"employee_id": ["Duplicate in file"]}})
+        else:
+            seen.add(serializer.validated_data["employee_id"])
+            valid.append((line_number, serializer.validated_data))
+
+    existing = set(
+        EmployeeUser.objects.filter(employee_id__in=[data["employee_id"] for _, data in valid])
+        .values_list("employee_id", flat=True)
+    )
+    for line_number, data in valid:
+        if data["employee_id"] in existing:
+            errors.append({"line": line_number, "errors": {"employee_id": ["Employee ID already exists"]}})
+    valid = [(line_number, data) for line_number, data in valid if data["employee_id"] not in existing]
+
+    passwords = _hash_passwords([data.get("password") for _, data in valid], executor)
+    users = []
+    for (_, data), password in zip(valid, passwords):
+        user = EmployeeUser(
+            employee_id=data["employee_id"],
+            role=data["role"],
+            first_name=data.get("first_name", ""),
+            last_name=data.get("last_name", ""),
+            department=data.get("department") or None,
+            password=password,
+        )
+        if user.role in ["admin", "hr", "manager"]:
+            user.is_staff = True
+        users.append(user)
+
+    try:
+        with transaction.atomic():
+            EmployeeUser.objects.bulk_create(users, batch_size=settings.EMPLOYEE_IMPORT_CHUNK_SIZE)
+    except IntegrityError:
+        # Someone registered one of these IDs since the existence check
+        errors += [
+            {"line": line_number, "errors": {"employee_id": ["Conflicts with a concurrent insert"]}}
+            for line_number, _ in valid
+        ]
+        return 0, errors
+    return len(users), errors
+
+
+def import_employees(rows, chunk_size=None, workers=None, progress=None):
+    """
+    Create employees from (line_number, row) pairs produced by `parse_rows`.
+
+    Rows are validated and inserted chunk by chunk with one existence query
+    and one bulk INSERT each, while password hashing fans out over a
+    process pool (`workers=0` hashes in-process). `progress`, if given, is
+    called with the number of rows processed after each chunk.
+    """
+    chunk_size = chunk_size or settings.EMPLOYEE_IMPORT_CHUNK_SIZE
+    workers = settings.EMPLOYEE_IMPORT_HASH_WORKERS if workers is None else workers
+    executor = None if workers == 0 else ProcessPoolExecutor(max_workers=workers)
+
+    created, errors, seen, processed = 0, [], set(), 0
+    rows = iter(rows)
+    try:
+        while chunk := list(islice(rows, chunk_size)):
+            chunk_created, chunk_errors = _import_chunk(chunk, seen, executor)
+            created += chunk_created
+            errors += chunk_errors
+            processed += len(chunk)
+            if progress:
+                progress(processed)
+    finally:
+        if executor:
+            executor.shutdown()
+
+    errors.sort(key=lambda error: error["line"])
+    return {"created": created, "errors": errors}
+
+
+def export_queryset():
+    return EmployeeUser.objects.order_by("employee_id").values(*EXPORT_FIELDS)
@@ -0,0 +1,109 @@
+import asyncio
+import threading
+from contextlib import asynccontextmanager
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+from .models import Attendance
+from .serializers import AttendanceEmployeeSerializer
+
+ATTENDANCE = "attendance"
+# Sent instead of the backlog to a subscriber that fell too far behind
+RESYNC = "resync"
+
+
+class InProcessBroker:
+    """
+    Fan events out to subscribers living in this process.
+
+    Each subscriber is an asyncio queue on its own event loop; `publish` is
+    safe to call from any thread (sync views, worker threads) and costs one
+    `call_soon_threadsafe` per subscriber. Deployments with several server
+    processes need a backend that crosses processes; anything with the same
+    `active` / `publish` / `subscribe` methods can be plugged in through
+    ATTENDANCE_EVENTS_BROKER.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = set()
+
+    @property
+    def active(self):
+        """Whether anyone is listening, so publishers can skip building events."""
+        return bool(self._subscribers)
+
+    def publish(self, event):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(self._deliver, queue, event)
+            except RuntimeError:
+                # Loop already closed; its subscriber is on its way out
+                pass
+
+    @staticmethod
+    def _deliver(queue, event):
+        try:
+            queue.put_nowait(event)
+        except asyncio.QueueFull:
+            while not queue.empty():
+                queue.get_nowait()
+            queue.put_nowait({"event": RESYNC, "data": None})
+
+    @asynccontextmanager
+    async def subscribe(self):
+        queue = asyncio.Queue(maxsize=settings.ATTENDANCE_EVENTS_QUEUE_SIZE)
+        subscriber = (asyncio.get_running_loop(), queue)
+        with self._lock:
+            self._subscribers.add(subscriber)
+        try:
+            yield queue
+        finally:
+            with self._lock:
+                self._subscribers.discard(subscriber)
+
+
+@lru_cache(maxsize=None)
+def get_broker():
+    return import_string(settings.ATTENDANCE_EVENTS_BROKER)()
+
+
+def attendance_event(keys):
+    """The changed rows for (user_id, date) pairs, shaped like the summary's rows plus their date."""
+    keys = set(keys)
+    rows = (
+        Attendance.objects.filter(
+            user_id__in={user_id for user_id, _ in keys},
+            date__in={day for _, day in keys},
+        )
+        .select_related("user")
+        .only("user_id", "date", "user__employee_id", "user__first_name", "user__last_name", *Attendance.PUNCH_FIELDS)
+    )
+    changed = [
+        {"date": row.date.isoformat(), **AttendanceEmployeeSerializer(row).data}
+        for row in rows
+        if (row.user_id, row.date) in keys
+    ]
+    return {"event": ATTENDANCE, "data": {"rows": changed}}
+
+
+def publish_attendance_changes(keys):
+    """
+    Tell live dashboards that these (user_id, date) rows changed.
+
+    Runs once the surrounding transaction commits (immediately in
+    autocommit), and does nothing while no dashboard is connected.
+    """
+    keys = set(keys)
+
+    def publish():
+        broker = get_broker()
+        if keys and broker.active:
+            broker.publish(attendance_event(keys))
+
+    transaction.on_commit(publish)
@@ -0,0 +1,275 @@
+import logging
+import os
+import socket
+import tempfile
+import threading
+import time
+import traceback
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import F
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from .analytics import analyze_attendance
+from .db import retry_on_lock
+from .employee_io import import_employees, parse_rows
+from .models import Job
+from .reports import build_attendance_report
+from .rollup import rebuild_daily_rollups
+from .serializers import AttendanceAnalyticsQuerySerializer, AttendanceReportQuerySerializer
+
+logger = logging.getLogger(__name__)
+
+# kind -> function(params, progress) returning a JSON-serializable result
+JOB_KINDS = {}
+# kind -> function(params) run once a job of that kind succeeds or finally fails
+JOB_CLEANUPS = {}
+
+
+class UnknownJobKind(Exception):
+    pass
+
+
+def job(kind, cleanup=None):
+    """Register a job function under `kind`, with an optional `cleanup(params)`."""
+
+    def register(func):
+        JOB_KINDS[kind] = func
+        if cleanup:
+            JOB_CLEANUPS[kind] = cleanup
+        return func
+
+    return register
+
+
+def enqueue(kind, params=None, user=None, max_attempts=None):
+    if kind not in JOB_KINDS:
+        raise UnknownJobKind(kind)
+    return Job.objects.create(
+        kind=kind,
+        params=params or {},
+        created_by=user,
+        max_attempts=max_attempts or settings.JOB_MAX_ATTEMPTS,
+    )
+
+
+def stage_upload(upload):
+    """
+    Copy an uploaded file into JOB_UPLOAD_DIR and return its path, so a
+    job can read it without its contents (passwords in an employee import,
+    say) ever being stored in the jobs table.
+    """
+    directory = str(settings.JOB_UPLOAD_DIR)
+    os.makedirs(directory, exist_ok=True)
+    fd, path = tempfile.mkstemp(prefix="upload-", dir=directory)
+    with os.fdopen(fd, "wb") as target:
+        for chunk in upload.chunks():
+            target.write(chunk)
+    return path
+
+
+def remove_staged_upload(params):
+    try:
+        os.remove(params["path"])
+    except FileNotFoundError:
+        pass
+
+
+class JobProgress:
+    """
+    Progress callback handed to job functions: `progress(done, total=None)`.
+
+    Writes are throttled to one per JOB_PROGRESS_INTERVAL and double as the
+    worker's heartbeat.
+    """
+
+    def __init__(self, job):
+        self.job = job
+        self.last_write = 0
+
+    def __call__(self, done, total=None):
+        now = time.monotonic()
+        if now - self.last_write < settings.JOB_PROGRESS_INTERVAL:
+            return
+        self.last_write = now
+        fields = {"progress": done, "heartbeat_at": timezone.now()}
+        if total is not None:
+            fields["total"] = total
+        Job.objects.filter(pk=self.job.pk).update(**fields)
+
+
+# ---------------- Worker ----------------
+@retry_on_lock
+def claim_job(worker):
+    """
+    Take the oldest due job, or return None.
+
+    The conditional UPDATE is the claim: of several workers racing for the
+    same row only one changes it, with no SELECT ... FOR UPDATE needed.
+    """
+    now = timezone.now()
+    stale = Job.objects.filter(status="running", heartbeat_at__lt=now - timedelta(seconds=settings.JOB_STALE_SECONDS))
+    for lost in stale.only("id", "kind", "params", "attempts", "max_attempts", "heartbeat_at"):
+        # Conditional on the heartbeat we saw, so only one worker acts on it
+        same = Job.objects.filter(pk=lost.pk, status="running", heartbeat_at=lost.heartbeat_at)
+        if lost.attempts >= lost.max_attempts:
+            # A job that keeps killing its worker must not loop forever
+            if same.update(status="failed", error="Worker stopped responding", finished_at=now):
+                logger.error("Job %s lost its worker on its last attempt, failing it", lost.pk)
+                clean_up(lost)
+        elif same.update(status="queued", worker=""):
+            logger.warning("Job %s lost its worker, queueing it again", lost.pk)
+
+    due = Job.objects.filter(status="queued", run_after__lte=now).order_by("run_after", "id")
+    for job_id in due.values_list("id", flat=True)[:10]:
+        claimed = Job.objects.filter(pk=job_id, status="queued").update(
+            status="running", worker=worker, attempts=F("attempts") + 1, started_at=now, heartbeat_at=now
+        )
+        if claimed:
+            return Job.objects.get(pk=job_id)
+    return None
+
+
+def beat(job):
+    Job.objects.filter(pk=job.pk, status="running", worker=job.worker).update(heartbeat_at=timezone.now())
+
+
+@contextmanager
+def heartbeating(job):
+    """Keep `job` from looking stale while the block runs, whether or not it reports progress."""
+    stop = threading.Event()
+
+    def run():
+        try:
+            while not stop.wait(settings.JOB_HEARTBEAT_INTERVAL):
+                try:
+                    beat(job)
+                except Exception:
+                    logger.exception("Heartbeat for job %s failed", job.pk)
+        finally:
+            connection.close()
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
+
+
+def run_job(job):
+    """Run a claimed job and record its result, or schedule a retry with exponential backoff."""
+    try:
+        func = JOB_KINDS[job.kind]
+        with heartbeating(job):
+            result = func(job.params, JobProgress(job))
+    except Exception:
+        logger.exception("Job %s (%s) failed on attempt %s", job.pk, job.kind, job.attempts)
+        error = traceback.format_exc(limit=5)
+        if job.attempts < job.max_attempts and job.kind in JOB_KINDS:
+            delay = settings.JOB_RETRY_DELAY * 2 ** (job.attempts - 1)
+            Job.objects.filter(pk=job.pk).update(
+                status="queued", worker="", error=error, run_after=timezone.now() + timedelta(seconds=delay)
+            )
+        else:
+            Job.objects.filter(pk=job.pk).update(status="failed", error=error, finished_at=timezone.now())
+            clean_up(job)
+        return
+
+    Job.objects.filter(pk=job.pk).update(
+        status="succeeded", result=result, error="", finished_at=timezone.now(), progress=Coalesce("total", "progress")
+    )
+    clean_up(job)
+
+
+def clean_up(job):
+    cleanup = JOB_CLEANUPS.get(job.kind)
+    if cleanup is None:
+        return
+    try:
+        cleanup(job.params)
+    except Exception:
+        logger.exception("Cleaning up after job %s (%s) failed", job.pk, job.kind)
+
+
+def run_worker(threads=1, poll_interval=None, once=False, stop=None):
+    """
+    Claim and run jobs until `stop` is set (or, with `once`, the queue is empty).
+
+    With more than one thread each gets its own database connection. Scale
+    past one process by starting several workers; claims never overlap.
+    """
+    poll_interval = settings.JOB_POLL_INTERVAL if poll_interval is None else poll_interval
+    stop = stop or threading.Event()
+    name = f"{socket.gethostname()}:{os.getpid()}"
+
+    def loop(index):
+        worker = f"{name}:{index}"
+        while not stop.is_set():
+            job = claim_job(worker)
+            if job is None:
+                if once:
+                    return
+                stop.wait(poll_interval)
+                continue
+            run_job(job)
+
+    def loop_in_thread(index):
+        try:
+            loop(index)
+        finally:
+            connection.close()
+
+    if threads == 1:
+        loop(0)
+        return
+
+    pool = [threading.Thread(target=loop_in_thread, args=(index,), daemon=True) for index in range(threads)]
+    for thread in pool:
+        thread.start()
+    try:
+        while any(thread.is_alive() for thread in pool):
+            for thread in pool:
+                thread.join(timeout=0.5)
+    except KeyboardInterrupt:
+        # Let running jobs finish; anything killed mid-run is requeued once stale
+        stop.set()
+        for thread in pool:
+            thread.join()
+
+
+# ---------------- Job kinds ----------------
+@job("attendance_report")
+def attendance_report_job(params, progress):
+    query = AttendanceReportQuerySerializer(data=params)
+    query.is_valid(raise_exception=True)
+    return {"results": build_attendance_report(**query.validated_data)}
+
+
+@job("import_employees", cleanup=remove_staged_upload)
+def import_employees_job(params, progress):
+    # The upload was staged by `stage_upload`; counting its rows first is
+    # cheap next to hashing their passwords.
+    with open(params["path"], "rb") as source:
+        total = sum(1 for _ in parse_rows(source, params["file_format"]))
+    with open(params["path"], "rb") as source:
+        return import_employees(parse_rows(source, params["file_format"]), progress=lambda done: progress(done, total))
+
+
+@job("rebuild_attendance_daily")
+def rebuild_attendance_daily_job(params, progress):
+    start, end = (parse_date(params[key]) if params.get(key) else None for key in ("start", "end"))
+    return {"rows": rebuild_daily_rollups(start, end, progress=progress)}
+
+
+@job("attendance_analytics")
+def attendance_analytics_job(params, progress):
+    query = AttendanceAnalyticsQuerySerializer(data=params)
+    query.is_valid(raise_exception=True)
+    return analyze_attendance(**query.validated_data)
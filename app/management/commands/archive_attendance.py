@@ -0,0 +1,56 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from app.archive import archivable_months, archive_month, hot_cutoff, restore_month
+from app.models import AttendanceArchive
+
+
+def parse_month(value):
+    day = parse_date(f"{value}-01")
+    if day is None:
+        raise ValueError(value)
+    return day
+
+
+class Command(BaseCommand):
+    help = (
+        "Move raw Attendance rows of closed months outside the hot window into compressed "
+        "monthly archive files, or restore an archived month"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--keep-months",
+            type=int,
+            default=settings.ATTENDANCE_HOT_MONTHS,
+            help="Closed months kept in the hot table besides the current one",
+        )
+        parser.add_argument("--dir", default=settings.ATTENDANCE_ARCHIVE_DIR, help="Archive directory")
+        parser.add_argument("--dry-run", action="store_true", help="Only list the months that would be archived")
+        parser.add_argument("--restore", type=parse_month, metavar="YYYY-MM", help="Move this month back into the hot table")
+
+    def handle(self, *args, **options):
+        if options["restore"]:
+            month = options["restore"]
+            if not AttendanceArchive.objects.filter(month=month).exists():
+                raise CommandError(f"{month:%Y-%m} is not archived")
+            restored = restore_month(month)
+            self.stdout.write(self.style.SUCCESS(f"Restored {restored} rows of {month:%Y-%m}"))
+            return
+
+        if options["keep_months"] < 0:
+            raise CommandError("--keep-months cannot be negative")
+        months = archivable_months(hot_cutoff(keep_months=options["keep_months"]))
+        if not months:
+            self.stdout.write("Nothing to archive")
+            return
+
+        for month in months:
+            if options["dry_run"]:
+                self.stdout.write(f"Would archive {month:%Y-%m}")
+                continue
+            archive = archive_month(month, options["dir"])
+            self.stdout.write(f"Archived {month:%Y-%m}: {archive.rows} rows -> {archive.path}")
+        if not options["dry_run"]:
+            self.stdout.write(self.style.SUCCESS(f"Archived {len(months)} months"))
@@ -0,0 +1,60 @@
+import json
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_time
+
+from app.analytics import METRICS, analyze_attendance
+
+
+class Command(BaseCommand):
+    help = "Late arrivals, overtime, missing clock-outs and break overruns per employee for a month or date range"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--month", help="YYYY-MM (default: last month)")
+        parser.add_argument("--start", type=parse_date, help="First day (YYYY-MM-DD), instead of --month")
+        parser.add_argument("--end", type=parse_date, help="Last day (YYYY-MM-DD), instead of --month")
+        parser.add_argument("--department")
+        parser.add_argument("--employee-id")
+        parser.add_argument("--shift-start", type=parse_time, help="HH:MM, overrides ATTENDANCE_SHIFT_START")
+        parser.add_argument("--late-grace-minutes", type=int)
+        parser.add_argument("--workers", type=int, help="Reader processes (0 = in-process)")
+        parser.add_argument("--output", help="Write the full per-employee result as JSON to this path")
+
+    def handle(self, *args, **options):
+        start, end = self.date_range(options)
+        result = analyze_attendance(
+            start,
+            end,
+            employee_id=options["employee_id"],
+            department=options["department"],
+            workers=options["workers"],
+            shift_start=options["shift_start"],
+            late_grace_minutes=options["late_grace_minutes"],
+        )
+
+        self.stdout.write(f"{start} to {end}: {result['rows']} rows in {result['seconds']:.2f}s")
+        for metric in METRICS:
+            self.stdout.write(f"  {metric:<20}{result['totals'][metric]:>16}")
+        flagged = sum(1 for row in result["results"] if row["flagged"])
+        self.stdout.write(f"  {'flagged employees':<20}{flagged:>16}")
+        if options["output"]:
+            with open(options["output"], "w") as output:
+                json.dump(result, output, cls=DjangoJSONEncoder, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Wrote {options['output']}"))
+
+    def date_range(self, options):
+        if options["start"] or options["end"]:
+            if not (options["start"] and options["end"]):
+                raise CommandError("--start and --end go together")
+            return options["start"], options["end"]
+        if options["month"]:
+            start = parse_date(f"{options['month']}-01")
+            if start is None:
+                raise CommandError("--month must be YYYY-MM")
+        else:
+            start = (timezone.localdate().replace(day=1) - timedelta(days=1)).replace(day=1)
+        end = (start.replace(day=28) + timedelta(days=4)).replace(day=1) - timedelta(days=1)
+        return start, end
@@ -0,0 +1,51 @@
+import base64
+import secrets
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import Client, override_settings
+
+from app.authentication import ACCESS, issue_token
+from app.models import EmployeeUser
+
+
+class Command(BaseCommand):
+    help = "Compare requests/sec of Basic auth against signed bearer tokens on one endpoint"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=200)
+        parser.add_argument("--path", default="/api/muster-request/list/")
+
+    def handle(self, *args, **options):
+        # Everything runs inside a transaction that is rolled back, so the
+        # throwaway benchmark user never reaches the database.
+        with transaction.atomic(), override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"]):
+            password = secrets.token_urlsafe()
+            user = EmployeeUser.objects.create_user(employee_id=f"bench-{secrets.token_hex(4)}", password=password)
+            credentials = base64.b64encode(f"{user.employee_id}:{password}".encode()).decode()
+
+            schemes = {
+                "basic": f"Basic {credentials}",
+                "token": f"Bearer {issue_token(user, ACCESS)}",
+            }
+            results = {
+                name: self.measure(options["path"], header, options["requests"]) for name, header in schemes.items()
+            }
+            transaction.set_rollback(True)
+
+        for name, rate in results.items():
+            self.stdout.write(f"{name:>6}: {rate:8.1f} req/s")
+        self.stdout.write(f"speedup: {results['token'] / results['basic']:.1f}x")
+
+    def measure(self, path, header, count):
+        client = Client(HTTP_AUTHORIZATION=header)
+        response = client.get(path)
+        if response.status_code != 200:
+            self.stderr.write(f"{path} returned {response.status_code} for {header.split()[0]} auth")
+
+        started = time.perf_counter()
+        for _ in range(count):
+            client.get(path)
+        return count / (time.perf_counter() - started)
@@ -0,0 +1,165 @@
+import json
+import os
+import random
+import statistics
+import subprocess
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.urls import reverse
+from django.utils import timezone
+
+from app.authentication import ACCESS, issue_token
+from app.models import EmployeeUser
+from app.profiling import QueryTimer, percentile
+from app.rollup import rebuild_daily_rollups
+from app.synthetic import generate_attendance, generate_employees, generate_muster_requests
+
+PUNCH_ROUTES = ["clock_in", "break_in", "break_out", "lunch_in", "lunch_out", "clock_out"]
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a throwaway test database and measure latency, queries per request and "
+        "requests/sec of the punch, summary and list endpoints"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--employees", type=int, default=500)
+        parser.add_argument("--days", type=int, default=30, help="Days of attendance history to seed")
+        parser.add_argument("--muster-per-employee", type=int, default=5)
+        parser.add_argument("--requests", type=int, default=200, help="Requests per read endpoint")
+        parser.add_argument("--concurrency", type=int, default=1, help="Client threads replaying requests")
+        parser.add_argument("--seed", type=int, default=1)
+        parser.add_argument("--output", help="Write the results as JSON to this path")
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options["seed"])
+        self.concurrency = options["concurrency"]
+
+        # Same isolation as the test runner: a fresh test database that is
+        # destroyed afterwards, so real data is never touched. Concurrent
+        # SQLite runs need a file database; the in-memory one locks whole
+        # tables between threads.
+        if connection.vendor == "sqlite" and self.concurrency > 1:
+            connection.settings_dict["TEST"]["NAME"] = os.path.join(tempfile.gettempdir(), "benchmark.sqlite3")
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            started = time.perf_counter()
+            self.seed(options)
+            self.stdout.write(f"Seeded in {time.perf_counter() - started:.1f}s")
+            results = self.run_scenarios(options["requests"])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        report = {"meta": self.meta(options), "results": results}
+        self.print_report(results)
+        if options["output"]:
+            with open(options["output"], "w") as output:
+                json.dump(report, output, indent=2)
+            self.stdout.write(f"Wrote {options['output']}")
+
+    # ---------------- Data ----------------
+    def seed(self, options):
+        user_ids = generate_employees(options["employees"], self.rng, password="benchmark")
+        self.hr = EmployeeUser.objects.create_user(employee_id="BENCH-HR", role="hr")
+        self.employees = list(EmployeeUser.objects.filter(role="employee").order_by("id"))
+
+        if options["days"]:
+            end = timezone.localdate() - timedelta(days=1)
+            start = end - timedelta(days=options["days"] - 1)
+            generate_attendance(user_ids, start, end, self.rng, weekends=True)
+            generate_muster_requests(user_ids, len(user_ids) * options["muster_per_employee"], start, end, self.rng)
+            rebuild_daily_rollups()
+
+        self.tokens = {user.pk: issue_token(user, ACCESS) for user in [self.hr, *self.employees]}
+
+    # ---------------- Scenarios ----------------
+    def run_scenarios(self, request_count):
+        results = {}
+        for route in PUNCH_ROUTES:
+            # Shift-start burst: every employee punches once
+            calls = [("post", reverse(route), employee.pk) for employee in self.employees]
+            results[route] = self.replay(calls)
+
+        summary = [("get", reverse("attendance-summary-api"), self.hr.pk)] * request_count
+        results["attendance-summary-api (cold)"] = self.replay(summary, before_each=cache.clear)
+        results["attendance-summary-api (cached)"] = self.replay(summary)
+        results["list-employees"] = self.replay([("get", reverse("list-employees"), self.hr.pk)] * request_count)
+        results["list-muster-request"] = self.replay(
+            [("get", reverse("list-muster-request"), self.rng.choice(self.employees).pk) for _ in range(request_count)]
+        )
+        return results
+
+    def replay(self, calls, before_each=None):
+        def run(call):
+            method, path, user_id = call
+            if before_each:
+                before_each()
+            client = Client(raise_request_exception=False, HTTP_AUTHORIZATION=f"Bearer {self.tokens[user_id]}")
+            timer = QueryTimer()
+            started = time.perf_counter()
+            with connection.execute_wrapper(timer):
+                response = getattr(client, method)(path)
+            return time.perf_counter() - started, timer.count, response.status_code < 400
+
+        def run_in_thread(call):
+            try:
+                return run(call)
+            finally:
+                connection.close()
+
+        started = time.perf_counter()
+        if self.concurrency > 1:
+            with ThreadPoolExecutor(self.concurrency) as pool:
+                samples = list(pool.map(run_in_thread, calls))
+        else:
+            samples = [run(call) for call in calls]
+        wall = time.perf_counter() - started
+
+        latencies = [seconds * 1000 for seconds, _, _ in samples]
+        return {
+            "requests": len(samples),
+            "errors": sum(1 for _, _, ok in samples if not ok),
+            "p50_ms": percentile(latencies, 50),
+            "p95_ms": percentile(latencies, 95),
+            "p99_ms": percentile(latencies, 99),
+            "queries_per_request": statistics.mean(count for _, count, _ in samples),
+            "requests_per_sec": len(samples) / wall,
+        }
+
+    # ---------------- Output ----------------
+    def meta(self, options):
+        try:
+            commit = subprocess.run(
+                ["git", "rev-parse", "HEAD"], capture_output=True, text=True, cwd=settings.BASE_DIR, check=True
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            commit = None
+        return {
+            "commit": commit,
+            "timestamp": timezone.now().isoformat(),
+            "database": connection.vendor,
+            "options": {
+                key: options[key]
+                for key in ["employees", "days", "muster_per_employee", "requests", "concurrency", "seed"]
+            },
+        }
+
+    def print_report(self, results):
+        self.stdout.write(f"{'endpoint':<34}{'reqs':>7}{'err':>5}{'p50':>9}{'p95':>9}{'p99':>9}{'q/req':>7}{'req/s':>9}")
+        for name, row in results.items():
+            self.stdout.write(
+                f"{name:<34}{row['requests']:>7}{row['errors']:>5}{row['p50_ms']:>9.2f}{row['p95_ms']:>9.2f}"
+                f"{row['p99_ms']:>9.2f}{row['queries_per_request']:>7.1f}{row['requests_per_sec']:>9.1f}"
+            )
@@ -0,0 +1,155 @@
+import asyncio
+import io
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import connection
+from django.urls import reverse
+
+from app.profiling import percentile
+from .benchmark import Command as BenchmarkCommand
+
+# (sync path, async path, who calls it)
+ENDPOINTS = [
+    ("clock_in", "clock_in-async", "employee"),
+    ("attendance-summary-api", "attendance-summary-async", "hr"),
+]
+
+
+class Command(BenchmarkCommand):
+    help = (
+        "Compare how the WSGI application (threaded, project/wsgi.py) and the ASGI application "
+        "(event loop, project/asgi.py) cope with many concurrent client connections on the punch "
+        "and summary endpoints"
+    )
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.set_defaults(days=0, muster_per_employee=0, concurrency=32)
+        parser.add_argument(
+            "--connections", default="50,200,1000", help="Comma-separated numbers of simultaneous clients"
+        )
+        parser.add_argument(
+            "--client-delay-ms", type=float, default=100,
+            help="Time the server spends receiving each request from a slow client (mobile kiosks, "
+                 "bad Wi-Fi). WSGI holds a worker thread for it, ASGI only a coroutine.",
+        )
+
+    def handle(self, *args, **options):
+        # --concurrency is the WSGI worker thread count (gunicorn gthread style)
+        self.levels = [int(level) for level in options["connections"].split(",")]
+        self.client_delay = options["client_delay_ms"] / 1000
+        super().handle(*args, **options)
+
+    # ---------------- Scenarios ----------------
+    def run_scenarios(self, request_count):
+        from project.asgi import application as asgi_application
+        from project.wsgi import application as wsgi_application
+
+        callers = {"employee": [employee.pk for employee in self.employees], "hr": [self.hr.pk]}
+        results = {}
+        for level in self.levels:
+            for sync_name, async_name, caller in ENDPOINTS:
+                method = "POST" if caller == "employee" else "GET"
+                users = [callers[caller][i % len(callers[caller])] for i in range(level)]
+                results[f"{sync_name} wsgi x{level}"] = self.run_wsgi(
+                    wsgi_application, method, reverse(sync_name), users
+                )
+                results[f"{async_name} asgi x{level}"] = asyncio.run(
+                    self.run_asgi(asgi_application, method, reverse(async_name), users)
+                )
+        return results
+
+    def run_wsgi(self, application, method, path, users):
+        # Every client connects at once; latency includes the time spent
+        # waiting for a free worker thread, as it would behind a real server.
+        started = time.perf_counter()
+
+        def call(user_id):
+            try:
+                time.sleep(self.client_delay)
+                status = []
+                environ = {
+                    "REQUEST_METHOD": method,
+                    "PATH_INFO": path,
+                    "SCRIPT_NAME": "",
+                    "QUERY_STRING": "",
+                    "SERVER_NAME": "testserver",
+                    "SERVER_PORT": "80",
+                    "SERVER_PROTOCOL": "HTTP/1.1",
+                    "CONTENT_LENGTH": "0",
+                    "HTTP_AUTHORIZATION": f"Bearer {self.tokens[user_id]}",
+                    "wsgi.input": io.BytesIO(),
+                    "wsgi.errors": io.StringIO(),
+                    "wsgi.url_scheme": "http",
+                    "wsgi.version": (1, 0),
+                    "wsgi.multithread": True,
+                    "wsgi.multiprocess": False,
+                    "wsgi.run_once": False,
+                }
+                body = application(environ, lambda line, headers: status.append(int(line.split()[0])))
+                b"".join(body)
+                body.close()
+                return time.perf_counter() - started, status[0] < 400
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(self.concurrency) as pool:
+            samples = list(pool.map(call, users))
+        return self.summarize(samples, time.perf_counter() - started)
+
+    async def run_asgi(self, application, method, path, users):
+        started = time.perf_counter()
+
+        async def call(user_id):
+            status = []
+            request_sent = False
+
+            async def receive():
+                nonlocal request_sent
+                if not request_sent:
+                    await asyncio.sleep(self.client_delay)
+                    request_sent = True
+                    return {"type": "http.request", "body": b"", "more_body": False}
+                # The client stays connected until the response is sent
+                await asyncio.Event().wait()
+
+            async def send(message):
+                if message["type"] == "http.response.start":
+                    status.append(message["status"])
+
+            scope = {
+                "type": "http",
+                "asgi": {"version": "3.0"},
+                "http_version": "1.1",
+                "method": method,
+                "scheme": "http",
+                "path": path,
+                "raw_path": path.encode(),
+                "query_string": b"",
+                "root_path": "",
+                "headers": [
+                    (b"host", b"testserver"),
+                    (b"authorization", f"Bearer {self.tokens[user_id]}".encode()),
+                ],
+                "client": ("127.0.0.1", 50000),
+                "server": ("testserver", 80),
+            }
+            await application(scope, receive, send)
+            return time.perf_counter() - started, status[0] < 400
+
+        samples = await asyncio.gather(*(call(user_id) for user_id in users))
+        return self.summarize(samples, time.perf_counter() - started)
+
+    def summarize(self, samples, wall):
+        latencies = [seconds * 1000 for seconds, _ in samples]
+        return {
+            "requests": len(samples),
+            "errors": sum(1 for _, ok in samples if not ok),
+            "p50_ms": percentile(latencies, 50),
+            "p95_ms": percentile(latencies, 95),
+            "p99_ms": percentile(latencies, 99),
+            # Not measured here; the SQL is identical on both paths
+            "queries_per_request": 0,
+            "requests_per_sec": len(samples) / wall,
+        }
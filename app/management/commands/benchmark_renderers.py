@@ -0,0 +1,129 @@
+import gzip
+import json
+import random
+import statistics
+import time
+from datetime import timedelta
+
+import brotli
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from app.authentication import ACCESS, issue_token
+from app.models import EmployeeUser
+from app.renderers import MessagePackRenderer, ORJSONRenderer
+from app.rollup import rebuild_daily_rollups
+from app.synthetic import generate_attendance, generate_employees, generate_muster_requests
+
+RENDERERS = {
+    "drf-json": JSONRenderer(),
+    "orjson": ORJSONRenderer(),
+    "msgpack": MessagePackRenderer(),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a throwaway test database and compare render time and bytes on the wire "
+        "(raw, gzip, brotli) of DRF's JSONRenderer against the orjson and MessagePack renderers"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--employees", type=int, default=1000)
+        parser.add_argument("--days", type=int, default=7, help="Days of attendance history to seed")
+        parser.add_argument("--repeat", type=int, default=50, help="Renders per payload and renderer")
+        parser.add_argument("--seed", type=int, default=1)
+        parser.add_argument("--output", help="Write the results as JSON to this path")
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            payloads = self.payloads(options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        results = {
+            name: {renderer: self.measure(renderer, data, options["repeat"]) for renderer in RENDERERS}
+            for name, data in payloads.items()
+        }
+        self.print_report(results)
+        if options["output"]:
+            with open(options["output"], "w") as output:
+                json.dump({"options": options, "results": results}, output, indent=2, default=str)
+            self.stdout.write(f"Wrote {options['output']}")
+
+    def payloads(self, options):
+        """The `Response.data` of each high-volume endpoint, as the views build it."""
+        rng = random.Random(options["seed"])
+        user_ids = generate_employees(options["employees"], rng, password="benchmark")
+        end = timezone.localdate()
+        start = end - timedelta(days=options["days"] - 1)
+        generate_attendance(user_ids, start, end, rng, weekends=True)
+        generate_muster_requests(user_ids, len(user_ids) * 2, start, end, rng)
+        rebuild_daily_rollups()
+        hr = EmployeeUser.objects.create_user(employee_id="BENCH-HR", role="hr")
+        employee = EmployeeUser.objects.get(pk=user_ids[0])
+
+        calls = {
+            "list-employees (1000)": (hr, reverse("list-employees"), {"limit": 1000}),
+            "attendance-summary-api": (hr, reverse("attendance-summary-api"), {}),
+            "muster-request-queue (1000)": (hr, reverse("muster-request-queue"), {"limit": 1000}),
+            "list-muster-request": (employee, reverse("list-muster-request"), {}),
+        }
+        payloads = {}
+        for name, (user, path, params) in calls.items():
+            client = Client(HTTP_AUTHORIZATION=f"Bearer {issue_token(user, ACCESS)}")
+            response = client.get(path, params)
+            if response.status_code != 200:
+                self.stderr.write(f"{path} returned {response.status_code}, skipped")
+                continue
+            payloads[name] = response.data
+        return payloads
+
+    def measure(self, renderer_name, data, repeat):
+        renderer = RENDERERS[renderer_name]
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            body = renderer.render(data)
+            timings.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        gzipped = gzip.compress(body, compresslevel=settings.RESPONSE_GZIP_LEVEL, mtime=0)
+        gzip_seconds = time.perf_counter() - started
+        started = time.perf_counter()
+        brotlied = brotli.compress(body, quality=settings.RESPONSE_BROTLI_QUALITY)
+        brotli_seconds = time.perf_counter() - started
+
+        if renderer_name == "orjson":
+            # Same document as DRF's renderer, byte-for-byte once parsed
+            assert json.loads(body) == json.loads(RENDERERS["drf-json"].render(data))
+        return {
+            "render_ms": statistics.median(timings) * 1000,
+            "bytes": len(body),
+            "gzip_bytes": len(gzipped),
+            "gzip_ms": gzip_seconds * 1000,
+            "brotli_bytes": len(brotlied),
+            "brotli_ms": brotli_seconds * 1000,
+        }
+
+    def print_report(self, results):
+        self.stdout.write(
+            f"{'payload':<30}{'renderer':<10}{'render ms':>10}{'bytes':>10}{'gzip':>9}{'gz ms':>7}{'br':>9}{'br ms':>7}"
+        )
+        for name, rows in results.items():
+            baseline = rows["drf-json"]["render_ms"]
+            for renderer, row in rows.items():
+                self.stdout.write(
+                    f"{name:<30}{renderer:<10}{row['render_ms']:>10.2f}{row['bytes']:>10}{row['gzip_bytes']:>9}"
+                    f"{row['gzip_ms']:>7.2f}{row['brotli_bytes']:>9}{row['brotli_ms']:>7.2f}"
+                    f"  {baseline / row['render_ms']:.1f}x"
+                )
@@ -0,0 +1,28 @@
+import sys
+
+from django.core.management.base import BaseCommand
+
+from app.employee_io import EXPORT_FIELDS, FORMATS, export_queryset
+from app.streaming import STREAM_CHUNK_SIZE, csv_lines, ndjson_lines
+
+
+class Command(BaseCommand):
+    help = "Stream every employee to a CSV or NDJSON file"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--format", choices=FORMATS, default="csv")
+        parser.add_argument("--output", help="Defaults to stdout")
+
+    def handle(self, *args, **options):
+        rows = export_queryset().iterator(chunk_size=STREAM_CHUNK_SIZE)
+        if options["format"] == "csv":
+            lines = csv_lines(rows, EXPORT_FIELDS)
+        else:
+            lines = ndjson_lines(rows)
+
+        output = open(options["output"], "w", newline="") if options["output"] else sys.stdout
+        try:
+            output.writelines(lines)
+        finally:
+            if options["output"]:
+                output.close()
@@ -0,0 +1,15 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from app.punch_buffer import PunchJournal
+
+
+class Command(BaseCommand):
+    help = "Apply punches waiting in the buffered-punch journal, e.g. after a crash or with background flushing off"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dir", default=settings.PUNCH_BUFFER_DIR, help="Journal directory")
+
+    def handle(self, *args, **options):
+        applied = PunchJournal(options["dir"], fsync=settings.PUNCH_BUFFER_FSYNC).flush()
+        self.stdout.write(self.style.SUCCESS(f"Applied {applied} journaled punches"))
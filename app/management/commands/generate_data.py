@@ -0,0 +1,63 @@
+import random
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from app.models import EmployeeUser
+from app.rollup import rebuild_daily_rollups
+from app.synthetic import generate_attendance, generate_employees, generate_muster_requests
+
+
+class Command(BaseCommand):
+    help = "Bulk-generate deterministic employees, attendance history and muster requests for performance work"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--employees", type=int, default=1000)
+        parser.add_argument("--days", type=int, default=365, help="Days of attendance history")
+        parser.add_argument("--end", type=parse_date, help="Last day of history (default: yesterday)")
+        parser.add_argument("--muster", type=int, default=0, help="Number of muster requests")
+        parser.add_argument("--absence-rate", type=float, default=0.05)
+        parser.add_argument("--weekends", action="store_true", help="Also generate Saturday/Sunday rows")
+        parser.add_argument("--prefix", default="EMP", help="Employee ID prefix")
+        parser.add_argument("--password", default="changeme", help="Password shared by every generated employee")
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--batch-size", type=int, default=20000, help="Rows per INSERT transaction")
+        parser.add_argument("--skip-rollup", action="store_true", help="Do not rebuild AttendanceDaily afterwards")
+
+    def handle(self, *args, **options):
+        if EmployeeUser.objects.filter(employee_id__startswith=options["prefix"]).exists():
+            raise CommandError(f"Employees with prefix {options['prefix']!r} already exist; pick another --prefix")
+
+        rng = random.Random(options["seed"])
+        end = options["end"] or timezone.localdate() - timedelta(days=1)
+        start = end - timedelta(days=options["days"] - 1)
+        batch_size = options["batch_size"]
+
+        started = time.perf_counter()
+        user_ids = generate_employees(
+            options["employees"], rng, options["prefix"], options["password"], batch_size=batch_size
+        )
+        self.report("employees", len(user_ids), started)
+
+        step = time.perf_counter()
+        rows = generate_attendance(
+            user_ids, start, end, rng, options["absence_rate"], options["weekends"], batch_size=batch_size
+        )
+        self.report("attendance rows", rows, step)
+
+        if options["muster"]:
+            step = time.perf_counter()
+            requests = generate_muster_requests(user_ids, options["muster"], start, end, rng, batch_size=batch_size)
+            self.report("muster requests", requests, step)
+
+        if not options["skip_rollup"]:
+            step = time.perf_counter()
+            self.report("daily rollup rows", rebuild_daily_rollups(start, end, batch_size), step)
+
+        self.stdout.write(self.style.SUCCESS(f"Done in {time.perf_counter() - started:.1f}s"))
+
+    def report(self, label, count, started):
+        self.stdout.write(f"{count:>10} {label} in {time.perf_counter() - started:.1f}s")
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from app.employee_io import FORMATS, detect_format, import_employees, parse_rows
+
+
+class Command(BaseCommand):
+    help = "Bulk-create employees from a CSV or NDJSON file"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument("--format", choices=FORMATS, help="Defaults to the file extension")
+        parser.add_argument("--chunk-size", type=int)
+        parser.add_argument("--workers", type=int, help="Password hashing processes (0 = in-process)")
+
+    def handle(self, *args, **options):
+        file_format = options["format"] or detect_format(options["path"])
+        if file_format not in FORMATS:
+            raise CommandError("Cannot tell the file format; pass --format csv or --format ndjson")
+
+        with open(options["path"], "rb") as stream:
+            result = import_employees(
+                parse_rows(stream, file_format), chunk_size=options["chunk_size"], workers=options["workers"]
+            )
+
+        for error in result["errors"]:
+            self.stderr.write(f"line {error['line']}: {error['errors']}")
+        self.stdout.write(self.style.SUCCESS(f"Created {result['created']} employees, {len(result['errors'])} errors"))
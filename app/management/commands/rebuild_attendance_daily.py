@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from django.utils.dateparse import parse_date
+
+from app.rollup import rebuild_daily_rollups
+
+
+class Command(BaseCommand):
+    help = "Recompute the AttendanceDaily rollup from raw Attendance rows"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--start", type=parse_date, help="First day to rebuild (YYYY-MM-DD)")
+        parser.add_argument("--end", type=parse_date, help="Last day to rebuild (YYYY-MM-DD)")
+        parser.add_argument("--batch-size", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        total = rebuild_daily_rollups(options["start"], options["end"], options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {total} daily attendance rows"))
@@ -0,0 +1,20 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from app.jobs import run_worker
+
+
+class Command(BaseCommand):
+    help = (
+        "Run queued background jobs (reports, imports, rollup rebuilds). Start several "
+        "of these for more throughput; each job is claimed by exactly one worker"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=settings.JOB_WORKERS, help="Worker threads")
+        parser.add_argument("--poll-interval", type=float, default=settings.JOB_POLL_INTERVAL)
+        parser.add_argument("--once", action="store_true", help="Exit once the queue is empty")
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"Running jobs with {options['workers']} workers")
+        run_worker(max(options["workers"], 1), options["poll_interval"], once=options["once"])
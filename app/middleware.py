@@ -0,0 +1,255 @@
+import gzip
+import hashlib
+import logging
+import random
+import time
+from contextlib import contextmanager
+
+import brotli
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.utils.cache import patch_vary_headers
+
+from .profiling import (
+    QueryTimer,
+    SerializerTimer,
+    instrument_queries,
+    instrument_serializers,
+    profile_store,
+    query_timer,
+    serializer_timer,
+)
+from .routers import RoutingState, routing_state
+
+logger = logging.getLogger(__name__)
+
+
+class QueryProfilingMiddleware:
+    """
+    Opt-in (PROFILING_ENABLED) per-request profiler.
+
+    For a PROFILING_SAMPLE_RATE share of requests it records query count,
+    SQL time, serialization time (`serializer.data`, including any queries
+    it triggers), render time (the DRF renderer turning `Response.data`
+    into bytes), total time and response size under the URL name, and
+    reports them to the client in a Server-Timing header. Aggregated
+    percentiles are served by the admin-only profiling endpoint.
+
+    Runs natively on both stacks. Queries are counted on whichever thread
+    runs them, so an async view's sync_to_async ORM calls are included;
+    queries in other processes (the job worker's analytics pool) are not.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.PROFILING_ENABLED:
+            raise MiddlewareNotUsed
+        instrument_queries()
+        instrument_serializers()
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if random.random() >= settings.PROFILING_SAMPLE_RATE:
+            return self.get_response(request)
+
+        started = time.perf_counter()
+        with self.timers() as (timer, serializing):
+            response = self.get_response(request)
+        return self.record(request, response, timer, serializing, time.perf_counter() - started)
+
+    async def __acall__(self, request):
+        if random.random() >= settings.PROFILING_SAMPLE_RATE:
+            return await self.get_response(request)
+
+        started = time.perf_counter()
+        with self.timers() as (timer, serializing):
+            response = await self.get_response(request)
+        return self.record(request, response, timer, serializing, time.perf_counter() - started)
+
+    @contextmanager
+    def timers(self):
+        timer, serializing = QueryTimer(), SerializerTimer()
+        tokens = query_timer.set(timer), serializer_timer.set(serializing)
+        try:
+            yield timer, serializing
+        finally:
+            query_timer.reset(tokens[0])
+            serializer_timer.reset(tokens[1])
+
+    def record(self, request, response, timer, serializing, total):
+        render = getattr(request, "_profiling_render", [])
+        sample = {
+            "queries": timer.count,
+            "sql_ms": timer.seconds * 1000,
+            "serialize_ms": serializing.seconds * 1000,
+            "render_ms": (render[1] - render[0]) * 1000 if len(render) == 2 else None,
+            "total_ms": total * 1000,
+            "bytes": None if response.streaming else len(response.content),
+        }
+
+        match = request.resolver_match
+        name = match.url_name if match and match.url_name else "<unresolved>"
+        profile_store.record(name, sample)
+
+        if timer.count > settings.PROFILING_QUERY_WARNING:
+            logger.warning("%s ran %d queries (%.1f ms of SQL)", name, timer.count, sample["sql_ms"])
+
+        timings = [
+            f'db;dur={sample["sql_ms"]:.2f};desc="{timer.count} queries"',
+            f"serialize;dur={sample['serialize_ms']:.2f}",
+        ]
+        if sample["render_ms"] is not None:
+            timings.append(f"render;dur={sample['render_ms']:.2f}")
+        timings.append(f"total;dur={sample['total_ms']:.2f}")
+        response["Server-Timing"] = ", ".join(timings)
+        return response
+
+    def process_template_response(self, request, response):
+        # DRF responses are rendered right after this hook returns
+        request._profiling_render = [time.perf_counter()]
+        response.add_post_render_callback(lambda _: request._profiling_render.append(time.perf_counter()))
+        return response
+
+
+class DatabaseRoutingMiddleware:
+    """
+    Decide per request whether reads may use a replica (see app.routers).
+
+    Unsafe methods stay on the primary. A client that wrote is remembered
+    for REPLICA_STICKY_SECONDS, keyed on its credentials, so the next few
+    requests (e.g. the dashboard refresh after a punch) read from the
+    primary too. Runs natively on both stacks; the routing state reaches
+    the ORM calls an async view makes through sync_to_async.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.DATABASE_REPLICAS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        pin_key = self.pin_key(request)
+        state = RoutingState(primary=self.needs_primary(request, pin_key and cache.get(pin_key)))
+        token = routing_state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            routing_state.reset(token)
+        if state.wrote and pin_key:
+            cache.set(pin_key, True, settings.REPLICA_STICKY_SECONDS)
+        return response
+
+    async def __acall__(self, request):
+        pin_key = self.pin_key(request)
+        state = RoutingState(primary=self.needs_primary(request, pin_key and await cache.aget(pin_key)))
+        token = routing_state.set(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            routing_state.reset(token)
+        if state.wrote and pin_key:
+            await cache.aset(pin_key, True, settings.REPLICA_STICKY_SECONDS)
+        return response
+
+    @staticmethod
+    def needs_primary(request, pinned):
+        return request.method not in ("GET", "HEAD", "OPTIONS") or bool(pinned)
+
+    @staticmethod
+    def pin_key(request):
+        credentials = request.headers.get("Authorization") or request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+        if not credentials:
+            return None
+        return "db-pin:" + hashlib.sha256(credentials.encode()).hexdigest()
+
+
+class CompressionMiddleware:
+    """
+    Brotli or gzip for large API bodies, whichever the client prefers.
+
+    Only buffered responses of RESPONSE_COMPRESSION_TYPES of at least
+    RESPONSE_COMPRESSION_MIN_BYTES are compressed; small bodies (logins,
+    token refreshes, punches) and streams (CSV/NDJSON exports, SSE) pass
+    through untouched. Like Django's GZipMiddleware, a strong ETag is
+    weakened since it no longer describes the bytes sent. Runs natively on
+    both stacks, so the async views never hop to a worker thread for it.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.compress(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self.compress(request, await self.get_response(request))
+
+    def compress(self, request, response):
+        if (
+            response.streaming
+            or response.has_header("Content-Encoding")
+            or len(response.content) < settings.RESPONSE_COMPRESSION_MIN_BYTES
+            or response.get("Content-Type", "").split(";")[0].strip() not in settings.RESPONSE_COMPRESSION_TYPES
+        ):
+            return response
+
+        patch_vary_headers(response, ("Accept-Encoding",))
+        encoding = self.pick_encoding(request.headers.get("Accept-Encoding", ""))
+        if encoding == "br":
+            compressed = brotli.compress(response.content, quality=settings.RESPONSE_BROTLI_QUALITY)
+        elif encoding == "gzip":
+            compressed = gzip.compress(response.content, compresslevel=settings.RESPONSE_GZIP_LEVEL, mtime=0)
+        else:
+            return response
+        if len(compressed) >= len(response.content):
+            return response
+
+        response.content = compressed
+        response["Content-Length"] = str(len(compressed))
+        response["Content-Encoding"] = encoding
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response["ETag"] = "W/" + etag
+        return response
+
+    @staticmethod
+    def pick_encoding(accept_encoding):
+        """"br" or "gzip" from an Accept-Encoding header, preferring brotli on a tie; None for neither."""
+        weights = {}
+        for item in accept_encoding.split(","):
+            coding, *parameters = (part.strip() for part in item.split(";"))
+            weight = 1.0
+            for parameter in parameters:
+                key, _, value = parameter.partition("=")
+                if key.strip() == "q":
+                    try:
+                        weight = float(value)
+                    except ValueError:
+                        weight = 0.0
+            weights[coding.lower()] = weight
+        for coding in ("br", "gzip"):
+            weights.setdefault(coding, weights.get("*", 0.0))
+        best = max(("br", "gzip"), key=lambda coding: weights[coding])
+        return best if weights[best] > 0 else None
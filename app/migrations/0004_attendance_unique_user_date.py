@@ -0,0 +1,37 @@
+# Generated by Django 5.2.6 on 2026-10-17 13:08
+
+from django.db import migrations, models
+from django.db.models import Count
+
+PUNCH_FIELDS = ["clock_in", "clock_out", "break_in", "break_out", "lunch_in", "lunch_out"]
+
+
+def merge_duplicate_attendance(apps, schema_editor):
+    """Fold duplicate (user, date) rows into the oldest one, keeping the latest value of each punch."""
+    Attendance = apps.get_model("app", "Attendance")
+    duplicates = list(
+        Attendance.objects.values("user_id", "date").annotate(rows=Count("id")).filter(rows__gt=1)
+    )
+    for duplicate in duplicates:
+        rows = list(Attendance.objects.filter(user_id=duplicate["user_id"], date=duplicate["date"]).order_by("id"))
+        keep = rows[0]
+        for field in PUNCH_FIELDS:
+            values = [getattr(row, field) for row in rows if getattr(row, field) is not None]
+            setattr(keep, field, max(values) if values else None)
+        keep.save(update_fields=PUNCH_FIELDS)
+        Attendance.objects.filter(pk__in=[row.pk for row in rows[1:]]).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0003_musterrequest'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_attendance, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='attendance',
+            constraint=models.UniqueConstraint(fields=('user', 'date'), name='unique_attendance_user_date'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-17 13:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0004_attendance_unique_user_date'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='employeeuser',
+            name='token_version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
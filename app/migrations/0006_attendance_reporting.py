@@ -0,0 +1,22 @@
+# Generated by Django 5.2.6 on 2026-10-17 13:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0005_employeeuser_token_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='employeeuser',
+            name='department',
+            field=models.CharField(blank=True, max_length=50, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='attendance',
+            index=models.Index(fields=['date', 'user'], name='attendance_date_user_idx'),
+        ),
+    ]
@@ -0,0 +1,74 @@
+# Generated by Django 5.2.6 on 2026-10-17 13:11
+
+from datetime import datetime, time, timedelta
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+
+PUNCH_FIELDS = ["clock_in", "clock_out", "break_in", "break_out", "lunch_in", "lunch_out"]
+
+
+# The rollup rules as they stood when this migration was written; kept
+# here rather than imported so later changes to app.rollup leave it alone.
+def _seconds_between(start, end):
+    if start is None or end is None or end <= start:
+        return 0
+    return int((end - start).total_seconds())
+
+
+def daily_totals(clock_in, clock_out, break_in, break_out, lunch_in, lunch_out):
+    shift_start = datetime.combine(datetime.min, time.fromisoformat(settings.ATTENDANCE_SHIFT_START))
+    late_after = (shift_start + timedelta(minutes=settings.ATTENDANCE_LATE_GRACE_MINUTES)).time()
+    worked = _seconds_between(clock_in, clock_out)
+    return {
+        "worked_seconds": worked,
+        "break_seconds": _seconds_between(break_in, break_out),
+        "lunch_seconds": _seconds_between(lunch_in, lunch_out),
+        "overtime_seconds": max(0, worked - settings.ATTENDANCE_STANDARD_WORK_SECONDS),
+        "is_late": clock_in is not None and timezone.localtime(clock_in).time() > late_after,
+    }
+
+
+def backfill_attendance_daily(apps, schema_editor):
+    Attendance = apps.get_model("app", "Attendance")
+    AttendanceDaily = apps.get_model("app", "AttendanceDaily")
+
+    batch = []
+    for row in Attendance.objects.values("user_id", "date", *PUNCH_FIELDS).iterator(chunk_size=2000):
+        totals = daily_totals(*(row[field] for field in PUNCH_FIELDS))
+        batch.append(AttendanceDaily(user_id=row["user_id"], date=row["date"], **totals))
+        if len(batch) >= 2000:
+            AttendanceDaily.objects.bulk_create(batch)
+            batch = []
+    AttendanceDaily.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0006_attendance_reporting'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttendanceDaily',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('worked_seconds', models.PositiveIntegerField(default=0)),
+                ('break_seconds', models.PositiveIntegerField(default=0)),
+                ('lunch_seconds', models.PositiveIntegerField(default=0)),
+                ('overtime_seconds', models.PositiveIntegerField(default=0)),
+                ('is_late', models.BooleanField(default=False)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['date', 'user'], name='attendance_daily_date_user_idx')],
+                'constraints': [models.UniqueConstraint(fields=('user', 'date'), name='unique_attendance_daily_user_date')],
+            },
+        ),
+        migrations.RunPython(backfill_attendance_daily, migrations.RunPython.noop),
+    ]
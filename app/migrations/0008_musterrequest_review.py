@@ -0,0 +1,29 @@
+# Generated by Django 5.2.6 on 2026-10-17 13:12
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0007_attendancedaily'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='musterrequest',
+            name='reviewed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='musterrequest',
+            name='reviewed_by',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='reviewed_muster_requests', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='musterrequest',
+            index=models.Index(fields=['status', 'created_at'], name='muster_status_created_idx'),
+        ),
+    ]
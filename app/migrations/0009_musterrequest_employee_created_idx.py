@@ -0,0 +1,17 @@
+# Generated by Django 5.2.6 on 2026-10-17 13:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0008_musterrequest_review'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='musterrequest',
+            index=models.Index(fields=['employee', 'created_at'], name='muster_employee_created_idx'),
+        ),
+    ]
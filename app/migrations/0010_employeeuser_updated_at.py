@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-17 13:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0009_musterrequest_employee_created_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='employeeuser',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
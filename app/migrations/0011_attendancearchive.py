@@ -0,0 +1,27 @@
+# Generated by Django 5.2.6 on 2026-10-17 13:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0010_employeeuser_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttendanceArchive',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(unique=True)),
+                ('path', models.CharField(max_length=500)),
+                ('rows', models.PositiveIntegerField()),
+                ('sha256', models.CharField(max_length=64)),
+                ('archived_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['month'],
+            },
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.6 on 2026-10-17 13:59
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0012_job'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Shift',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('start_time', models.TimeField()),
+                ('end_time', models.TimeField()),
+                ('late_grace_minutes', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Roster',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rosters', to=settings.AUTH_USER_MODEL)),
+                ('shift', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='rosters', to='app.shift')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['date', 'user'], name='roster_date_user_idx')],
+                'constraints': [models.UniqueConstraint(fields=('user', 'date'), name='unique_roster_user_date')],
+            },
+        ),
+    ]
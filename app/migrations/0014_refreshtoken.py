@@ -0,0 +1,26 @@
+# Generated by Django 5.2.6 on 2026-10-17 14:32
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0013_shift_roster'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RefreshToken',
+            fields=[
+                ('jti', models.UUIDField(default=uuid.uuid4, primary_key=True, serialize=False)),
+                ('family', models.UUIDField(db_index=True, default=uuid.uuid4)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('spent_at', models.DateTimeField(blank=True, null=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='refresh_tokens', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+    ]
@@ -1,5 +1,8 @@
+import uuid
+
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, PermissionsMixin
-from django.db import models
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models, transaction
 from django.utils import timezone
 
 class EmployeeUserManager(BaseUserManager):
@@ -59,8 +62,13 @@ class EmployeeUser(AbstractBaseUser, PermissionsMixin):
     role = models.CharField(max_length=20, choices=ROLE_CHOICES, default="employee")
     first_name = models.CharField(max_length=50, blank=True, null=True)
     last_name = models.CharField(max_length=50, blank=True, null=True)
+    department = models.CharField(max_length=50, blank=True, null=True)
     is_active = models.BooleanField(default=True)
     is_staff = models.BooleanField(default=True)
+    # Bumped to revoke every signed token issued to this user
+    token_version = models.PositiveIntegerField(default=0)
+    # Version stamp for conditional GETs on the employee list
+    updated_at = models.DateTimeField(auto_now=True)
 
     objects = EmployeeUserManager()
 
@@ -75,7 +83,37 @@ class EmployeeUser(AbstractBaseUser, PermissionsMixin):
         self.clean()
         if self.role in ["admin", "hr", "manager"]:
             self.is_staff = True
+        deferred = self.get_deferred_fields()
+        if deferred and not self._state.adding and kwargs.get("update_fields") is None:
+            # Django only writes the loaded fields of a partly loaded user
+            # (e.g. one built from the token auth principal); updated_at has
+            # to go too, or conditional GETs keep serving the old row.
+            kwargs["update_fields"] = [
+                field.attname for field in self._meta.concrete_fields
+                if not field.primary_key and field.attname not in deferred
+            ] + ["updated_at"]
         super().save(*args, **kwargs)
+        self.invalidate_principal()
+
+    def delete(self, *args, **kwargs):
+        user_id = self.pk
+        result = super().delete(*args, **kwargs)
+        self.invalidate_principal(user_id)
+        return result
+
+    def change_password(self, raw_password):
+        """Set a new password and invalidate every token issued under the old one (saved by `save()`)."""
+        self.set_password(raw_password)
+        self.token_version += 1
+
+    def invalidate_principal(self, user_id=None):
+        # Drop the cached role/is_active/token_version used by token auth,
+        # now and again once the surrounding transaction commits.
+        from .principals import invalidate_principal
+
+        user_id = user_id or self.pk
+        invalidate_principal(user_id)
+        transaction.on_commit(lambda: invalidate_principal(user_id))
 
     def __str__(self):
         return f"{self.employee_id} ({self.role})"
@@ -83,6 +121,8 @@ class EmployeeUser(AbstractBaseUser, PermissionsMixin):
 from .models import EmployeeUser
 
 class Attendance(models.Model):
+    PUNCH_FIELDS = ["clock_in", "clock_out", "break_in", "break_out", "lunch_in", "lunch_out"]
+
     user = models.ForeignKey(EmployeeUser, on_delete=models.CASCADE)
     date = models.DateField(default=timezone.localdate)
     clock_in = models.DateTimeField(null=True, blank=True)
@@ -92,6 +132,15 @@ class Attendance(models.Model):
     lunch_in = models.DateTimeField(null=True, blank=True)
     lunch_out = models.DateTimeField(null=True, blank=True)
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "date"], name="unique_attendance_user_date"),
+        ]
+        # (user, date) lookups are served by the unique constraint's index
+        indexes = [
+            models.Index(fields=["date", "user"], name="attendance_date_user_idx"),
+        ]
+
     def __str__(self):
         return f"{self.user.employee_id} - {self.date}"
 
@@ -109,6 +158,8 @@ class MusterRequest(models.Model):
         ("approved", "Approved"),
         ("rejected", "Rejected"),
     ]
+    # Attendance column an approved request corrects
+    ACTION_FIELDS = {"clockin": "clock_in", "clockout": "clock_out"}
 
     employee = models.ForeignKey(EmployeeUser, on_delete=models.CASCADE)
     action = models.CharField(max_length=10, choices=ACTION_CHOICES)
@@ -117,6 +168,172 @@ class MusterRequest(models.Model):
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="pending")
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    reviewed_by = models.ForeignKey(
+        EmployeeUser, on_delete=models.SET_NULL, null=True, blank=True, related_name="reviewed_muster_requests"
+    )
+    reviewed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "created_at"], name="muster_status_created_idx"),
+            models.Index(fields=["employee", "created_at"], name="muster_employee_created_idx"),
+        ]
 
     def __str__(self):
         return f"{self.employee.employee_id} - {self.action} at {self.requested_time}"
+
+
+class AttendanceDaily(models.Model):
+    """Per-user, per-day totals derived from Attendance, kept current by every punch."""
+
+    user = models.ForeignKey(EmployeeUser, on_delete=models.CASCADE)
+    date = models.DateField()
+    worked_seconds = models.PositiveIntegerField(default=0)
+    break_seconds = models.PositiveIntegerField(default=0)
+    lunch_seconds = models.PositiveIntegerField(default=0)
+    # Time on the clock beyond settings.ATTENDANCE_STANDARD_WORK_SECONDS
+    overtime_seconds = models.PositiveIntegerField(default=0)
+    is_late = models.BooleanField(default=False)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "date"], name="unique_attendance_daily_user_date"),
+        ]
+        indexes = [
+            models.Index(fields=["date", "user"], name="attendance_daily_date_user_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} - {self.date}"
+
+
+class AttendanceArchive(models.Model):
+    """One closed month of Attendance rows moved out of the hot table into a csv.gz file."""
+
+    month = models.DateField(unique=True)  # first day of the month
+    path = models.CharField(max_length=500)
+    rows = models.PositiveIntegerField()
+    sha256 = models.CharField(max_length=64)
+    archived_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["month"]
+
+    def __str__(self):
+        return f"{self.month:%Y-%m} ({self.rows} rows)"
+
+
+class Job(models.Model):
+    """A unit of heavy work queued by a view and run by the run_jobs worker (see app.jobs)."""
+
+    STATUS_CHOICES = [
+        ("queued", "Queued"),
+        ("running", "Running"),
+        ("succeeded", "Succeeded"),
+        ("failed", "Failed"),
+    ]
+
+    kind = models.CharField(max_length=50)
+    params = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="queued")
+    # Units done out of `total` (None while unknown)
+    progress = models.PositiveIntegerField(default=0)
+    total = models.PositiveIntegerField(null=True, blank=True)
+    result = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    error = models.TextField(blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=3)
+    run_after = models.DateTimeField(default=timezone.now)
+    worker = models.CharField(max_length=100, blank=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    created_by = models.ForeignKey(
+        EmployeeUser, on_delete=models.SET_NULL, null=True, blank=True, related_name="jobs"
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "run_after"], name="job_status_run_after_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} #{self.pk} ({self.status})"
+
+
+class Shift(models.Model):
+    name = models.CharField(max_length=50, unique=True)
+    start_time = models.TimeField()
+    # An end time at or before the start time means the shift ends the next day
+    end_time = models.TimeField()
+    # None = settings.ATTENDANCE_LATE_GRACE_MINUTES
+    late_grace_minutes = models.PositiveSmallIntegerField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        roster_changed()
+
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        roster_changed()
+        return result
+
+    def __str__(self):
+        return f"{self.name} ({self.start_time:%H:%M}-{self.end_time:%H:%M})"
+
+
+class Roster(models.Model):
+    """An employee scheduled on a shift; `date` is the day the shift starts."""
+
+    user = models.ForeignKey(EmployeeUser, on_delete=models.CASCADE, related_name="rosters")
+    shift = models.ForeignKey(Shift, on_delete=models.PROTECT, related_name="rosters")
+    date = models.DateField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "date"], name="unique_roster_user_date"),
+        ]
+        indexes = [
+            models.Index(fields=["date", "user"], name="roster_date_user_idx"),
+        ]
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        roster_changed()
+
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        roster_changed()
+        return result
+
+    def __str__(self):
+        return f"{self.user_id} - {self.date} ({self.shift_id})"
+
+
+def roster_changed():
+    # Drop every process's roster index (see app.rosters), now and again
+    # once the surrounding transaction commits.
+    from .rosters import invalidate_roster_index
+
+    invalidate_roster_index()
+    transaction.on_commit(invalidate_roster_index)
+
+
+class RefreshToken(models.Model):
+    """
+    One issued refresh token. Each can be exchanged once; `family` links the
+    tokens a single login rotated through (see app.authentication).
+    """
+
+    jti = models.UUIDField(primary_key=True, default=uuid.uuid4)
+    user = models.ForeignKey(EmployeeUser, on_delete=models.CASCADE, related_name="refresh_tokens")
+    family = models.UUIDField(default=uuid.uuid4, db_index=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    spent_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.jti} ({self.user_id})"
@@ -0,0 +1,65 @@
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .attendance import apply_punches
+from .models import MusterRequest
+
+
+def filter_requested_days(requests, start=None, end=None):
+    """Restrict to requests whose requested_time falls on local days [start, end]."""
+    if start:
+        requests = requests.filter(requested_time__gte=timezone.make_aware(datetime.combine(start, time.min)))
+    if end:
+        next_day = timezone.make_aware(datetime.combine(end + timedelta(days=1), time.min))
+        requests = requests.filter(requested_time__lt=next_day)
+    return requests
+
+
+def review_muster_requests(ids, decision, reviewer):
+    """
+    Approve or reject many pending requests in one transaction.
+
+    Approved clock-in/clock-out corrections are written to Attendance (and
+    the daily rollup) through `apply_punches`. Returns one result per id.
+    """
+    ids = list(dict.fromkeys(ids))
+    now = timezone.now()
+    results, reviewed, punches = [], [], []
+
+    with transaction.atomic():
+        requests = MusterRequest.objects.select_for_update().in_bulk(ids)
+        for request_id in ids:
+            muster_request = requests.get(request_id)
+            if muster_request is None:
+                error = "Request not found"
+            elif muster_request.status != "pending":
+                error = f"Request already {muster_request.status}"
+            elif muster_request.employee_id == reviewer.pk:
+                error = "Cannot review your own request"
+            else:
+                error = None
+
+            if error:
+                results.append({"id": request_id, "status": "error", "error": error})
+                continue
+
+            muster_request.status = decision
+            muster_request.reviewed_by = reviewer
+            muster_request.reviewed_at = now
+            muster_request.updated_at = now
+            reviewed.append(muster_request)
+            results.append({"id": request_id, "status": "ok"})
+
+            if decision == "approved":
+                field = MusterRequest.ACTION_FIELDS[muster_request.action]
+                punches.append((muster_request.employee_id, field, muster_request.requested_time))
+
+        MusterRequest.objects.bulk_update(
+            reviewed, ["status", "reviewed_by", "reviewed_at", "updated_at"], batch_size=settings.PUNCH_BATCH_SIZE
+        )
+        apply_punches(punches)
+
+    return results
@@ -0,0 +1,78 @@
+import base64
+import binascii
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+class KeysetPagination:
+    """
+    Cursor pagination over a unique ordering such as ("employee_id", "id").
+
+    Each page is fetched with a WHERE on the last row's key rather than an
+    OFFSET, so reading page 500 costs the same as reading page 1. Rows may
+    be model instances or `values()` dicts that include the ordering fields.
+    """
+
+    cursor_query_param = "cursor"
+    limit_query_param = "limit"
+
+    def __init__(self, ordering, default_limit=100, max_limit=1000):
+        self.ordering = tuple(ordering)
+        self.fields = [name.lstrip("-") for name in self.ordering]
+        self.default_limit = default_limit
+        self.max_limit = max_limit
+
+    def paginate(self, queryset, request):
+        """Return (rows, next_cursor); next_cursor is None on the last page."""
+        limit = self.get_limit(request)
+        queryset = queryset.order_by(*self.ordering)
+
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            queryset = queryset.filter(self.after(self.decode_cursor(cursor, queryset.model)))
+
+        rows = list(queryset[: limit + 1])
+        if len(rows) <= limit:
+            return rows, None
+        rows = rows[:limit]
+        return rows, self.encode_cursor(rows[-1])
+
+    def get_limit(self, request):
+        try:
+            limit = int(request.query_params[self.limit_query_param])
+        except (KeyError, ValueError):
+            return self.default_limit
+        return max(1, min(limit, self.max_limit))
+
+    def after(self, position):
+        """Build `(a, b) > (x, y)` as `a > x OR (a = x AND b > y)`, honouring per-field direction."""
+        condition = Q()
+        for i, name in enumerate(self.ordering):
+            lookup = "lt" if name.startswith("-") else "gt"
+            step = Q(**{f"{self.fields[i]}__{lookup}": position[i]})
+            for field, value in zip(self.fields[:i], position[:i]):
+                step &= Q(**{field: value})
+            condition |= step
+        return condition
+
+    def encode_cursor(self, row):
+        values = []
+        for field in self.fields:
+            value = row[field] if isinstance(row, dict) else getattr(row, field)
+            values.append(value.isoformat() if hasattr(value, "isoformat") else value)
+        return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+    def decode_cursor(self, cursor, model):
+        try:
+            values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            if not isinstance(values, list) or len(values) != len(self.fields):
+                raise InvalidCursor(cursor)
+            return [model._meta.get_field(field).to_python(value) for field, value in zip(self.fields, values)]
+        except (binascii.Error, UnicodeError, ValueError, ValidationError):
+            raise InvalidCursor(cursor)
@@ -0,0 +1,76 @@
+import functools
+
+from django.http import JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_http_methods
+from rest_framework import exceptions, status
+from rest_framework.permissions import BasePermission
+
+from .authentication import ACCESS, SignedTokenAuthentication, averify_token, bearer_token
+
+STAFF_ROLES = ("admin", "hr", "manager")
+
+
+class RoleRequired(BasePermission):
+    """
+    Allow authenticated users whose role is in `roles` (superusers always pass).
+
+    Use `RoleRequired.of(...)` to build the class for a view:
+
+        @permission_classes([RoleRequired.of("admin", "hr", message="Only admin/hr can ...")])
+    """
+
+    roles = STAFF_ROLES
+    message = {"error": "You do not have permission to perform this action"}
+
+    @classmethod
+    def of(cls, *roles, message=None):
+        attrs = {"roles": roles or cls.roles}
+        if message:
+            attrs["message"] = {"error": message}
+        return type(cls.__name__, (cls,), attrs)
+
+    def has_permission(self, request, view):
+        user = request.user
+        if not user or not user.is_authenticated:
+            return False
+        return user.role in self.roles or user.is_superuser
+
+
+def async_api_view(methods, permission_classes=()):
+    """
+    `@api_view` + `@permission_classes` for async Django views, which DRF cannot wrap.
+
+    Requests must carry a bearer token; the user is resolved through the
+    async principal cache and checked against `permission_classes`. Errors
+    use the same status codes and bodies DRF would produce.
+    """
+
+    def decorator(view):
+        @csrf_exempt  # bearer tokens are not sent automatically by browsers
+        @require_http_methods(methods)
+        @functools.wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            try:
+                token = bearer_token(request)
+                if token is None:
+                    raise exceptions.NotAuthenticated()
+                request.user = await averify_token(token, ACCESS)
+            except exceptions.APIException as exc:
+                response = JsonResponse({"detail": str(exc.detail)}, status=status.HTTP_401_UNAUTHORIZED)
+                response["WWW-Authenticate"] = SignedTokenAuthentication.keyword
+                return response
+
+            for permission_class in permission_classes:
+                permission = permission_class()
+                if not permission.has_permission(request, view):
+                    message = permission.message
+                    return JsonResponse(
+                        message if isinstance(message, dict) else {"detail": message},
+                        status=status.HTTP_403_FORBIDDEN,
+                    )
+            return await view(request, *args, **kwargs)
+
+        return wrapper
+
+    return decorator
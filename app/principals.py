@@ -0,0 +1,55 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+
+from .models import EmployeeUser
+
+# Enough to authenticate and authorize a request; anything else (password,
+# last_login, groups) is loaded on first access.
+PRINCIPAL_FIELDS = [
+    "id", "employee_id", "role", "first_name", "last_name", "department",
+    "is_active", "is_staff", "is_superuser", "token_version",
+]
+
+
+def principal_cache_key(user_id):
+    return f"principal:{user_id}"
+
+
+def get_principal(user_id):
+    """Return the cached PRINCIPAL_FIELDS of a user as a dict, or None if the user does not exist."""
+    key = principal_cache_key(user_id)
+    principal = cache.get(key)
+    if principal is None:
+        principal = EmployeeUser.objects.filter(pk=user_id).values(*PRINCIPAL_FIELDS).first()
+        if principal is None:
+            return None
+        cache.set(key, principal, settings.AUTH_PRINCIPAL_CACHE_TTL)
+    return principal
+
+
+async def aget_principal(user_id):
+    key = principal_cache_key(user_id)
+    principal = await cache.aget(key)
+    if principal is None:
+        principal = await EmployeeUser.objects.filter(pk=user_id).values(*PRINCIPAL_FIELDS).afirst()
+        if principal is None:
+            return None
+        await cache.aset(key, principal, settings.AUTH_PRINCIPAL_CACHE_TTL)
+    return principal
+
+
+def principal_user(principal):
+    """
+    Build an EmployeeUser from a cached principal without touching the database.
+
+    Fields outside PRINCIPAL_FIELDS are deferred, so `save()` only writes
+    the columns that were actually loaded or assigned.
+    """
+    # from_db expects values in model field order
+    field_names = [field.attname for field in EmployeeUser._meta.concrete_fields if field.attname in principal]
+    return EmployeeUser.from_db(DEFAULT_DB_ALIAS, field_names, [principal[name] for name in field_names])
+
+
+def invalidate_principal(user_id):
+    cache.delete(principal_cache_key(user_id))
@@ -0,0 +1,143 @@
+import math
+import threading
+import time
+from collections import defaultdict, deque
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.signals import request_started
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+METRICS = ["queries", "sql_ms", "serialize_ms", "render_ms", "total_ms", "bytes"]
+
+# QueryTimer/SerializerTimer of the request being profiled, if any. Context
+# variables follow an async view's ORM calls into sync_to_async threads,
+# which a per-connection execute_wrapper on the request's thread would miss.
+query_timer = ContextVar("query_timer", default=None)
+serializer_timer = ContextVar("serializer_timer", default=None)
+_serializers_instrumented = False
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a non-empty sequence."""
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+class QueryTimer:
+    """`connection.execute_wrapper` hook counting queries and the time spent in them."""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.seconds += time.perf_counter() - started
+
+
+def _time_query(execute, sql, params, many, context):
+    timer = query_timer.get()
+    if timer is None:
+        return execute(sql, params, many, context)
+    return timer(execute, sql, params, many, context)
+
+
+def _install_query_timer(connection, **kwargs):
+    # Outermost, so `connection.execute_wrapper()` blocks still pop their own wrapper
+    if _time_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, _time_query)
+
+
+def _install_query_timers(**kwargs):
+    for connection in connections.all():
+        _install_query_timer(connection)
+
+
+def instrument_queries():
+    """
+    Time queries on every connection, in every thread, for profiled requests.
+
+    Connections are per thread. `request_started` is sent on the thread
+    that runs the request's ORM calls (under ASGI, the one sync_to_async
+    hands them to), and `connection_created` covers any other thread.
+    """
+    connection_created.connect(_install_query_timer, dispatch_uid="app.profiling.connection_created")
+    request_started.connect(_install_query_timers, dispatch_uid="app.profiling.request_started")
+    _install_query_timers()
+
+
+class SerializerTimer:
+    """Time spent building `serializer.data`; nested serializers count once, under the outermost."""
+
+    def __init__(self):
+        self.seconds = 0.0
+        self.depth = 0
+
+
+def instrument_serializers():
+    """
+    Wrap DRF's `BaseSerializer.data` so profiled requests time serialization.
+
+    `Serializer.data` and `ListSerializer.data` both go through it. Outside a
+    profiled request the wrapper only does a context variable lookup.
+    """
+    global _serializers_instrumented
+    if _serializers_instrumented:
+        return
+    from rest_framework.serializers import BaseSerializer
+
+    data = BaseSerializer.data.fget
+
+    def timed_data(serializer):
+        timer = serializer_timer.get()
+        if timer is None or timer.depth:
+            return data(serializer)
+        timer.depth += 1
+        started = time.perf_counter()
+        try:
+            return data(serializer)
+        finally:
+            timer.seconds += time.perf_counter() - started
+            timer.depth -= 1
+
+    BaseSerializer.data = property(timed_data)
+    _serializers_instrumented = True
+
+
+class ProfileStore:
+    """Rolling window of request samples per URL name, shared by the whole process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._samples = defaultdict(lambda: deque(maxlen=settings.PROFILING_WINDOW))
+
+    def record(self, name, sample):
+        with self._lock:
+            self._samples[name].append(sample)
+
+    def clear(self):
+        with self._lock:
+            self._samples.clear()
+
+    def report(self):
+        with self._lock:
+            snapshot = {name: list(samples) for name, samples in self._samples.items()}
+
+        report = {}
+        for name, samples in sorted(snapshot.items()):
+            report[name] = {"count": len(samples)}
+            for metric in METRICS:
+                values = [sample[metric] for sample in samples if sample[metric] is not None]
+                if values:
+                    report[name][metric] = {f"p{pct}": percentile(values, pct) for pct in (50, 95, 99)}
+        return report
+
+
+profile_store = ProfileStore()
@@ -0,0 +1,159 @@
+import atexit
+import fcntl
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from functools import lru_cache
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connection
+from django.utils.dateparse import parse_datetime
+
+from .attendance import apply_punches
+from .models import EmployeeUser
+
+logger = logging.getLogger(__name__)
+
+
+class PunchJournal:
+    """
+    Append-only file of punches not yet written to the database.
+
+    Writers append one JSON line per punch to `punches.log` under a shared
+    lock. A flush renames the file to `punches.<ns>.flushing` under an
+    exclusive lock (so no writer still holds the old file), applies it and
+    deletes it. Anything left on disk after a crash is picked up by the
+    next flush.
+    """
+
+    def __init__(self, directory, fsync=True):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.path = self.directory / "punches.log"
+        self.fsync = fsync
+
+    @contextmanager
+    def _lock(self, name, mode):
+        with open(self.directory / name, "a") as lock_file:
+            fcntl.flock(lock_file, mode)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def append(self, user_id, field, when):
+        line = json.dumps({"user_id": user_id, "field": field, "at": when.isoformat()}) + "\n"
+        with self._lock("journal.lock", fcntl.LOCK_SH):
+            fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                os.write(fd, line.encode())
+                if self.fsync:
+                    os.fsync(fd)
+            finally:
+                os.close(fd)
+
+    def rotate(self):
+        """Seal the live journal and return every sealed file awaiting a flush, oldest first."""
+        with self._lock("journal.lock", fcntl.LOCK_EX):
+            if self.path.exists() and self.path.stat().st_size:
+                self.path.rename(self.directory / f"punches.{time.time_ns()}.flushing")
+        return sorted(self.directory.glob("punches.*.flushing"))
+
+    @staticmethod
+    def read(path):
+        punches = []
+        with open(path) as journal:
+            for line in journal:
+                try:
+                    entry = json.loads(line)
+                    punches.append((entry["user_id"], entry["field"], parse_datetime(entry["at"])))
+                except (ValueError, KeyError):
+                    # A torn last line from a crash mid-append
+                    logger.warning("Skipping unreadable punch journal line in %s: %r", path, line)
+        return punches
+
+    def flush(self):
+        """
+        Apply every sealed journal in one `apply_punches` call per file.
+
+        Only one process flushes at a time; returns the number of punches
+        applied (0 if another process holds the flush lock).
+        """
+        applied = 0
+        with open(self.directory / "flush.lock", "a") as lock_file:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return 0
+            try:
+                for path in self.rotate():
+                    punches = self.read(path)
+                    # Employees deleted since they punched would fail the whole batch
+                    existing = set(
+                        EmployeeUser.objects.filter(pk__in={user_id for user_id, _, _ in punches})
+                        .values_list("pk", flat=True)
+                    )
+                    punches = [punch for punch in punches if punch[0] in existing]
+                    apply_punches(punches)
+                    path.unlink()
+                    applied += len(punches)
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+        return applied
+
+
+class PunchBuffer:
+    """Acknowledge punches once journaled and flush them from a background thread."""
+
+    def __init__(self, journal, interval):
+        self.journal = journal
+        self.interval = interval
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def append(self, user_id, field, when):
+        self.journal.append(user_id, field, when)
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="punch-buffer-flusher", daemon=True)
+        self._thread.start()
+        atexit.register(self.stop)
+
+    def stop(self):
+        self._stopped.set()
+        if self._thread:
+            self._thread.join()
+
+    def _run(self):
+        # The first pass also replays whatever a crashed process left behind;
+        # the last one runs after stop() so nothing acknowledged is left over.
+        while True:
+            stopping = self._stopped.is_set()
+            try:
+                self.journal.flush()
+            except Exception:
+                logger.exception("Punch journal flush failed; will retry")
+            finally:
+                connection.close()
+            if stopping:
+                return
+            self._stopped.wait(self.interval)
+
+
+@lru_cache(maxsize=None)
+def get_punch_buffer():
+    """
+    The process-wide buffer, started on first use.
+
+    With PUNCH_BUFFER_FLUSH_INTERVAL = None nothing is flushed in the
+    background and `flush_punch_journal` has to be run instead.
+    """
+    journal = PunchJournal(settings.PUNCH_BUFFER_DIR, fsync=settings.PUNCH_BUFFER_FSYNC)
+    buffer = PunchBuffer(journal, settings.PUNCH_BUFFER_FLUSH_INTERVAL)
+    if settings.PUNCH_BUFFER_FLUSH_INTERVAL is not None:
+        buffer.start()
+    return buffer
@@ -0,0 +1,62 @@
+import msgpack
+import orjson
+from rest_framework.renderers import BaseRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+# Everything orjson/msgpack have no native type for (Decimal, timedelta,
+# UUID, lazy strings, querysets...) is encoded the way DRF's JSONRenderer
+# would encode it, so every format carries the same values. orjson hands
+# datetimes, dates and times over too: its own format differs from DRF's
+# (sub-minute UTC offsets, and the precision older DRF releases used).
+_encode_default = JSONEncoder().default
+
+
+class ORJSONRenderer(BaseRenderer):
+    """
+    Drop-in for DRF's JSONRenderer, serialized by orjson in native code.
+
+    Output matches JSONRenderer's compact form: datetimes, dates and times
+    are formatted by DRF's own encoder, non-string dict keys become strings.
+    `?format=json` and an `indent` Accept parameter work as before
+    (indentation is always 2 spaces).
+    """
+
+    media_type = "application/json"
+    format = "json"
+    charset = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        option = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+        if self._indent(accepted_media_type, renderer_context or {}):
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(data, default=_encode_default, option=option)
+
+    @staticmethod
+    def _indent(accepted_media_type, renderer_context):
+        if accepted_media_type:
+            for parameter in accepted_media_type.split(";")[1:]:
+                key, _, value = parameter.partition("=")
+                if key.strip() == "indent":
+                    return value.strip().isdigit() and int(value.strip()) > 0
+        return bool(renderer_context.get("indent"))
+
+
+class MessagePackRenderer(BaseRenderer):
+    """
+    MessagePack for clients that send `Accept: application/msgpack` (or `?format=msgpack`).
+
+    Same structure as the JSON body; datetimes, dates and decimals are sent
+    as the strings/floats JSON clients get, so one client-side model fits both.
+    """
+
+    media_type = "application/msgpack"
+    format = "msgpack"
+    charset = None
+    render_style = "binary"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        return msgpack.packb(data, default=_encode_default, use_bin_type=True, datetime=False)
@@ -0,0 +1,53 @@
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import TruncMonth, TruncWeek
+
+from .models import AttendanceDaily
+
+TOTAL_FIELDS = ["worked_seconds", "break_seconds", "lunch_seconds", "overtime_seconds"]
+
+GROUP_FIELDS = {
+    "user": ("user__employee_id", "user__first_name", "user__last_name"),
+    "department": ("user__department",),
+}
+
+
+def _period_expression(period):
+    if period == "week":
+        return TruncWeek("date")
+    if period == "month":
+        return TruncMonth("date")
+    return F("date")
+
+
+def build_attendance_report(start, end, period="day", group_by="user", employee_id=None, department=None):
+    """
+    Worked, break, lunch and overtime per user (or department) and period.
+
+    Sums the pre-aggregated AttendanceDaily rows in one GROUP BY query, so
+    a month costs one small row per employee-day rather than a rescan of
+    the raw punches.
+    """
+    rows = AttendanceDaily.objects.filter(date__range=(start, end))
+    if employee_id:
+        rows = rows.filter(user__employee_id=employee_id)
+    if department:
+        rows = rows.filter(user__department=department)
+
+    group_fields = GROUP_FIELDS[group_by]
+    rows = (
+        rows.annotate(period=_period_expression(period))
+        .values(*group_fields, "period")
+        .annotate(
+            days=Count("id"),
+            late_days=Count("id", filter=Q(is_late=True)),
+            **{field: Sum(field) for field in TOTAL_FIELDS},
+        )
+        .order_by(*group_fields, "period")
+    )
+
+    report = []
+    for row in rows:
+        item = {field.removeprefix("user__"): row[field] for field in group_fields}
+        item.update({key: row[key] for key in ["period", "days", "late_days", *TOTAL_FIELDS]})
+        report.append(item)
+    return report
@@ -0,0 +1,116 @@
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import Attendance, AttendanceDaily
+from .rosters import rostered_shifts
+
+ATTENDANCE_COLUMNS = ["user_id", "date", *Attendance.PUNCH_FIELDS]
+ROLLUP_FIELDS = ["worked_seconds", "break_seconds", "lunch_seconds", "overtime_seconds", "is_late", "updated_at"]
+
+
+def _seconds_between(start, end):
+    if start is None or end is None or end <= start:
+        return 0
+    return int((end - start).total_seconds())
+
+
+def _late_after():
+    shift_start = datetime.combine(datetime.min, time.fromisoformat(settings.ATTENDANCE_SHIFT_START))
+    return (shift_start + timedelta(minutes=settings.ATTENDANCE_LATE_GRACE_MINUTES)).time()
+
+
+def is_late(clock_in, shift):
+    if clock_in is None:
+        return False
+    if shift is not None:
+        return clock_in > shift.late_after
+    return timezone.localtime(clock_in).time() > _late_after()
+
+
+def daily_totals(clock_in, clock_out, break_in, break_out, lunch_in, lunch_out, shift=None):
+    """Rollup column values for one day's punches; lateness follows the rostered `shift` if there is one."""
+    worked = _seconds_between(clock_in, clock_out)
+    return {
+        "worked_seconds": worked,
+        "break_seconds": _seconds_between(break_in, break_out),
+        "lunch_seconds": _seconds_between(lunch_in, lunch_out),
+        "overtime_seconds": max(0, worked - settings.ATTENDANCE_STANDARD_WORK_SECONDS),
+        "is_late": is_late(clock_in, shift),
+    }
+
+
+def rollup_from_row(row, shift=None):
+    """Build an unsaved AttendanceDaily from an Attendance `values()` row."""
+    totals = daily_totals(*(row[field] for field in Attendance.PUNCH_FIELDS), shift=shift)
+    return AttendanceDaily(user_id=row["user_id"], date=row["date"], **totals)
+
+
+def attendance_values(attendance):
+    """An Attendance instance as the `values(*ATTENDANCE_COLUMNS)` row it was read from."""
+    return {column: getattr(attendance, column) for column in ATTENDANCE_COLUMNS}
+
+
+def rollups_with_shifts(rows):
+    """AttendanceDaily rows for Attendance `values()` rows, with one roster lookup for the lot."""
+    shifts = rostered_shifts((row["user_id"], row["date"]) for row in rows)
+    return [rollup_from_row(row, shifts.get((row["user_id"], row["date"]))) for row in rows]
+
+
+def save_rollups(rollups, batch_size=None):
+    AttendanceDaily.objects.bulk_create(
+        rollups,
+        batch_size=batch_size or settings.PUNCH_BATCH_SIZE,
+        update_conflicts=True,
+        unique_fields=["user", "date"],
+        update_fields=ROLLUP_FIELDS,
+    )
+
+
+def refresh_daily_rollups(keys):
+    """
+    Recompute the rollup rows for the given (user_id, date) pairs.
+
+    Days in archived months are rolled up from the archived punches with
+    the hot row's laid over them (see `archive.with_archived`).
+    """
+    keys = set(keys)
+    if not keys:
+        return
+
+    rows = Attendance.objects.filter(
+        user_id__in={user_id for user_id, _ in keys},
+        date__in={day for _, day in keys},
+    ).values(*ATTENDANCE_COLUMNS)
+    save_rollups(refreshed_rollups(row for row in rows if (row["user_id"], row["date"]) in keys))
+
+
+def refreshed_rollups(rows):
+    """`rollups_with_shifts` for hot rows that may only hold late punches for an archived day."""
+    from .archive import with_archived
+
+    return rollups_with_shifts(with_archived(rows))
+
+
+def rebuild_daily_rollups(start=None, end=None, batch_size=2000, progress=None):
+    """
+    Recompute every rollup row in [start, end] in chunks; returns the number of rows written.
+
+    Archived months are read back from their archive files. `progress`, if
+    given, is called with the running row count after each chunk.
+    """
+    from .archive import attendance_rows
+
+    total, batch = 0, []
+    for row in attendance_rows(start, end):
+        batch.append(row)
+        if len(batch) >= batch_size:
+            save_rollups(rollups_with_shifts(batch), batch_size)
+            total, batch = total + len(batch), []
+            if progress:
+                progress(total)
+    if batch:
+        save_rollups(rollups_with_shifts(batch), batch_size)
+        total += len(batch)
+    return total
@@ -0,0 +1,253 @@
+import bisect
+import threading
+import time
+import uuid
+from collections import namedtuple
+from datetime import datetime, timedelta
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .models import EmployeeUser, Roster, Shift
+from .serializers import RosterImportRowSerializer
+
+ROSTER_INDEX_TOKEN_KEY = "roster-index:token"
+
+# One employee's shift on one day, with its absolute start/end and late cut-off
+RosteredShift = namedtuple("RosteredShift", ["user_id", "day", "shift", "starts", "ends", "late_after"])
+
+ROSTER_COLUMNS = ["user_id", "date", "shift__name", "shift__start_time", "shift__end_time", "shift__late_grace_minutes"]
+
+
+def rostered_shift(user_id, day, name, start_time, end_time, late_grace_minutes):
+    starts = timezone.make_aware(datetime.combine(day, start_time))
+    end_day = day + timedelta(days=1) if end_time <= start_time else day
+    ends = timezone.make_aware(datetime.combine(end_day, end_time))
+    grace = settings.ATTENDANCE_LATE_GRACE_MINUTES if late_grace_minutes is None else late_grace_minutes
+    return RosteredShift(user_id, day, name, starts, ends, starts + timedelta(minutes=grace))
+
+
+class RosterIndex:
+    """
+    Rostered shifts for a set of days, looked up by (user, time) in O(log n).
+
+    Shifts are kept sorted by (user_id, window start), where a shift's
+    window runs from ROSTER_EARLY_PUNCH_HOURS before it starts to
+    ROSTER_LATE_PUNCH_HOURS after it ends, so a bisect lands on the only
+    shifts a punch can belong to.
+    """
+
+    def __init__(self, days, shifts, token=None):
+        self.days = frozenset(days)
+        self.token = token
+        self.built = time.monotonic()
+        early = timedelta(hours=settings.ROSTER_EARLY_PUNCH_HOURS)
+        self.late = timedelta(hours=settings.ROSTER_LATE_PUNCH_HOURS)
+        self.shifts = sorted(shifts, key=lambda shift: (shift.user_id, shift.starts))
+        self.keys = [(shift.user_id, shift.starts - early) for shift in self.shifts]
+        self.by_day = {(shift.user_id, shift.day): shift for shift in self.shifts}
+
+    @classmethod
+    def load(cls, days, user_ids=None, token=None):
+        rosters = Roster.objects.filter(date__in=days)
+        if user_ids is not None:
+            rosters = rosters.filter(user_id__in=user_ids)
+        return cls(days, [rostered_shift(*row) for row in rosters.values_list(*ROSTER_COLUMNS)], token)
+
+    def covers(self, day):
+        return day in self.days
+
+    def find(self, user_id, when):
+        """The user's shift whose punch window contains `when`, or None."""
+        best, best_distance = None, None
+        # Windows of consecutive shifts may overlap; the two latest starting
+        # at or before `when` are the only candidates.
+        position = bisect.bisect_right(self.keys, (user_id, when))
+        for shift in self.shifts[max(position - 2, 0):position]:
+            if shift.user_id != user_id or when > shift.ends + self.late:
+                continue
+            distance = max(shift.starts - when, when - shift.ends, timedelta(0))
+            if best is None or distance <= best_distance:
+                best, best_distance = shift, distance
+        return best
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_roster_index():
+    """
+    Rostered shifts from yesterday to tomorrow, shared by every request in this process.
+
+    Checking freshness costs one cache read; the index is rebuilt with one
+    query when the local date moves on, when rosters or shifts change, or
+    after ROSTER_INDEX_MAX_AGE seconds.
+    """
+    global _index
+    today = timezone.localdate()
+    token = cache.get(ROSTER_INDEX_TOKEN_KEY)
+    index = _index
+    if index is None or not _fresh(index, today, token):
+        with _index_lock:
+            index = _index
+            if index is None or not _fresh(index, today, token):
+                days = [today + timedelta(days=offset) for offset in (-1, 0, 1)]
+                _index = index = RosterIndex.load(days, token=token)
+    return index
+
+
+def _fresh(index, today, token):
+    return (
+        index.token == token
+        and index.covers(today - timedelta(days=1))
+        and index.covers(today + timedelta(days=1))
+        and time.monotonic() - index.built < settings.ROSTER_INDEX_MAX_AGE
+    )
+
+
+def invalidate_roster_index():
+    global _index
+    _index = None
+    cache.set(ROSTER_INDEX_TOKEN_KEY, uuid.uuid4().hex, None)
+
+
+async def aget_roster_index():
+    """`get_roster_index` for async code; only a rebuild leaves the event loop."""
+    index = _index
+    if index is None or not _fresh(index, timezone.localdate(), await cache.aget(ROSTER_INDEX_TOKEN_KEY)):
+        index = await sync_to_async(get_roster_index)()
+    return index
+
+
+# ---------------- Lookups ----------------
+def _indexed_day(index, user_id, when):
+    """The punch's shift day from `index`, or None if the index does not cover its neighbourhood."""
+    local_day = timezone.localdate(when)
+    if not all(index.covers(local_day + timedelta(days=offset)) for offset in (-1, 0, 1)):
+        return None
+    shift = index.find(user_id, when)
+    return shift.day if shift else local_day
+
+
+def shift_day(user_id, when):
+    """Attendance date for a punch: the day of the rostered shift it falls in, else its local date."""
+    return shift_days([(user_id, when)])[(user_id, when)]
+
+
+async def ashift_day(user_id, when):
+    day = _indexed_day(await aget_roster_index(), user_id, when)
+    if day is None:
+        day = await sync_to_async(shift_day)(user_id, when)
+    return day
+
+
+def shift_days(punches):
+    """
+    `shift_day` for many (user_id, timestamp) pairs.
+
+    Punches around today are resolved from the in-process index; older
+    ones (muster corrections, replayed journals) cost one query in total.
+    """
+    index = get_roster_index()
+    days = {}
+    missing = []
+    for user_id, when in punches:
+        day = _indexed_day(index, user_id, when)
+        if day is None:
+            missing.append((user_id, when, timezone.localdate(when)))
+        else:
+            days[(user_id, when)] = day
+
+    if missing:
+        around = {local_day + timedelta(days=offset) for _, _, local_day in missing for offset in (-1, 0, 1)}
+        older = RosterIndex.load(around, user_ids={user_id for user_id, _, _ in missing})
+        for user_id, when, local_day in missing:
+            shift = older.find(user_id, when)
+            days[(user_id, when)] = shift.day if shift else local_day
+    return days
+
+
+def rostered_shifts(keys):
+    """{(user_id, date): RosteredShift} for the (user_id, date) pairs that have one."""
+    keys = set(keys)
+    index = get_roster_index()
+    shifts = {key: index.by_day[key] for key in keys if key in index.by_day}
+    missing = {key for key in keys if not index.covers(key[1])}
+    if missing:
+        rosters = Roster.objects.filter(
+            user_id__in={user_id for user_id, _ in missing}, date__in={day for _, day in missing}
+        )
+        for row in rosters.values_list(*ROSTER_COLUMNS):
+            if (row[0], row[1]) in missing:
+                shifts[(row[0], row[1])] = rostered_shift(*row)
+    return shifts
+
+
+# ---------------- Bulk upload ----------------
+def import_rosters(rows, chunk_size=None):
+    """
+    Create or replace rosters from (line_number, row) pairs produced by
+    `employee_io.parse_rows`; each row names an employee_id, date and shift.
+
+    Each chunk costs one query for employees, one for shifts and one
+    upserting INSERT, replacing whatever the employees were rostered on
+    for those days.
+    """
+    chunk_size = chunk_size or settings.EMPLOYEE_IMPORT_CHUNK_SIZE
+    shifts = dict(Shift.objects.values_list("name", "id"))
+    saved, errors = 0, []
+    rows = iter(rows)
+    while chunk := list(islice(rows, chunk_size)):
+        valid = []
+        for line_number, row in chunk:
+            if isinstance(row, Exception):
+                errors.append({"line": line_number, "errors": str(row)})
+                continue
+            serializer = RosterImportRowSerializer(data=row)
+            if serializer.is_valid():
+                valid.append((line_number, serializer.validated_data))
+            else:
+                errors.append({"line": line_number, "errors": serializer.errors})
+
+        users = dict(
+            EmployeeUser.objects.filter(employee_id__in={data["employee_id"] for _, data in valid})
+            .values_list("employee_id", "id")
+        )
+        rosters, accepted = {}, []
+        for line_number, data in valid:
+            if data["employee_id"] not in users:
+                errors.append({"line": line_number, "errors": {"employee_id": ["Unknown employee"]}})
+            elif data["shift"] not in shifts:
+                errors.append({"line": line_number, "errors": {"shift": ["Unknown shift"]}})
+            else:
+                # A later line for the same employee and day wins
+                user_id = users[data["employee_id"]]
+                rosters[(user_id, data["date"])] = Roster(
+                    user_id=user_id, date=data["date"], shift_id=shifts[data["shift"]]
+                )
+                accepted.append(line_number)
+
+        try:
+            with transaction.atomic():
+                Roster.objects.bulk_create(
+                    rosters.values(),
+                    batch_size=chunk_size,
+                    update_conflicts=True,
+                    unique_fields=["user", "date"],
+                    update_fields=["shift", "updated_at"],
+                )
+        except IntegrityError:
+            errors += [{"line": line_number, "errors": "Conflicts with a concurrent change"} for line_number in accepted]
+            continue
+        saved += len(rosters)
+
+    if saved:
+        invalidate_roster_index()
+        transaction.on_commit(invalidate_roster_index)
+    errors.sort(key=lambda error: error["line"])
+    return {"saved": saved, "errors": errors}
@@ -0,0 +1,53 @@
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+class RoutingState:
+    """Per-request routing decision; `primary` is flipped by the first write."""
+
+    def __init__(self, primary=False):
+        self.primary = primary
+        self.wrote = False
+
+
+# Unset outside requests: management commands, workers and migrations only
+# ever talk to the primary.
+routing_state = ContextVar("routing_state", default=None)
+
+
+class PrimaryReplicaRouter:
+    """
+    Send reads to a replica and everything else to the primary.
+
+    Reads only go to a replica inside a request that opted in through
+    `DatabaseRoutingMiddleware`, and only until that request writes or opens
+    a transaction; from then on the request reads its own writes from the
+    primary.
+    """
+
+    def db_for_read(self, model, **hints):
+        state = routing_state.get()
+        if (
+            state is None
+            or state.primary
+            or not settings.DATABASE_REPLICAS
+            or connections[DEFAULT_DB_ALIAS].in_atomic_block
+        ):
+            return DEFAULT_DB_ALIAS
+        return random.choice(settings.DATABASE_REPLICAS)
+
+    def db_for_write(self, model, **hints):
+        state = routing_state.get()
+        if state is not None:
+            state.primary = state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db not in settings.DATABASE_REPLICAS
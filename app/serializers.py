@@ -1,4 +1,5 @@
 from rest_framework import serializers
+from django.conf import settings
 from django.contrib.auth import authenticate
 from .models import EmployeeUser, Attendance
 
@@ -25,7 +26,7 @@ class LoginSerializer(serializers.Serializer):
 class RegisterEmployeeSerializer(serializers.ModelSerializer):
     class Meta:
         model = EmployeeUser
-        fields = ["employee_id", "password", "first_name", "last_name", "role"]
+        fields = ["employee_id", "password", "first_name", "last_name", "department", "role"]
         extra_kwargs = {
             "password": {"write_only": True},
             "role": {"default": "employee"}
@@ -48,6 +49,24 @@ class RegisterEmployeeSerializer(serializers.ModelSerializer):
         return user
 
 
+# ---------------- Bulk Import Row ----------------
+class EmployeeImportRowSerializer(serializers.Serializer):
+    """Validates one imported row; uniqueness is checked per chunk, not per row."""
+
+    employee_id = serializers.CharField(max_length=20)
+    password = serializers.CharField(required=False, allow_blank=True)
+    first_name = serializers.CharField(max_length=50, required=False, allow_blank=True)
+    last_name = serializers.CharField(max_length=50, required=False, allow_blank=True)
+    department = serializers.CharField(max_length=50, required=False, allow_blank=True)
+    role = serializers.CharField(required=False, default="employee")
+
+    def validate_role(self, value):
+        role = (value or "employee").lower()
+        if role not in ["employee", "hr", "manager"]:
+            raise serializers.ValidationError("Invalid role")
+        return role
+
+
 # ---------------- Update Employee ----------------
 class UpdateEmployeeSerializer(serializers.ModelSerializer):
     password = serializers.CharField(write_only=True, required=False)
@@ -55,7 +74,7 @@ class UpdateEmployeeSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = EmployeeUser
-        fields = ["first_name", "last_name", "password", "role"]
+        fields = ["first_name", "last_name", "department", "password", "role"]
 
     def validate_role(self, value):
         role = value.lower()
@@ -66,7 +85,7 @@ class UpdateEmployeeSerializer(serializers.ModelSerializer):
     def update(self, instance, validated_data):
         password = validated_data.pop("password", None)
         if password:
-            instance.set_password(password)
+            instance.change_password(password)
 
         role = validated_data.pop("role", None)
         if role:
@@ -89,7 +108,7 @@ class ProfileUpdateSerializer(serializers.ModelSerializer):
     def update(self, instance, validated_data):
         password = validated_data.pop("password", None)
         if password:
-            instance.set_password(password)
+            instance.change_password(password)
         for attr, value in validated_data.items():
             setattr(instance, attr, value)
         instance.save()
@@ -100,6 +119,36 @@ class AttendanceSerializer(serializers.ModelSerializer):
         model = Attendance
         fields = "__all__"
 
+class PunchEventSerializer(serializers.Serializer):
+    employee_id = serializers.CharField(max_length=20)
+    action = serializers.ChoiceField(choices=Attendance.PUNCH_FIELDS)
+    timestamp = serializers.DateTimeField()
+
+class DateRangeQuerySerializer(serializers.Serializer):
+    start = serializers.DateField()
+    end = serializers.DateField()
+    employee_id = serializers.CharField(required=False)
+    department = serializers.CharField(required=False)
+
+    def validate(self, data):
+        if data["end"] < data["start"]:
+            raise serializers.ValidationError("end must not be before start")
+        if (data["end"] - data["start"]).days >= settings.ATTENDANCE_REPORT_MAX_DAYS:
+            raise serializers.ValidationError(f"Reports span at most {settings.ATTENDANCE_REPORT_MAX_DAYS} days")
+        return data
+
+class AttendanceReportQuerySerializer(DateRangeQuerySerializer):
+    period = serializers.ChoiceField(choices=["day", "week", "month"], default="day")
+    group_by = serializers.ChoiceField(choices=["user", "department"], default="user")
+
+# Shift rules default to the ATTENDANCE_* settings; each can be overridden per request
+class AttendanceAnalyticsQuerySerializer(DateRangeQuerySerializer):
+    shift_start = serializers.TimeField(required=False)
+    late_grace_minutes = serializers.IntegerField(required=False, min_value=0)
+    standard_work_seconds = serializers.IntegerField(required=False, min_value=0)
+    break_allowance_minutes = serializers.IntegerField(required=False, min_value=0)
+    lunch_allowance_minutes = serializers.IntegerField(required=False, min_value=0)
+
 class AttendanceEmployeeSerializer(serializers.ModelSerializer):
     employee_id = serializers.CharField(source='user.employee_id')
     first_name = serializers.CharField(source='user.first_name')
@@ -122,3 +171,50 @@ class MusterRequestSerializer(serializers.ModelSerializer):
             "status", "created_at", "updated_at"
         ]
         read_only_fields = ["status", "created_at", "updated_at"]
+
+class MusterQueueSerializer(MusterRequestSerializer):
+    first_name = serializers.CharField(source="employee.first_name", read_only=True)
+    last_name = serializers.CharField(source="employee.last_name", read_only=True)
+    department = serializers.CharField(source="employee.department", read_only=True)
+
+    class Meta(MusterRequestSerializer.Meta):
+        fields = MusterRequestSerializer.Meta.fields + ["first_name", "last_name", "department"]
+
+class MusterListQuerySerializer(serializers.Serializer):
+    status = serializers.ChoiceField(choices=MusterRequest.STATUS_CHOICES, required=False)
+    start = serializers.DateField(required=False)
+    end = serializers.DateField(required=False)
+
+class MusterQueueQuerySerializer(MusterListQuerySerializer):
+    status = serializers.ChoiceField(choices=MusterRequest.STATUS_CHOICES, default="pending")
+    department = serializers.CharField(required=False)
+
+class MusterReviewSerializer(serializers.Serializer):
+    ids = serializers.ListField(child=serializers.IntegerField(), allow_empty=False, max_length=1000)
+    status = serializers.ChoiceField(choices=["approved", "rejected"])
+
+from .models import Job
+
+class JobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Job
+        fields = [
+            "id", "kind", "status", "progress", "total", "result", "error", "attempts",
+            "created_at", "started_at", "finished_at",
+        ]
+
+class RebuildAttendanceDailySerializer(serializers.Serializer):
+    start = serializers.DateField(required=False)
+    end = serializers.DateField(required=False)
+
+from .models import Shift
+
+class ShiftSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Shift
+        fields = ["id", "name", "start_time", "end_time", "late_grace_minutes"]
+
+class RosterImportRowSerializer(serializers.Serializer):
+    employee_id = serializers.CharField(max_length=20)
+    date = serializers.DateField()
+    shift = serializers.CharField(max_length=50)
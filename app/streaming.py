@@ -0,0 +1,68 @@
+import csv
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+
+STREAM_CHUNK_SIZE = 2000
+
+
+def ndjson_lines(rows):
+    encoder = DjangoJSONEncoder()
+    for row in rows:
+        yield encoder.encode(row) + "\n"
+
+
+class Echo:
+    """File-like object whose write() hands the line straight back to csv.writer's caller."""
+
+    def write(self, value):
+        return value
+
+
+def csv_lines(rows, fields):
+    writer = csv.writer(Echo())
+    yield writer.writerow(fields)
+    for row in rows:
+        yield writer.writerow([row[field] for field in fields])
+
+
+def sse_message(event, data):
+    """One Server-Sent Events message; `data` is sent as a single line of JSON."""
+    return f"event: {event}\ndata: {DjangoJSONEncoder().encode(data)}\n\n"
+
+
+def _attachment(response, filename):
+    if filename:
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
+
+
+def ndjson_response(queryset, filename=None):
+    """
+    Stream a `values()` queryset as newline-delimited JSON.
+
+    Rows come from a server-side cursor via `iterator()`, so memory stays
+    flat no matter how many rows match.
+    """
+    response = StreamingHttpResponse(
+        ndjson_lines(queryset.iterator(chunk_size=STREAM_CHUNK_SIZE)),
+        content_type="application/x-ndjson",
+    )
+    return _attachment(response, filename)
+
+
+def csv_response(queryset, fields, filename=None):
+    """Stream a `values()` queryset as CSV with a header row, like `ndjson_response`."""
+    response = StreamingHttpResponse(
+        csv_lines(queryset.iterator(chunk_size=STREAM_CHUNK_SIZE), fields),
+        content_type="text/csv",
+    )
+    return _attachment(response, filename)
+
+
+def sse_response(messages):
+    """Stream an (async) iterator of `sse_message` strings, unbuffered by proxies."""
+    response = StreamingHttpResponse(messages, content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
@@ -0,0 +1,79 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Attendance
+from .serializers import AttendanceEmployeeSerializer
+
+# summary key -> Attendance field that must be set for a row to be listed
+SUMMARY_BUCKETS = {
+    "clockin": "clock_in",
+    "clockout": "clock_out",
+    "breakin": "break_in",
+    "breakout": "break_out",
+    "lunchin": "lunch_in",
+    "lunchout": "lunch_out",
+}
+
+
+def summary_cache_key(day):
+    return f"attendance-summary:{day.isoformat()}"
+
+
+def summary_queryset(day):
+    any_punch = Q()
+    for field in SUMMARY_BUCKETS.values():
+        any_punch |= Q(**{f"{field}__isnull": False})
+
+    return (
+        Attendance.objects.filter(any_punch, date=day)
+        .select_related("user")
+        .only("user__employee_id", "user__first_name", "user__last_name", *SUMMARY_BUCKETS.values())
+        .order_by("id")
+    )
+
+
+def bucket_summary_rows(rows):
+    """Serialize each row once and file it under every bucket it belongs to."""
+    data = {key: [] for key in SUMMARY_BUCKETS}
+    for row in rows:
+        item = AttendanceEmployeeSerializer(row).data
+        for key, field in SUMMARY_BUCKETS.items():
+            if getattr(row, field) is not None:
+                data[key].append(item)
+    return data
+
+
+def build_attendance_summary(day):
+    return bucket_summary_rows(summary_queryset(day))
+
+
+def get_attendance_summary(day=None):
+    day = day or timezone.localdate()
+    key = summary_cache_key(day)
+
+    data = cache.get(key)
+    if data is None:
+        data = build_attendance_summary(day)
+        cache.set(key, data, settings.ATTENDANCE_SUMMARY_CACHE_TIMEOUT)
+    return data
+
+
+def invalidate_attendance_summary(day=None):
+    cache.delete(summary_cache_key(day or timezone.localdate()))
+
+
+async def aget_attendance_summary(day=None):
+    day = day or timezone.localdate()
+    key = summary_cache_key(day)
+
+    data = await cache.aget(key)
+    if data is None:
+        data = bucket_summary_rows([row async for row in summary_queryset(day)])
+        await cache.aset(key, data, settings.ATTENDANCE_SUMMARY_CACHE_TIMEOUT)
+    return data
+
+
+async def ainvalidate_attendance_summary(day=None):
+    await cache.adelete(summary_cache_key(day or timezone.localdate()))
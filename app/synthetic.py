@@ -0,0 +1,150 @@
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import Attendance, EmployeeUser, MusterRequest
+
+FIRST_NAMES = ["Aarav", "Priya", "Rahul", "Ananya", "Vikram", "Sneha", "Arjun", "Kavya", "Rohan", "Meera",
+               "James", "Maria", "Chen", "Fatima", "Lucas", "Amara", "Noah", "Sofia", "Ivan", "Yuki"]
+LAST_NAMES = ["Reddy", "Sharma", "Patel", "Iyer", "Khan", "Singh", "Nair", "Das", "Gupta", "Rao",
+              "Smith", "Garcia", "Wang", "Okafor", "Silva", "Kim", "Muller", "Rossi", "Novak", "Sato"]
+DEPARTMENTS = ["Engineering", "Operations", "Sales", "Support", "Finance", "People", "Logistics", "Security"]
+# (role, weight)
+ROLES = [("employee", 85), ("manager", 10), ("hr", 5)]
+
+
+def _chunks(items, size):
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _insert(model, rows, batch_size):
+    """Insert a lazily generated stream of rows in committed chunks, so memory stays bounded."""
+    total = 0
+    for chunk in _chunks(rows, batch_size):
+        with transaction.atomic():
+            created = model.objects.bulk_create(chunk, batch_size=batch_size)
+        total += len(created)
+    return total
+
+
+def _insert_values(model, fields, rows, batch_size):
+    """
+    Like `_insert`, but for plain value tuples already in database form.
+
+    Skips model instantiation and per-field preparation, which dominate
+    `bulk_create` at millions of rows.
+    """
+    columns = ", ".join(connection.ops.quote_name(model._meta.get_field(name).column) for name in fields)
+    sql = f"INSERT INTO {connection.ops.quote_name(model._meta.db_table)} ({columns}) VALUES ({', '.join(['%s'] * len(fields))})"
+    total = 0
+    for chunk in _chunks(rows, batch_size):
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.executemany(sql, chunk)
+        total += len(chunk)
+    return total
+
+
+def generate_employees(count, rng, prefix="EMP", password="changeme", batch_size=5000):
+    """
+    Create `count` employees with IDs `<prefix>0000001`... and return their primary keys in order.
+
+    Everyone shares one precomputed password hash, so generation costs one
+    PBKDF2 run instead of one per employee. The same `rng` seed always
+    produces the same rows.
+    """
+    password_hash = make_password(password)
+    roles, weights = zip(*ROLES)
+
+    def rows():
+        for i in range(1, count + 1):
+            role = rng.choices(roles, weights)[0]
+            yield EmployeeUser(
+                employee_id=f"{prefix}{i:07d}",
+                role=role,
+                first_name=rng.choice(FIRST_NAMES),
+                last_name=rng.choice(LAST_NAMES),
+                department=rng.choice(DEPARTMENTS),
+                password=password_hash,
+            )
+
+    _insert(EmployeeUser, rows(), batch_size)
+    return list(
+        EmployeeUser.objects.filter(employee_id__startswith=prefix).order_by("employee_id").values_list("id", flat=True)
+    )
+
+
+def _minutes(rng, mean, spread):
+    return timedelta(minutes=rng.gauss(mean, spread))
+
+
+def punch_day(rng, midnight, shift_start):
+    """Punch columns for one worked day."""
+    clock_in = midnight + shift_start + _minutes(rng, -5, 8)
+    if rng.random() < 0.08:  # late arrivals have a long tail
+        clock_in += timedelta(minutes=rng.expovariate(1 / 20))
+
+    punches = {"clock_in": clock_in}
+    if rng.random() < 0.7:
+        break_in = clock_in + _minutes(rng, 120, 20)
+        punches["break_in"] = break_in
+        punches["break_out"] = break_in + _minutes(rng, 15, 5)
+    lunch_in = midnight + shift_start + _minutes(rng, 240, 20)
+    punches["lunch_in"] = lunch_in
+    punches["lunch_out"] = lunch_in + _minutes(rng, 45, 10)
+    if rng.random() > 0.03:  # a few people forget to clock out
+        punches["clock_out"] = clock_in + timedelta(hours=8, minutes=30) + _minutes(rng, 20, 30)
+    return punches
+
+
+def generate_attendance(user_ids, start, end, rng, absence_rate=0.05, weekends=False, batch_size=5000):
+    """Create one Attendance row per employee per working day in [start, end]; returns the row count."""
+    shift_start = datetime.combine(datetime.min, time.fromisoformat(settings.ATTENDANCE_SHIFT_START)) - datetime.min
+    fields = ["user", "date", *Attendance.PUNCH_FIELDS]
+
+    def rows():
+        day = start
+        while day <= end:
+            if weekends or day.weekday() < 5:
+                midnight = timezone.make_aware(datetime.combine(day, time.min))
+                if not connection.features.supports_timezones:
+                    # Stored as naive datetimes in the connection's time zone
+                    midnight = timezone.make_naive(midnight, connection.timezone)
+                for user_id in user_ids:
+                    if rng.random() >= absence_rate:
+                        punches = punch_day(rng, midnight, shift_start)
+                        yield (user_id, day, *(punches.get(field) for field in Attendance.PUNCH_FIELDS))
+            day += timedelta(days=1)
+
+    return _insert_values(Attendance, fields, rows(), batch_size)
+
+
+def generate_muster_requests(user_ids, count, start, end, rng, batch_size=5000):
+    """Create `count` muster requests spread over [start, end], mostly still pending."""
+    span = max((end - start).days, 0) + 1
+    shift_start = time.fromisoformat(settings.ATTENDANCE_SHIFT_START)
+
+    def rows():
+        for _ in range(count):
+            day = start + timedelta(days=rng.randrange(span))
+            action = rng.choice(["clockin", "clockout"])
+            hour = shift_start.hour if action == "clockin" else shift_start.hour + 9
+            requested = timezone.make_aware(datetime.combine(day, time(hour % 24, rng.randrange(60))))
+            yield MusterRequest(
+                employee_id=rng.choice(user_ids),
+                action=action,
+                requested_time=requested,
+                reason=rng.choice(["Forgot to punch", "Biometric failure", "Client visit", "Badge not working"]),
+                status=rng.choices(["pending", "approved", "rejected"], [70, 25, 5])[0],
+            )
+
+    return _insert(MusterRequest, rows(), batch_size)
@@ -1,3 +1,1239 @@
-from django.test import TestCase
+import asyncio
+import gzip
+import io
+import json
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+import brotli
+import msgpack
+from asgiref.sync import async_to_sync, sync_to_async
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import IntegrityError, OperationalError, connection, connections, router
+from django.http import HttpResponse, JsonResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from .archive import ArchiveCorrupted, archived_months, hot_cutoff
+from .attendance import apply_punches, record_punch
+from .authentication import ACCESS, issue_token, issue_tokens
+from .db import retry_on_lock
+from .events import InProcessBroker, get_broker
+from .jobs import JOB_KINDS, claim_job, enqueue, run_worker
+from .middleware import CompressionMiddleware, DatabaseRoutingMiddleware, QueryProfilingMiddleware
+from .models import Attendance, AttendanceArchive, AttendanceDaily, EmployeeUser, Job, MusterRequest, Roster, Shift
+from .profiling import profile_store
+from .punch_buffer import PunchJournal, get_punch_buffer
+from .renderers import ORJSONRenderer
+from .reports import build_attendance_report
+from .rollup import rebuild_daily_rollups
+from .rosters import get_roster_index, import_rosters, invalidate_roster_index
+from .serializers import AttendanceEmployeeSerializer
+
+
+class AttendanceSummaryTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.hr = EmployeeUser.objects.create_user(employee_id="HR001", role="hr")
+        cls.employees = [
+            EmployeeUser.objects.create_user(employee_id=f"EMP{i:03d}", first_name=f"E{i}")
+            for i in range(20)
+        ]
+        now = timezone.now()
+        for i, employee in enumerate(cls.employees):
+            Attendance.objects.create(
+                user=employee,
+                clock_in=now,
+                break_in=now if i % 2 else None,
+                lunch_in=now if i % 3 else None,
+            )
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.hr)
+        self.url = reverse("attendance-summary-api")
+
+    def test_summary_query_count_is_constant(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data["clockin"]), 20)
+        self.assertEqual(len(response.data["breakin"]), 10)
+        self.assertEqual(len(response.data["lunchin"]), 13)
+        self.assertEqual(response.data["clockout"], [])
+        self.assertEqual(response.data["clockin"][0]["employee_id"], "EMP000")
+
+    def test_summary_is_served_from_cache(self):
+        self.client.get(self.url)
+        with self.assertNumQueries(0):
+            self.client.get(self.url)
+
+    def test_punch_invalidates_summary(self):
+        self.client.get(self.url)
+        employee = APIClient()
+        employee.force_authenticate(self.employees[0])
+        employee.post(reverse("clock_out"))
+
+        response = self.client.get(self.url)
+        self.assertEqual([row["employee_id"] for row in response.data["clockout"]], ["EMP000"])
+
+
+class BulkPunchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.hr = EmployeeUser.objects.create_user(employee_id="HR001", role="hr")
+        cls.alice = EmployeeUser.objects.create_user(employee_id="EMP001")
+        cls.bob = EmployeeUser.objects.create_user(employee_id="EMP002")
+        Attendance.objects.create(user=cls.bob, date=timezone.localdate())
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.hr)
+        # Both are built once per process, not per request
+        get_roster_index()
+        archived_months()
+
+    def test_batch_is_applied_in_a_fixed_number_of_queries(self):
+        now = timezone.now()
+        events = [
+            {"employee_id": "EMP001", "action": "clock_in", "timestamp": now.isoformat()},
+            {"employee_id": "EMP002", "action": "clock_in", "timestamp": now.isoformat()},
+            {"employee_id": "EMP002", "action": "break_in", "timestamp": now.isoformat()},
+            {"employee_id": "NOPE", "action": "clock_in", "timestamp": now.isoformat()},
+            {"employee_id": "EMP001", "action": "dance", "timestamp": now.isoformat()},
+        ]
+        # users, savepoint, insert missing rows, select rows, one UPDATE per
+        # column set, rollup upsert, release
+        with self.assertNumQueries(8):
+            response = self.client.post(reverse("bulk-punch"), {"events": events}, format="json")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([r["status"] for r in response.data["results"]], ["ok", "ok", "ok", "error", "error"])
+        self.assertEqual(Attendance.objects.filter(clock_in__isnull=False).count(), 2)
+        self.assertIsNotNone(Attendance.objects.get(user=self.bob).break_in)
+
+
+class PunchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.employee = EmployeeUser.objects.create_user(employee_id="EMP001")
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.employee)
+        get_roster_index()
+        archived_months()
+
+    def test_punches_share_one_row_per_day(self):
+        for name in ["clock_in", "break_in", "break_out", "clock_out"]:
+            self.client.post(reverse(name))
+
+        attendance = Attendance.objects.get(user=self.employee)
+        self.assertIsNotNone(attendance.clock_in)
+        self.assertIsNotNone(attendance.clock_out)
+
+    def test_punch_on_existing_row_is_a_single_update(self):
+        Attendance.objects.create(user=self.employee, date=timezone.localdate())
+        with self.assertNumQueries(3):  # punch UPDATE, then rollup read + upsert
+            self.client.post(reverse("clock_in"))
+
+    def test_punches_keep_daily_rollup_current(self):
+        self.client.post(reverse("clock_in"))
+        self.client.post(reverse("clock_out"))
+        rollup = AttendanceDaily.objects.get(user=self.employee)
+        self.assertEqual(rollup.date, timezone.localdate())
+        self.assertEqual(rollup.worked_seconds, 0)  # clock-out within the same second
+
+
+class AsyncViewTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.employee = EmployeeUser.objects.create_user(employee_id="EMP001", first_name="Asha")
+        cls.hr = EmployeeUser.objects.create_user(employee_id="HR001", role="hr")
+
+    def setUp(self):
+        cache.clear()
+
+    def auth(self, user):
+        return {"headers": {"Authorization": f"Bearer {issue_token(user, ACCESS)}"}}
+
+    async def test_async_punches_and_summary(self):
+        for name in ["clock_in", "break_in", "clock_in"]:
+            response = await self.async_client.post(reverse(f"{name}-async"), **self.auth(self.employee))
+            self.assertEqual(response.status_code, 200)
+
+        attendance = await Attendance.objects.aget(user=self.employee)
+        self.assertIsNotNone(attendance.break_in)
+        self.assertTrue(await AttendanceDaily.objects.filter(user=self.employee).aexists())
+
+        response = await self.async_client.get(reverse("attendance-summary-async"), **self.auth(self.hr))
+        self.assertEqual(response.json()["clockin"][0]["first_name"], "Asha")
+
+    async def test_async_auth_and_roles(self):
+        url = reverse("attendance-summary-async")
+        self.assertEqual((await self.async_client.get(url)).status_code, 401)
+        response = await self.async_client.get(url, **self.auth(self.employee))
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(response.json(), {"error": "Only admin/hr/manager can view attendance"})
+        response = await self.async_client.get(reverse("clock_in-async"), **self.auth(self.employee))
+        self.assertEqual(response.status_code, 405)
+
+
+class AttendanceStreamTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.employee = EmployeeUser.objects.create_user(employee_id="EMP001", first_name="Asha")
+        cls.hr = EmployeeUser.objects.create_user(employee_id="HR001", role="hr")
+
+    def setUp(self):
+        cache.clear()
+        # A fresh broker, so an unfinished stream cannot outlive the test
+        get_broker.cache_clear()
+        self.addCleanup(get_broker.cache_clear)
+
+    async def test_snapshot_then_punch_events(self):
+        response = await self.async_client.get(
+            reverse("attendance-summary-stream"),
+            headers={"Authorization": f"Bearer {issue_token(self.hr, ACCESS)}"},
+        )
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        stream = aiter(response.streaming_content)
+        snapshot = await anext(stream)
+        self.assertTrue(snapshot.startswith(b"event: snapshot\n"))
+        self.assertEqual(json.loads(snapshot.split(b"data: ")[1])["clockin"], [])
+
+        def punch():
+            # Publishing waits for commit, which the test transaction never does
+            with self.captureOnCommitCallbacks(execute=True):
+                record_punch(self.employee, "clock_in")
+
+        await sync_to_async(punch)()
+        message = await asyncio.wait_for(anext(stream), 5)
+        self.assertTrue(message.startswith(b"event: attendance\n"))
+        [row] = json.loads(message.split(b"data: ")[1])["rows"]
+        self.assertEqual((row["employee_id"], row["date"]), ("EMP001", timezone.localdate().isoformat()))
+        self.assertIsNotNone(row["clock_in"])
+        await stream.aclose()
+
+    async def test_slow_subscriber_is_told_to_resync(self):
+        broker = InProcessBroker()
+        with override_settings(ATTENDANCE_EVENTS_QUEUE_SIZE=2):
+            async with broker.subscribe() as queue:
+                for i in range(3):
+                    # Published from another thread, as sync views do
+                    await asyncio.to_thread(broker.publish, {"event": "attendance", "data": i})
+                await asyncio.sleep(0)
+                self.assertEqual(await queue.get(), {"event": "resync", "data": None})
+                self.assertTrue(queue.empty())
+
+
+class PunchBufferTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.employee = EmployeeUser.objects.create_user(employee_id="EMP001")
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        get_punch_buffer.cache_clear()
+        self.addCleanup(get_punch_buffer.cache_clear)
+
+    def test_buffered_punches_are_journaled_then_flushed_in_bulk(self):
+        client = APIClient()
+        client.force_authenticate(self.employee)
+        with override_settings(
+            PUNCH_BUFFER_ENABLED=True, PUNCH_BUFFER_DIR=self.directory, PUNCH_BUFFER_FLUSH_INTERVAL=None
+        ):
+            with self.assertNumQueries(0):
+                for name in ["clock_in", "break_in", "clock_in"]:
+                    self.assertEqual(client.post(reverse(name)).status_code, 200)
+        self.assertFalse(Attendance.objects.exists())
+
+        call_command("flush_punch_journal", "--dir", self.directory, stdout=io.StringIO())
+        attendance = Attendance.objects.get(user=self.employee)
+        self.assertIsNotNone(attendance.break_in)
+        self.assertGreaterEqual(attendance.clock_in, attendance.break_in)  # last clock-in wins
+        self.assertTrue(AttendanceDaily.objects.filter(user=self.employee).exists())
+        self.assertEqual(sorted(os.listdir(self.directory)), ["flush.lock", "journal.lock"])
+
+    def test_replays_leftovers_and_skips_torn_lines(self):
+        journal = PunchJournal(self.directory)
+        now = timezone.now()
+        journal.append(self.employee.pk, "clock_in", now)
+        journal.rotate()  # sealed by a process that crashed before applying it
+        journal.append(self.employee.pk, "clock_out", now)
+        journal.append(999999, "clock_out", now)  # employee deleted meanwhile
+        with open(journal.path, "a") as live:
+            live.write('{"user_id": 1, "fie')
+
+        with self.assertLogs("app.punch_buffer", "WARNING"):
+            self.assertEqual(journal.flush(), 2)
+        attendance = Attendance.objects.get(user=self.employee)
+        self.assertEqual((attendance.clock_in, attendance.clock_out), (now, now))
+        self.assertEqual(journal.flush(), 0)
+
+
+class TokenAuthenticationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.employee = EmployeeUser.objects.create_user(employee_id="EMP001", password="s3cret-pass")
+
+    def setUp(self):
+        # Cached principals would outlive the rolled-back token_version bumps
+        cache.clear()
+
+    def test_login_issues_tokens_usable_as_bearer(self):
+        response = self.client.post(reverse("login"), {"employee_id": "EMP001", "password": "s3cret-pass"})
+        self.assertEqual(response.status_code, 200)
+
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.data['access']}")
+        self.assertEqual(client.get(reverse("list-muster-request")).status_code, 200)
+
+        refreshed = client.post(reverse("token-refresh"), {"refresh": response.data["refresh"]})
+        self.assertEqual(refreshed.status_code, 200)
+        self.assertIn("access", refreshed.data)
+
+    def test_refresh_tokens_are_single_use(self):
+        first, other_device = issue_tokens(self.employee), issue_tokens(self.employee)
+        refreshed = self.client.post(reverse("token-refresh"), {"refresh": first["refresh"]})
+        self.assertEqual(refreshed.status_code, 200)
+        self.assertNotEqual(refreshed.data["refresh"], first["refresh"])
+
+        # Replaying the spent token ends that login, rotated tokens included
+        replayed = self.client.post(reverse("token-refresh"), {"refresh": first["refresh"]})
+        self.assertEqual(replayed.status_code, 403)
+        self.assertEqual(replayed.data["detail"], "Token already used")
+        rotated = self.client.post(reverse("token-refresh"), {"refresh": refreshed.data["refresh"]})
+        self.assertEqual(rotated.status_code, 403)
+
+        self.assertEqual(self.client.post(reverse("token-refresh"), {"refresh": other_device["refresh"]}).status_code, 200)
+
+    def test_revoked_and_tampered_tokens_are_rejected(self):
+        tokens = issue_tokens(self.employee)
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {tokens['access']}")
+        self.assertEqual(client.post(reverse("token-revoke")).status_code, 200)
+        self.assertEqual(client.get(reverse("list-muster-request")).status_code, 401)
+
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {tokens['access']}x")
+        self.assertEqual(client.get(reverse("list-muster-request")).status_code, 401)
+
+    def test_password_change_revokes_earlier_tokens(self):
+        tokens = issue_tokens(self.employee)
+        hr = APIClient()
+        hr.force_authenticate(EmployeeUser.objects.create_user(employee_id="HR001", role="hr"))
+        response = hr.put(reverse("update-employee", args=["EMP001"]), {"password": "n3w-pass"})
+        self.assertEqual(response.status_code, 200)
+
+        refreshed = self.client.post(reverse("token-refresh"), {"refresh": tokens["refresh"]})
+        self.assertEqual(refreshed.status_code, 403)  # the refresh view has no authenticator to answer 401
+        client = APIClient(HTTP_AUTHORIZATION=f"Bearer {tokens['access']}")
+        self.assertEqual(client.get(reverse("list-muster-request")).status_code, 401)
+
+    def test_cached_principal_authorizes_without_user_query(self):
+        client = APIClient(HTTP_AUTHORIZATION=f"Bearer {issue_tokens(self.employee)['access']}")
+        url = reverse("attendance-summary-api")
+        client.get(url)
+        # The principal now comes from the cache; no user row is loaded
+        with self.assertNumQueries(0):
+            response = client.get(url)
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(response.data, {"error": "Only admin/hr/manager can view attendance"})
+
+        # Promotion through save() is visible on the very next request
+        self.employee.role = "hr"
+        self.employee.save()
+        self.assertEqual(client.get(url).status_code, 200)
+
+        self.employee.delete()
+        self.assertEqual(client.get(url).status_code, 401)
+
+
+class AttendanceArchiveTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.employee = EmployeeUser.objects.create_user(employee_id="EMP001")
+        cls.month = hot_cutoff(keep_months=2)
+        for day in range(1, 4):
+            clock_in = datetime(cls.month.year, cls.month.month, day, 9, tzinfo=dt_timezone.utc)
+            Attendance.objects.create(
+                user=cls.employee, date=clock_in.date(), clock_in=clock_in, clock_out=clock_in + timedelta(hours=9)
+            )
+        Attendance.objects.create(user=cls.employee, clock_in=timezone.now())
+        rebuild_daily_rollups()
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def archive(self, *args):
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command("archive_attendance", "--keep-months", "1", "--dir", self.directory, *args, stdout=io.StringIO())
+
+    def test_archive_rebuild_and_restore(self):
+        report = build_attendance_report(self.month, timezone.localdate())
+        self.archive()
+        archive = AttendanceArchive.objects.get()
+        self.assertEqual((archive.month, archive.rows), (self.month, 3))
+        self.assertEqual(Attendance.objects.count(), 1)
+        self.assertEqual(os.listdir(self.directory), [os.path.basename(archive.path)])
+
+        # Reports keep reading the rollups; rebuilding them reads the archive
+        self.assertEqual(build_attendance_report(self.month, timezone.localdate()), report)
+        AttendanceDaily.objects.all().delete()
+        rebuild_daily_rollups()
+        self.assertEqual(build_attendance_report(self.month, timezone.localdate()), report)
+
+        # A late correction for an archived day is folded in by the next run
+        lunch = datetime(self.month.year, self.month.month, 1, 13, tzinfo=dt_timezone.utc)
+        Attendance.objects.create(user=self.employee, date=self.month, lunch_in=lunch)
+        self.archive()
+        archive = AttendanceArchive.objects.get()
+        self.assertEqual(archive.rows, 3)
+        self.assertEqual(os.listdir(self.directory), [os.path.basename(archive.path)])
+
+        self.archive("--restore", f"{self.month:%Y-%m}")
+        self.assertFalse(AttendanceArchive.objects.exists())
+        self.assertEqual(os.listdir(self.directory), [])
+        restored = Attendance.objects.get(user=self.employee, date=self.month)
+        self.assertEqual((restored.lunch_in, restored.clock_in.hour), (lunch, 9))
+        self.assertEqual(Attendance.objects.count(), 4)
+
+    def test_correcting_an_archived_day_keeps_its_rollup(self):
+        self.archive()
+        day = self.month
+        clock_out = datetime(day.year, day.month, day.day, 17, tzinfo=dt_timezone.utc)
+        apply_punches([(self.employee.pk, "clock_out", clock_out)])
+        self.assertEqual(AttendanceDaily.objects.get(user=self.employee, date=day).worked_seconds, 8 * 3600)
+
+        record_punch(self.employee, "lunch_in", clock_out - timedelta(hours=4))
+        rollup = AttendanceDaily.objects.get(user=self.employee, date=day)
+        self.assertEqual((rollup.worked_seconds, rollup.lunch_seconds), (8 * 3600, 0))
+
+    def test_corrupted_archive_is_refused(self):
+        self.archive()
+        with open(AttendanceArchive.objects.get().path, "ab") as archive:
+            archive.write(b"garbage")
+        with self.assertRaises(ArchiveCorrupted):
+            rebuild_daily_rollups()
+
+
+class ListEmployeesTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.hr = EmployeeUser.objects.create_user(employee_id="HR001", role="hr", first_name="Hana")
+        for i in range(25):
+            EmployeeUser.objects.create_user(employee_id=f"EMP{i:03d}", first_name="Ann" if i % 5 == 0 else "Bob")
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.hr)
+        self.url = reverse("list-employees")
+
+    def test_keyset_pages_cover_every_employee_once(self):
+        seen, cursor = [], None
+        while True:
+            params = {"limit": 10, **({"cursor": cursor} if cursor else {})}
+            response = self.client.get(self.url, params)
+            seen += [row["employee_id"] for row in response.data["results"]]
+            cursor = response.data["next"]
+            if not cursor:
+                break
+        self.assertEqual(len(seen), 26)
+        self.assertEqual(seen, sorted(seen))
+
+    def test_filters_and_invalid_cursor(self):
+        response = self.client.get(self.url, {"name": "an", "role": "employee"})
+        self.assertEqual(len(response.data["results"]), 5)
+        self.assertEqual(self.client.get(self.url, {"cursor": "nope"}).status_code, 400)
+
+    def test_ndjson_stream(self):
+        response = self.client.get(self.url, {"stream": "ndjson", "role": "hr"})
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual([json.loads(line)["employee_id"] for line in lines], ["HR001"])
+
+    def test_conditional_get_tracks_employee_writes(self):
+        etag = self.client.get(self.url, {"limit": 10})["ETag"]
+        response = self.client.get(self.url, {"limit": 10}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertNotEqual(self.client.get(self.url, {"limit": 5})["ETag"], etag)
+
+        employee = EmployeeUser.objects.get(employee_id="EMP024")
+        employee.department = "Ops"
+        employee.save()
+        self.assertEqual(self.client.get(self.url, {"limit": 10}, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+        etag = self.client.get(self.url, {"limit": 10})["ETag"]
+        employee.delete()
+        self.assertEqual(self.client.get(self.url, {"limit": 10}, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_compression_stays_async_for_async_views(self):
+        async def view(request):
+            return JsonResponse({"rows": ["x" * 100] * 20})
+
+        middleware = CompressionMiddleware(view)
+        self.assertTrue(asyncio.iscoroutinefunction(middleware))
+        response = asyncio.run(middleware(RequestFactory().get("/", HTTP_ACCEPT_ENCODING="gzip")))
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(json.loads(gzip.decompress(response.content))["rows"][0], "x" * 100)
+
+    def test_profile_update_over_bearer_auth_changes_the_etag(self):
+        etag = self.client.get(self.url, {"limit": 10})["ETag"]
+        token = issue_tokens(EmployeeUser.objects.get(employee_id="EMP000"))["access"]
+        employee = APIClient()
+        employee.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+        self.assertEqual(employee.put(reverse("update_profile"), {"first_name": "Renamed"}).status_code, 200)
+
+        response = self.client.get(self.url, {"limit": 10}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["results"][0]["first_name"], "Renamed")
+
+    def test_orjson_matches_drf_json_byte_for_byte(self):
+        when = datetime(2025, 3, 3, 9, 15, 30, 123456, tzinfo=dt_timezone.utc)
+        data = {
+            "utc": when,
+            "offset": when.astimezone(dt_timezone(timedelta(hours=5, minutes=30))),
+            "local_mean_time": when.astimezone(dt_timezone(timedelta(minutes=19, seconds=32))),
+            "time": when.time(),
+            "date": when.date(),
+            "amount": Decimal("1.50"),
+            1: ["Asha", None, True],
+        }
+        self.assertEqual(ORJSONRenderer().render(data), JSONRenderer().render(data))
+
+    def test_msgpack_and_compressed_responses(self):
+        body = self.client.get(self.url).json()
+        response = self.client.get(self.url, HTTP_ACCEPT="application/msgpack")
+        self.assertEqual(response["Content-Type"], "application/msgpack")
+        self.assertEqual(msgpack.unpackb(response.content), body)
+
+        for encoding, decompress in [("br", brotli.decompress), ("gzip", gzip.decompress)]:
+            response = self.client.get(self.url, HTTP_ACCEPT_ENCODING=f"{encoding}, deflate")
+            self.assertEqual(response["Content-Encoding"], encoding)
+            self.assertIn("Accept-Encoding", response["Vary"])
+            self.assertTrue(response["ETag"].startswith('W/"'))
+            self.assertEqual(json.loads(decompress(response.content)), body)
+            # A weakened ETag still validates the cached copy
+            etag = response["ETag"]
+            self.assertEqual(
+                self.client.get(self.url, HTTP_ACCEPT_ENCODING=encoding, HTTP_IF_NONE_MATCH=etag).status_code, 304
+            )
+
+        refused = self.client.get(self.url, HTTP_ACCEPT_ENCODING="br;q=0, gzip;q=0")
+        self.assertFalse(refused.has_header("Content-Encoding"))
+        small = self.client.get(self.url, {"limit": 1}, HTTP_ACCEPT_ENCODING="gzip")
+        self.assertFalse(small.has_header("Content-Encoding"))
+
+
+class AttendanceReportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.hr = EmployeeUser.objects.create_user(employee_id="HR001", role="hr", department="People")
+        cls.employee = EmployeeUser.objects.create_user(employee_id="EMP001", department="Ops")
+        for day in (1, 2):
+            start = datetime(2025, 3, day, 9, tzinfo=dt_timezone.utc)
+            Attendance.objects.create(
+                user=cls.employee,
+                date=start.date(),
+                clock_in=start,
+                clock_out=start + timedelta(hours=8),
+                lunch_in=start + timedelta(hours=3),
+                lunch_out=start + timedelta(hours=3, minutes=30),
+                break_in=start + timedelta(hours=5),  # never closed
+            )
+        rebuild_daily_rollups()
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.hr)
+        self.url = reverse("attendance-report")
+
+    def test_monthly_totals_per_user(self):
+        response = self.client.get(self.url, {"start": "2025-03-01", "end": "2025-03-31", "period": "month"})
+        self.assertEqual(response.status_code, 200)
+        [row] = response.data["results"]
+        self.assertEqual(row["employee_id"], "EMP001")
+        self.assertEqual(row["days"], 2)
+        self.assertEqual(row["worked_seconds"], 2 * 8 * 3600)
+        self.assertEqual(row["lunch_seconds"], 2 * 1800)
+        self.assertEqual(row["break_seconds"], 0)
+        self.assertEqual(row["late_days"], 0)
+
+    def test_department_grouping_and_validation(self):
+        response = self.client.get(self.url, {"start": "2025-03-01", "end": "2025-03-01", "group_by": "department"})
+        self.assertEqual(response.data["results"][0]["department"], "Ops")
+        self.assertEqual(self.client.get(self.url, {"start": "2025-03-02", "end": "2025-03-01"}).status_code, 400)
+
+
+class MusterReviewTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.manager = EmployeeUser.objects.create_user(employee_id="MGR001", role="manager")
+        cls.employee = EmployeeUser.objects.create_user(employee_id="EMP001", department="Ops")
+        cls.morning = datetime(2025, 3, 3, 9, tzinfo=dt_timezone.utc)
+        cls.requests = [
+            MusterRequest.objects.create(employee=cls.employee, action=action, requested_time=when, reason="forgot")
+            for action, when in [
+                ("clockin", cls.morning),
+                ("clockout", cls.morning + timedelta(hours=8)),
+                ("clockin", cls.morning + timedelta(days=1)),
+            ]
+        ]
+        cls.own = MusterRequest.objects.create(
+            employee=cls.manager, action="clockin", requested_time=cls.morning, reason="forgot"
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.manager)
+
+    def test_queue_is_filtered_and_paginated(self):
+        response = self.client.get(reverse("muster-request-queue"), {"department": "Ops", "limit": 2})
+        self.assertEqual([row["id"] for row in response.data["results"]], [r.id for r in self.requests[:2]])
+        self.assertEqual(response.data["results"][0]["employee_id"], "EMP001")
+
+        response = self.client.get(reverse("muster-request-queue"), {"cursor": response.data["next"]})
+        self.assertEqual([row["id"] for row in response.data["results"]], [self.requests[2].id, self.own.id])
+
+    def test_bulk_approval_corrects_attendance(self):
+        ids = [r.id for r in self.requests[:2]] + [self.own.id, 999]
+        response = self.client.post(reverse("review-muster-request"), {"ids": ids, "status": "approved"}, format="json")
+
+        self.assertEqual([r["status"] for r in response.data["results"]], ["ok", "ok", "error", "error"])
+        attendance = Attendance.objects.get(user=self.employee, date=self.morning.date())
+        self.assertEqual(attendance.clock_in, self.morning)
+        self.assertEqual(AttendanceDaily.objects.get(user=self.employee).worked_seconds, 8 * 3600)
+        self.assertEqual(MusterRequest.objects.get(pk=self.requests[0].pk).reviewed_by, self.manager)
+        self.assertEqual(MusterRequest.objects.get(pk=self.own.pk).status, "pending")
+
+
+class ListMusterRequestsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.employee = EmployeeUser.objects.create_user(employee_id="EMP001")
+        morning = datetime(2025, 3, 3, 9, tzinfo=dt_timezone.utc)
+        for i in range(30):
+            MusterRequest.objects.create(
+                employee=cls.employee,
+                action="clockin",
+                requested_time=morning + timedelta(days=i),
+                reason="forgot",
+                status="approved" if i % 3 == 0 else "pending",
+            )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.employee)
+        self.url = reverse("list-muster-request")
+
+    def test_page_costs_two_queries_regardless_of_history(self):
+        # The version stamp for conditional GETs, then the page itself
+        with self.assertNumQueries(2):
+            response = self.client.get(self.url, {"limit": 25})
+        self.assertEqual(len(response.data["results"]), 25)
+        self.assertEqual(response.data["results"][0]["employee_id"], "EMP001")
+
+        response = self.client.get(self.url, {"limit": 25, "cursor": response.data["next"]})
+        self.assertEqual(len(response.data["results"]), 5)
+        self.assertIsNone(response.data["next"])
+
+    def test_status_and_date_filters(self):
+        response = self.client.get(self.url, {"status": "approved", "start": "2025-03-03", "end": "2025-03-09"})
+        days = [row["requested_time"][:10] for row in response.data["results"]]
+        self.assertEqual(days, ["2025-03-09", "2025-03-06", "2025-03-03"])
+
+    def test_unchanged_page_is_not_modified(self):
+        response = self.client.get(self.url, {"limit": 25})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("Last-Modified", response)
+
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, {"limit": 25}, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, 304)
+
+        stale = response["ETag"]
+        muster_request = self.employee.musterrequest_set.filter(status="pending").first()
+        muster_request.reason = "badge"
+        muster_request.save()
+        response = self.client.get(self.url, {"limit": 25}, HTTP_IF_NONE_MATCH=stale)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], stale)
+
+
+@override_settings(ATTENDANCE_ANALYTICS_WORKERS=0, ATTENDANCE_ANALYTICS_CHUNK_SIZE=2)
+class AttendanceAnalyticsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.hr = EmployeeUser.objects.create_user(employee_id="HR001", role="hr")
+        late = EmployeeUser.objects.create_user(employee_id="EMP001", department="Ops")
+        punctual = EmployeeUser.objects.create_user(employee_id="EMP002", department="Sales")
+
+        def at(day, hour, minute=0):
+            return datetime(2025, 3, day, hour, minute, tzinfo=dt_timezone.utc)
+
+        Attendance.objects.create(
+            user=late, date=at(3, 0).date(), clock_in=at(3, 9, 5), clock_out=at(3, 18, 30),
+            break_in=at(3, 11), break_out=at(3, 11, 20),
+        )
+        Attendance.objects.create(
+            user=late, date=at(4, 0).date(), clock_in=at(4, 9, 30), lunch_in=at(4, 13), lunch_out=at(4, 13, 50),
+        )
+        Attendance.objects.create(user=punctual, date=at(3, 0).date(), clock_in=at(3, 8, 55), clock_out=at(3, 17))
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.hr)
+        self.url = reverse("attendance-analytics")
+
+    def test_metrics_per_employee(self):
+        response = self.client.get(self.url, {"start": "2025-03-01", "end": "2025-03-31"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["rows"], 3)
+        late, punctual = response.data["results"]
+        self.assertEqual(late["employee_id"], "EMP001")
+        self.assertEqual(
+            {metric: late[metric] for metric in ["days", "late_days", "late_seconds", "worked_seconds",
+                                                 "overtime_seconds", "missing_clock_outs", "break_overruns",
+                                                 "lunch_overruns", "flagged"]},
+            {"days": 2, "late_days": 1, "late_seconds": 1800, "worked_seconds": 33900, "overtime_seconds": 5100,
+             "missing_clock_outs": 1, "break_overruns": 1, "lunch_overruns": 0, "flagged": True},
+        )
+        self.assertEqual((punctual["worked_seconds"], punctual["overtime_seconds"]), (29100, 300))
+        self.assertFalse(punctual["flagged"])
+        self.assertEqual(response.data["totals"]["worked_seconds"], 33900 + 29100)
+
+    def test_filters_and_rule_overrides(self):
+        response = self.client.get(
+            self.url, {"start": "2025-03-01", "end": "2025-03-31", "department": "Ops", "late_grace_minutes": 0}
+        )
+        [late] = response.data["results"]
+        self.assertEqual((late["late_days"], late["late_seconds"]), (2, 2100))
+        response = self.client.get(self.url, {"start": "2025-03-04", "end": "2025-03-04", "lunch_allowance_minutes": 45})
+        self.assertEqual(response.data["totals"]["lunch_overruns"], 1)
+        self.assertEqual(self.client.get(self.url, {"start": "2025-03-04"}).status_code, 400)
+
+    def test_rostered_days_use_their_shift_like_the_rollup(self):
+        self.addCleanup(invalidate_roster_index)
+        shift = Shift.objects.create(
+            name="Late start", start_time=datetime.strptime("09:15", "%H:%M").time(),
+            end_time=datetime.strptime("17:15", "%H:%M").time(), late_grace_minutes=20,
+        )
+        early = Shift.objects.create(
+            name="Early", start_time=datetime.strptime("08:30", "%H:%M").time(),
+            end_time=datetime.strptime("16:30", "%H:%M").time(), late_grace_minutes=0,
+        )
+        late = EmployeeUser.objects.get(employee_id="EMP001")
+        Roster.objects.create(user=late, shift=early, date=datetime(2025, 3, 3).date())
+        Roster.objects.create(user=late, shift=shift, date=datetime(2025, 3, 4).date())
+        rebuild_daily_rollups()
+
+        response = self.client.get(self.url, {"start": "2025-03-01", "end": "2025-03-31"})
+        metrics = response.data["results"][0]
+        self.assertEqual((metrics["late_days"], metrics["late_seconds"]), (1, 35 * 60))
+        late_rollups = AttendanceDaily.objects.filter(user=late, is_late=True)
+        self.assertEqual(list(late_rollups.values_list("date", flat=True)), [datetime(2025, 3, 3).date()])
+
+    def test_endpoint_never_starts_a_process_pool(self):
+        with override_settings(ATTENDANCE_ANALYTICS_WORKERS=4), mock.patch("app.analytics.ProcessPoolExecutor") as pool:
+            response = self.client.get(self.url, {"start": "2025-03-01", "end": "2025-03-31"})
+        self.assertEqual(response.data["rows"], 3)
+        pool.assert_not_called()
+
+
+@override_settings(EMPLOYEE_IMPORT_HASH_WORKERS=0, JOB_PROGRESS_INTERVAL=0)
+class BackgroundJobTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.hr = EmployeeUser.objects.create_user(employee_id="HR001", role="hr")
+        cls.employee = EmployeeUser.objects.create_user(employee_id="EMP001")
+        clock_in = datetime(2025, 3, 3, 9, tzinfo=dt_timezone.utc)
+        Attendance.objects.create(
+            user=cls.employee, date=clock_in.date(), clock_in=clock_in, clock_out=clock_in + timedelta(hours=8)
+        )
+        rebuild_daily_rollups()
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.hr)
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        uploads = override_settings(JOB_UPLOAD_DIR=self.directory)
+        uploads.enable()
+        self.addCleanup(uploads.disable)
+
+    def test_report_runs_on_the_worker_and_is_polled(self):
+        params = {"start": "2025-03-01", "end": "2025-03-31", "period": "month"}
+        response = self.client.get(reverse("attendance-report"), {**params, "background": "1"})
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data["status"], "queued")
+
+        run_worker(once=True)
+        response = self.client.get(response["Location"])
+        self.assertEqual(response.data["status"], "succeeded")
+        [row] = response.data["result"]["results"]
+        self.assertEqual((row["employee_id"], row["worked_seconds"]), ("EMP001", 8 * 3600))
+
+        other = APIClient()
+        other.force_authenticate(self.employee)
+        self.assertEqual(other.get(reverse("job-status", args=[response.data["id"]])).status_code, 404)
+
+    def test_background_import_reports_progress(self):
+        upload = SimpleUploadedFile(
+            "people.ndjson",
+            b'{"employee_id": "EMP010", "password": "Secret-Pass-1"}\nnot json\n{"employee_id": "EMP011"}\n',
+        )
+        response = self.client.post(
+            reverse("import-employees"), {"file": upload, "background": "true"}, format="multipart"
+        )
+        self.assertEqual(response.status_code, 202)
+        self.assertFalse(EmployeeUser.objects.filter(employee_id="EMP010").exists())
+        job = Job.objects.get(pk=response.data["id"])
+        self.assertNotIn("Secret-Pass-1", json.dumps(job.params))
+        self.assertTrue(os.path.exists(job.params["path"]))
+
+        run_worker(once=True)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.progress, job.total), ("succeeded", 3, 3))
+        self.assertEqual(job.result["created"], 2)
+        self.assertEqual(job.result["errors"][0]["line"], 2)
+        self.assertTrue(EmployeeUser.objects.get(employee_id="EMP010").check_password("Secret-Pass-1"))
+        self.assertEqual(os.listdir(self.directory), [])
+
+    def test_failures_are_retried_with_backoff(self):
+        calls = []
+
+        def flaky(params, progress):
+            calls.append(params)
+            if len(calls) < 2:
+                raise RuntimeError("transient")
+            return {"ok": True}
+
+        with mock.patch.dict(JOB_KINDS, {"flaky": flaky}):
+            job = enqueue("flaky", {"n": 1}, max_attempts=3)
+            self.assertEqual(claim_job("a").pk, job.pk)
+            self.assertIsNone(claim_job("b"))  # already taken
+
+            Job.objects.filter(pk=job.pk).update(status="queued")
+            with self.assertLogs("app.jobs", "ERROR"):
+                run_worker(once=True)
+            job.refresh_from_db()
+            self.assertEqual((job.status, job.attempts), ("queued", 2))
+            self.assertIn("transient", job.error)
+            self.assertGreater(job.run_after, timezone.now())
+
+            self.assertIsNone(claim_job("a"))  # not due yet
+            Job.objects.filter(pk=job.pk).update(run_after=timezone.now())
+            run_worker(once=True)
+            job.refresh_from_db()
+            self.assertEqual((job.status, job.result), ("succeeded", {"ok": True}))
+
+    def test_long_jobs_heartbeat_and_lost_jobs_give_up(self):
+        with mock.patch.dict(JOB_KINDS, {"slow": lambda params, progress: time.sleep(0.3)}):
+            job = enqueue("slow", max_attempts=2)
+            with override_settings(JOB_HEARTBEAT_INTERVAL=0.05), mock.patch("app.jobs.beat") as beat:
+                run_worker(once=True)
+            self.assertGreaterEqual(beat.call_count, 3)
+            job.refresh_from_db()
+            self.assertEqual(job.status, "succeeded")
+
+            # Its worker died mid-run: queued again while attempts remain, then failed
+            long_ago = timezone.now() - timedelta(days=1)
+            Job.objects.filter(pk=job.pk).update(status="running", attempts=1, heartbeat_at=long_ago)
+            with self.assertLogs("app.jobs", "WARNING"):
+                self.assertEqual(claim_job("b").pk, job.pk)
+            Job.objects.filter(pk=job.pk).update(heartbeat_at=long_ago)
+            with self.assertLogs("app.jobs", "ERROR"):
+                self.assertIsNone(claim_job("c"))
+            job.refresh_from_db()
+            self.assertEqual((job.status, job.attempts, job.error), ("failed", 2, "Worker stopped responding"))
+
+
+class RosterTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.hr = EmployeeUser.objects.create_user(employee_id="HR001", role="hr")
+        cls.employee = EmployeeUser.objects.create_user(employee_id="EMP001")
+        cls.night = Shift.objects.create(
+            name="Night", start_time=datetime.strptime("22:00", "%H:%M").time(),
+            end_time=datetime.strptime("06:00", "%H:%M").time(), late_grace_minutes=0,
+        )
+
+    def setUp(self):
+        invalidate_roster_index()
+        self.addCleanup(invalidate_roster_index)
+        self.today = timezone.localdate()
+
+    def at(self, day, clock):
+        return timezone.make_aware(datetime.combine(day, datetime.strptime(clock, "%H:%M").time()))
+
+    def test_night_shift_punches_land_on_the_day_it_started(self):
+        yesterday = self.today - timedelta(days=1)
+        Roster.objects.create(user=self.employee, shift=self.night, date=yesterday)
+
+        self.assertEqual(record_punch(self.employee, "clock_in", self.at(yesterday, "22:05")), yesterday)
+        self.assertEqual(record_punch(self.employee, "clock_out", self.at(self.today, "05:55")), yesterday)
+
+        attendance = Attendance.objects.get(user=self.employee)
+        self.assertEqual(attendance.date, yesterday)
+        rollup = AttendanceDaily.objects.get(user=self.employee)
+        self.assertEqual(rollup.worked_seconds, (7 * 60 + 50) * 60)
+        self.assertTrue(rollup.is_late)  # no grace on this shift
+
+    def test_older_punches_are_resolved_from_the_database(self):
+        old = self.today - timedelta(days=30)
+        Roster.objects.create(user=self.employee, shift=self.night, date=old)
+        day = record_punch(self.employee, "clock_out", self.at(old + timedelta(days=1), "06:30"))
+        self.assertEqual(day, old)
+
+    def test_clock_in_reports_the_rostered_shift(self):
+        start = (timezone.now() - timedelta(hours=1)).replace(second=0, microsecond=0)
+        shift = Shift.objects.create(
+            name="Now", start_time=start.time(), end_time=(start + timedelta(hours=8)).time(), late_grace_minutes=5
+        )
+        Roster.objects.create(user=self.employee, shift=shift, date=timezone.localdate(start))
+        Attendance.objects.create(user=self.employee, date=timezone.localdate(start))
+        client = APIClient()
+        client.force_authenticate(self.employee)
+        get_roster_index()
+        archived_months()
+
+        # Same three queries as an unrostered punch; the shift comes from the index
+        with self.assertNumQueries(3):
+            response = client.post(reverse("clock_in"))
+        self.assertEqual(response.data["date"], timezone.localdate(start))
+        self.assertEqual(response.data["shift"], "Now")
+        self.assertEqual(response.data["shift_start"], start)
+        self.assertTrue(response.data["late"])
+
+    def test_async_clock_in_reports_the_same_fields(self):
+        start = (timezone.now() - timedelta(hours=1)).replace(second=0, microsecond=0)
+        shift = Shift.objects.create(name="Now", start_time=start.time(), end_time=(start + timedelta(hours=8)).time())
+        Roster.objects.create(user=self.employee, shift=shift, date=timezone.localdate(start))
+        client = APIClient()
+        client.force_authenticate(self.employee)
+
+        body = client.post(reverse("clock_in")).json()
+        response = async_to_sync(self.async_client.post)(
+            reverse("clock_in-async"), headers={"Authorization": f"Bearer {issue_tokens(self.employee)['access']}"}
+        )
+        self.assertEqual(response.json(), body)
+        self.assertEqual(body["shift"], "Now")
+
+    def test_bulk_upload_replaces_rosters_and_refreshes_the_index(self):
+        Shift.objects.create(
+            name="Day", start_time=datetime.strptime("09:00", "%H:%M").time(),
+            end_time=datetime.strptime("17:00", "%H:%M").time(),
+        )
+        Roster.objects.create(user=self.employee, shift=self.night, date=self.today)
+        self.assertEqual(get_roster_index().by_day[(self.employee.pk, self.today)].shift, "Night")
+
+        upload = SimpleUploadedFile(
+            "rosters.csv",
+            b"employee_id,date,shift\n"
+            + f"EMP001,{self.today},Day\n".encode()
+            + f"NOPE,{self.today},Day\n".encode()
+            + f"EMP001,{self.today},Swing\n".encode()
+            + b"EMP001,not-a-date,Day\n",
+        )
+        client = APIClient()
+        client.force_authenticate(self.hr)
+        response = client.post(reverse("import-rosters"), {"file": upload}, format="multipart")
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data["saved"], 1)
+        self.assertEqual([error["line"] for error in response.data["errors"]], [3, 4, 5])
+        self.assertEqual(Roster.objects.get(user=self.employee).shift.name, "Day")
+        self.assertEqual(get_roster_index().by_day[(self.employee.pk, self.today)].shift, "Day")
+
+    def test_concurrent_conflict_only_reports_the_lines_it_rejected(self):
+        rows = [
+            (2, {"employee_id": "EMP001", "date": str(self.today), "shift": "Night"}),
+            (3, {"employee_id": "NOPE", "date": str(self.today), "shift": "Night"}),
+        ]
+        with mock.patch.object(Roster.objects, "bulk_create", side_effect=IntegrityError):
+            result = import_rosters(rows)
+        self.assertEqual(result["saved"], 0)
+        self.assertEqual(
+            [(error["line"], error["errors"]) for error in result["errors"]],
+            [(2, "Conflicts with a concurrent change"), (3, {"employee_id": ["Unknown employee"]})],
+        )
+
+
+@override_settings(EMPLOYEE_IMPORT_HASH_WORKERS=0)
+class EmployeeImportExportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.hr = EmployeeUser.objects.create_user(employee_id="HR001", role="hr")
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.hr)
+
+    def test_csv_import_reports_bad_rows(self):
+        upload = SimpleUploadedFile(
+            "people.csv",
+            b"employee_id,first_name,role,password\n"
+            b"EMP001,Ann,employee,pw-one\n"
+            b"EMP002,Bob,Manager,\n"
+            b"HR001,Dup,employee,\n"
+            b"EMP003,Cy,ceo,\n"
+            b"EMP001,Again,employee,\n",
+        )
+        response = self.client.post(reverse("import-employees"), {"file": upload}, format="multipart")
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data["created"], 2)
+        self.assertEqual([error["line"] for error in response.data["errors"]], [4, 5, 6])
+        self.assertTrue(EmployeeUser.objects.get(employee_id="EMP001").check_password("pw-one"))
+        manager = EmployeeUser.objects.get(employee_id="EMP002")
+        self.assertEqual(manager.role, "manager")
+        self.assertFalse(manager.has_usable_password())
+
+    def test_ndjson_import_and_csv_export(self):
+        upload = SimpleUploadedFile("people.ndjson", b'{"employee_id": "EMP010", "department": "Ops"}\nnot json\n')
+        response = self.client.post(reverse("import-employees"), {"file": upload}, format="multipart")
+        self.assertEqual(response.data["created"], 1)
+        self.assertEqual(response.data["errors"][0]["line"], 2)
+
+        response = self.client.get(reverse("export-employees"))
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0], "employee_id,first_name,last_name,department,role,is_active")
+        self.assertIn("EMP010,,,Ops,employee,True", lines)
+
+    @override_settings(EMPLOYEE_IMPORT_HASH_WORKERS=None)
+    def test_request_import_hashes_in_process(self):
+        upload = SimpleUploadedFile("people.csv", b"employee_id,password\nEMP020,pw\n")
+        with mock.patch("app.employee_io.ProcessPoolExecutor") as pool:
+            response = self.client.post(reverse("import-employees"), {"file": upload}, format="multipart")
+        self.assertEqual(response.data["created"], 1)
+        pool.assert_not_called()
+
+
+@override_settings(PROFILING_ENABLED=True, PROFILING_SAMPLE_RATE=1.0)
+class QueryProfilingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = EmployeeUser.objects.create_user(employee_id="ADM001", role="admin")
+
+    def setUp(self):
+        cache.clear()
+        profile_store.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def test_samples_are_aggregated_per_url_name(self):
+        response = self.client.get(reverse("attendance-summary-api"))
+        self.assertIn('desc="1 queries"', response["Server-Timing"])
+        self.client.get(reverse("attendance-summary-api"))
+
+        report = self.client.get(reverse("profiling-report")).data["views"]
+        summary = report["attendance-summary-api"]
+        self.assertEqual(summary["count"], 2)
+        self.assertEqual(summary["queries"]["p99"], 1)
+        self.assertGreater(summary["bytes"]["p50"], 0)
+        self.assertIn("render_ms", summary)
+
+    async def test_async_views_count_queries_run_in_threads(self):
+        async def view(request):
+            return HttpResponse()
+
+        self.assertTrue(asyncio.iscoroutinefunction(QueryProfilingMiddleware(view)))
+        token = issue_token(self.admin, ACCESS)
+        url = reverse("attendance-summary-async")
+        response = await self.async_client.get(url, headers={"Authorization": f"Bearer {token}"})
+        self.assertEqual(response.status_code, 200)
+        # Bearer auth (principal cache miss) and the summary query
+        self.assertIn('desc="2 queries"', response["Server-Timing"])
+        self.assertEqual(profile_store.report()["attendance-summary-async"]["queries"]["p50"], 2)
+
+    def test_serializer_time_is_recorded_apart_from_render(self):
+        Attendance.objects.create(user=self.admin, date=timezone.localdate(), clock_in=timezone.now())
+        data = AttendanceEmployeeSerializer.to_representation
+
+        def slow(serializer, instance):
+            time.sleep(0.05)
+            return data(serializer, instance)
+
+        with mock.patch.object(AttendanceEmployeeSerializer, "to_representation", slow):
+            response = self.client.get(reverse("attendance-summary-api"))
+        self.assertIn("serialize;dur=", response["Server-Timing"])
+
+        summary = self.client.get(reverse("profiling-report")).data["views"]["attendance-summary-api"]
+        self.assertGreaterEqual(summary["serialize_ms"]["p50"], 50)
+        self.assertLess(summary["render_ms"]["p50"], 50)
+
+
+class GenerateDataTests(TestCase):
+    def test_generates_deterministic_rows(self):
+        args = ["--employees", "5", "--days", "7", "--end", "2024-03-10", "--muster", "4", "--absence-rate", "0"]
+        call_command("generate_data", *args, "--prefix", "GENA", stdout=io.StringIO())
+        call_command("generate_data", *args, "--prefix", "GENB", stdout=io.StringIO())
+
+        def snapshot(prefix):
+            return list(
+                Attendance.objects.filter(user__employee_id__startswith=prefix)
+                .order_by("user__employee_id", "date")
+                .values_list("date", *Attendance.PUNCH_FIELDS)
+            )
+
+        # 2024-03-04..2024-03-10 holds five weekdays
+        self.assertEqual(len(snapshot("GENA")), 25)
+        self.assertEqual(snapshot("GENA"), snapshot("GENB"))
+        self.assertEqual(MusterRequest.objects.count(), 8)
+        self.assertEqual(AttendanceDaily.objects.count(), 50)
+        self.assertTrue(all(row[1] and row[1].date() == row[0] for row in snapshot("GENA")))
+
+    def test_refuses_existing_prefix(self):
+        EmployeeUser.objects.create_user(employee_id="GEN0000001")
+        with self.assertRaises(CommandError):
+            call_command("generate_data", "--employees", "1", "--prefix", "GEN", stdout=io.StringIO())
+
+
+class LockRetryTests(TestCase):
+    @override_settings(DB_LOCK_RETRIES=2, DB_LOCK_RETRY_DELAY=0)
+    def test_retries_lock_errors_outside_transactions(self):
+        calls = []
+
+        @retry_on_lock
+        def flaky():
+            calls.append(1)
+            if len(calls) < 3:
+                raise OperationalError("database is locked")
+            return "done"
+
+        # TestCase wraps each test in a transaction; retries only happen outside one
+        with self.assertRaises(OperationalError):
+            flaky()
+        self.assertEqual(len(calls), 1)
+
+        with mock.patch.object(connection, "in_atomic_block", False):
+            self.assertEqual(flaky(), "done")
+        self.assertEqual(len(calls), 3)
+
+
+class ConcurrentPunchStressTests(TransactionTestCase):
+    def setUp(self):
+        # Decided here rather than at import: the test database only exists now
+        if connection.vendor == "sqlite" and connection.is_in_memory_db():
+            self.skipTest("needs a file-backed SQLite test database (run with SQLITE_TUNED=1)")
+
+    def test_concurrent_punches_do_not_lock_or_duplicate(self):
+        with connection.cursor() as cursor:
+            cursor.execute("PRAGMA journal_mode")
+            self.assertEqual(cursor.fetchone()[0], "wal")
+
+        users = [EmployeeUser.objects.create_user(employee_id=f"STRESS{i:02d}") for i in range(10)]
+        fields = ["clock_in", "break_in", "break_out", "lunch_in", "lunch_out", "clock_out"]
+        now = timezone.now()
+
+        def punch(job):
+            try:
+                user, field = job
+                return record_punch(user, field, now)
+            finally:
+                connection.close()
+
+        # Every user punches every column from several threads at once
+        jobs = [(user, field) for _ in range(3) for user in users for field in fields]
+        with ThreadPoolExecutor(8) as pool:
+            list(pool.map(punch, jobs))
+
+        self.assertEqual(Attendance.objects.count(), len(users))
+        for row in Attendance.objects.all():
+            self.assertTrue(all(getattr(row, field) == now for field in fields))
+        self.assertEqual(AttendanceDaily.objects.count(), len(users))
+
+
+@override_settings(DATABASE_REPLICAS=["replica"], REPLICA_STICKY_SECONDS=60)
+class ReplicaRoutingTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.factory = RequestFactory()
+        # Routing is decided before any query runs, so no replica connection is needed
+        patcher = mock.patch.object(connections["default"], "in_atomic_block", False)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def route(self, method, write=False, token="alpha"):
+        seen = []
+
+        def view(request):
+            seen.append(router.db_for_read(Attendance))
+            if write:
+                router.db_for_write(Attendance)
+                seen.append(router.db_for_read(Attendance))
+            return HttpResponse()
+
+        request = getattr(self.factory, method)("/", HTTP_AUTHORIZATION=f"Bearer {token}")
+        DatabaseRoutingMiddleware(view)(request)
+        return seen
+
+    def test_reads_use_replica_until_client_writes(self):
+        self.assertEqual(self.route("get"), ["replica"])
+        self.assertEqual(self.route("post", write=True), ["default", "default"])
+        # Read-your-writes for the client that punched, not for everyone else
+        self.assertEqual(self.route("get"), ["default"])
+        self.assertEqual(self.route("get", token="beta"), ["replica"])
+
+    def test_write_inside_get_pins_rest_of_request(self):
+        self.assertEqual(self.route("get", write=True, token="gamma"), ["replica", "default"])
+
+    def test_async_views_route_without_a_thread_hop(self):
+        seen = []
+
+        async def view(request):
+            seen.append(router.db_for_read(Attendance))
+            # ORM calls from async views run in a worker thread
+            await sync_to_async(router.db_for_write)(Attendance)
+            seen.append(await sync_to_async(router.db_for_read)(Attendance))
+            return HttpResponse()
+
+        middleware = DatabaseRoutingMiddleware(view)
+        self.assertTrue(asyncio.iscoroutinefunction(middleware))
+        asyncio.run(middleware(self.factory.get("/", HTTP_AUTHORIZATION="Bearer epsilon")))
+        self.assertEqual(seen, ["replica", "default"])
+        self.assertEqual(self.route("get", token="epsilon"), ["default"])
+
+    def test_outside_requests_and_transactions_use_primary(self):
+        self.assertEqual(router.db_for_read(Attendance), "default")
+        with mock.patch.object(connections["default"], "in_atomic_block", True):
+            self.assertEqual(self.route("get", token="delta"), ["default"])
+
+
+class ReplicaEndToEndTests(TransactionTestCase):
+    databases = "__all__"
+
+    def setUp(self):
+        if "replica" not in connections:
+            self.skipTest("no replica configured (run with DB_REPLICA=<second sqlite file>)")
+        cache.clear()
+        self.user = EmployeeUser.objects.create_user(employee_id="EMP001")
+        self.client = APIClient(HTTP_AUTHORIZATION=f"Bearer {issue_tokens(self.user)['access']}")
+
+    def queries(self, method, url):
+        with CaptureQueriesContext(connections["default"]) as primary:
+            with CaptureQueriesContext(connections["replica"]) as replica:
+                getattr(self.client, method)(url)
+        return len(primary), len(replica)
+
+    def test_punch_goes_to_primary_and_pins_client(self):
+        url = reverse("list-muster-request")
+        self.assertEqual(self.queries("get", url)[0], 0)
+        self.assertEqual(self.queries("post", reverse("clock_in"))[1], 0)
+        self.assertEqual(self.queries("get", url)[1], 0)
@@ -3,11 +3,21 @@ from . import views
 
 urlpatterns = [
     path("login/", views.LoginAPIView.as_view(), name="login"),
+    path("token/refresh/", views.TokenRefreshAPIView.as_view(), name="token-refresh"),
+    path("token/revoke/", views.TokenRevokeAPIView.as_view(), name="token-revoke"),
     path("register-employee/", views.register_employee, name="register-employee"),
     path("employees/", views.list_employees, name="list-employees"),
+    path("employees/import/", views.import_employees_api, name="import-employees"),
+    path("employees/export/", views.export_employees_api, name="export-employees"),
+    path("shifts/", views.shifts_api, name="shifts"),
+    path("rosters/import/", views.import_rosters_api, name="import-rosters"),
     path("employees/<str:employee_id>/update/", views.update_employee, name="update-employee"),
     path("employees/<str:employee_id>/delete/", views.delete_employee, name="delete-employee"),
     path('attendance-summary/', views.attendance_summary_api, name='attendance-summary-api'),
+    path('attendance-report/', views.attendance_report, name='attendance-report'),
+    path('attendance-analytics/', views.attendance_analytics, name='attendance-analytics'),
+    path('attendance-daily/rebuild/', views.rebuild_attendance_daily_api, name='rebuild-attendance-daily'),
+    path('jobs/<int:job_id>/', views.job_status, name='job-status'),
     path('update_profile/', views.update_profile, name='update_profile'),
     path('clock_in/', views.clock_in, name='clock_in'),
     path('clock_out/', views.clock_out, name='clock_out'),
@@ -15,8 +25,23 @@ urlpatterns = [
     path('break_out/', views.break_out, name='break_out'),
     path('lunch_in/', views.lunch_in, name='lunch_in'),
     path('lunch_out/', views.lunch_out, name='lunch_out'),
+    path('punches/bulk/', views.bulk_punch, name='bulk-punch'),
+
+    # Async views, served without a worker thread under ASGI (project/asgi.py)
+    path('async/attendance-summary/', views.attendance_summary_async, name='attendance-summary-async'),
+    path('attendance-summary/stream/', views.attendance_summary_stream, name='attendance-summary-stream'),
+    path('async/clock_in/', views.clock_in_async, name='clock_in-async'),
+    path('async/clock_out/', views.clock_out_async, name='clock_out-async'),
+    path('async/break_in/', views.break_in_async, name='break_in-async'),
+    path('async/break_out/', views.break_out_async, name='break_out-async'),
+    path('async/lunch_in/', views.lunch_in_async, name='lunch_in-async'),
+    path('async/lunch_out/', views.lunch_out_async, name='lunch_out-async'),
+
+    path("debug/profile/", views.profiling_report, name="profiling-report"),
 
     path("muster-request/", views.create_muster_request, name="create-muster-request"),
     path("muster-request/list/", views.list_muster_requests, name="list-muster-request"),
     path("muster-request/<int:request_id>/edit/", views.edit_muster_request, name="edit-muster-request"),
+    path("muster-request/queue/", views.muster_request_queue, name="muster-request-queue"),
+    path("muster-request/review/", views.review_muster_requests_api, name="review-muster-request"),
 ]
@@ -1,17 +1,44 @@
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.contrib.auth import login
+from django.db.models import Q
+from django.http import JsonResponse
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
-from .models import EmployeeUser, Attendance
+from .models import EmployeeUser, Job, Shift
 from .serializers import LoginSerializer, RegisterEmployeeSerializer
 from django.shortcuts import render
+from django.urls import reverse
 from django.utils import timezone
-from .serializers import ProfileUpdateSerializer
+from .serializers import ProfileUpdateSerializer, AttendanceReportQuerySerializer
+from .serializers import AttendanceAnalyticsQuerySerializer
+from .serializers import JobSerializer, RebuildAttendanceDailySerializer, ShiftSerializer
+from .permissions import RoleRequired, async_api_view
+from .authentication import issue_tokens, refresh_tokens, revoke_tokens
+from .attendance import arecord_punch, ingest_punch_events, record_punch
+from .reports import build_attendance_report
+from .analytics import analyze_attendance
+from .profiling import profile_store
+from .conditional import conditional_list
+from .pagination import InvalidCursor, KeysetPagination
+from .streaming import csv_response, ndjson_response, sse_message, sse_response
+from .events import RESYNC, get_broker
+from .employee_io import EXPORT_FIELDS as EMPLOYEE_EXPORT_FIELDS, FORMATS as EMPLOYEE_FILE_FORMATS
+from .employee_io import detect_format, export_queryset, import_employees, parse_rows
+from .summary import aget_attendance_summary, get_attendance_summary
+from .jobs import enqueue, remove_staged_upload, stage_upload
+from .rollup import is_late
+from .rosters import import_rosters, rostered_shifts
 
 # ---------------- LOGIN ----------------
 class LoginAPIView(APIView):
+    authentication_classes = []
+
     def post(self, request):
         serializer = LoginSerializer(data=request.data)
         if serializer.is_valid():
@@ -24,16 +51,40 @@ class LoginAPIView(APIView):
                 "first_name": user.first_name,
                 "last_name": user.last_name,
                 "is_admin": user.is_staff or user.is_superuser,
+                **issue_tokens(user),
             }, status=status.HTTP_200_OK)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+# ---------------- Profiling ----------------
+@api_view(['GET', 'DELETE'])
+@permission_classes([RoleRequired.of("admin", message="Only admin can view profiling data")])
+def profiling_report(request):
+    if request.method == "DELETE":
+        profile_store.clear()
+        return Response({"message": "Profiling data cleared"}, status=status.HTTP_200_OK)
+    return Response({"enabled": settings.PROFILING_ENABLED, "views": profile_store.report()})
+
+# ---------------- Tokens ----------------
+class TokenRefreshAPIView(APIView):
+    authentication_classes = []
+
+    def post(self, request):
+        token = request.data.get("refresh")
+        if not token:
+            return Response({"error": "Refresh token is required"}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(refresh_tokens(token), status=status.HTTP_200_OK)
+
+class TokenRevokeAPIView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        revoke_tokens(request.user)
+        return Response({"message": "All tokens revoked"}, status=status.HTTP_200_OK)
+
 # ---------------- Register ----------------
 @api_view(['POST', 'GET'])
-@permission_classes([IsAuthenticated])
+@permission_classes([RoleRequired.of(message="Only admin/hr/manager can add users")])
 def register_employee(request):
-    if request.user.role not in ["admin", "hr", "manager"]:
-        return Response({"error": "Only admin/hr/manager can add users"}, status=status.HTTP_403_FORBIDDEN)
-
     if request.method == "GET":
         return Response({
             "message": "Send POST request to register a new employee, HR, or Manager",
@@ -47,24 +98,107 @@ def register_employee(request):
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 # ---------------- List ----------------
+employee_pagination = KeysetPagination(ordering=("employee_id", "id"))
+
 @api_view(['GET'])
-@permission_classes([IsAuthenticated])
+@permission_classes([RoleRequired.of(message="Only admin/hr/manager can view users")])
 def list_employees(request):
-    if request.user.role not in ["admin", "hr", "manager"]:
-        return Response({"error": "Only admin/hr/manager can view users"}, status=status.HTTP_403_FORBIDDEN)
-
-    employees = EmployeeUser.objects.filter(role__in=["employee", "hr", "manager"]).values(
-        "id", "employee_id", "first_name", "last_name", "role", "is_staff"
+    employees = EmployeeUser.objects.filter(role__in=["employee", "hr", "manager"])
+
+    role = request.query_params.get("role")
+    if role:
+        employees = employees.filter(role=role.lower())
+    name = request.query_params.get("name")
+    if name:
+        employees = employees.filter(Q(first_name__istartswith=name) | Q(last_name__istartswith=name))
+    is_active = request.query_params.get("is_active")
+    if is_active is not None:
+        employees = employees.filter(is_active=is_active.lower() in ["1", "true", "yes"])
+
+    rows = employees.values(
+        "id", "employee_id", "first_name", "last_name", "department", "role", "is_staff", "is_active"
     )
-    return Response(list(employees), status=status.HTTP_200_OK)
+
+    if request.query_params.get("stream") == "ndjson":
+        return ndjson_response(rows.order_by(*employee_pagination.ordering))
+
+    def render():
+        try:
+            page, next_cursor = employee_pagination.paginate(rows, request)
+        except InvalidCursor:
+            return Response({"error": "Invalid cursor"}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({"results": page, "next": next_cursor}, status=status.HTTP_200_OK)
+
+    return conditional_list(request, employees, render)
+
+# ---------------- Bulk Import / Export ----------------
+@api_view(['POST'])
+@permission_classes([RoleRequired.of(message="Only admin/hr/manager can add users")])
+def import_employees_api(request):
+    upload = request.FILES.get("file")
+    if upload is None:
+        return Response({"error": "Upload a CSV or NDJSON file as 'file'"}, status=status.HTTP_400_BAD_REQUEST)
+    file_format = detect_format(upload.name, request.data.get("file_format"))
+    if file_format not in EMPLOYEE_FILE_FORMATS:
+        return Response({"error": "file_format must be csv or ndjson"}, status=status.HTTP_400_BAD_REQUEST)
+
+    if _truthy(request.data.get("background")):
+        # The file is staged outside the database, so passwords never land
+        # in Job.params. An import is not retried since a failed attempt
+        # may already have created some employees.
+        params = {"path": stage_upload(upload), "file_format": file_format}
+        try:
+            job = enqueue("import_employees", params, request.user, max_attempts=1)
+        except Exception:
+            remove_staged_upload(params)
+            raise
+        return _job_accepted(job)
+
+    # Hashed in-process like the analytics endpoint: a pool per request costs
+    # seconds. Large files belong on the job worker (background=1).
+    result = import_employees(parse_rows(upload, file_format), workers=0)
+    return Response(result, status=status.HTTP_201_CREATED if result["created"] else status.HTTP_400_BAD_REQUEST)
+
+@api_view(['GET'])
+@permission_classes([RoleRequired.of(message="Only admin/hr/manager can view users")])
+def export_employees_api(request):
+    file_format = request.query_params.get("file_format", "csv")
+    if file_format == "csv":
+        return csv_response(export_queryset(), EMPLOYEE_EXPORT_FIELDS, filename="employees.csv")
+    if file_format == "ndjson":
+        return ndjson_response(export_queryset(), filename="employees.ndjson")
+    return Response({"error": "file_format must be csv or ndjson"}, status=status.HTTP_400_BAD_REQUEST)
+
+# ---------------- Shifts / Rosters ----------------
+@api_view(['GET', 'POST'])
+@permission_classes([RoleRequired.of(message="Only admin/hr/manager can manage shifts")])
+def shifts_api(request):
+    if request.method == "GET":
+        return Response(ShiftSerializer(Shift.objects.order_by("start_time", "name"), many=True).data)
+    serializer = ShiftSerializer(data=request.data)
+    if serializer.is_valid():
+        serializer.save()
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+    return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+# Rows name an employee_id, a date (the day the shift starts) and a shift
+@api_view(['POST'])
+@permission_classes([RoleRequired.of(message="Only admin/hr/manager can manage rosters")])
+def import_rosters_api(request):
+    upload = request.FILES.get("file")
+    if upload is None:
+        return Response({"error": "Upload a CSV or NDJSON file as 'file'"}, status=status.HTTP_400_BAD_REQUEST)
+    file_format = detect_format(upload.name, request.data.get("file_format"))
+    if file_format not in EMPLOYEE_FILE_FORMATS:
+        return Response({"error": "file_format must be csv or ndjson"}, status=status.HTTP_400_BAD_REQUEST)
+
+    result = import_rosters(parse_rows(upload, file_format))
+    return Response(result, status=status.HTTP_201_CREATED if result["saved"] else status.HTTP_400_BAD_REQUEST)
 
 # ---------------- Update ----------------
 @api_view(['PUT', 'PATCH'])
-@permission_classes([IsAuthenticated])
+@permission_classes([RoleRequired.of(message="Only admin/hr/manager can edit users")])
 def update_employee(request, employee_id):
-    if request.user.role not in ["admin", "hr", "manager"]:
-        return Response({"error": "Only admin/hr/manager can edit users"}, status=status.HTTP_403_FORBIDDEN)
-
     try:
         employee = EmployeeUser.objects.get(employee_id=employee_id, role__in=["employee", "hr", "manager"])
     except EmployeeUser.DoesNotExist:
@@ -72,6 +206,7 @@ def update_employee(request, employee_id):
 
     employee.first_name = request.data.get("first_name", employee.first_name)
     employee.last_name = request.data.get("last_name", employee.last_name)
+    employee.department = request.data.get("department", employee.department)
 
     role = request.data.get("role", employee.role).lower()
     if role in ["employee", "hr", "manager"]:
@@ -80,18 +215,15 @@ def update_employee(request, employee_id):
             employee.is_staff = True
 
     if "password" in request.data and request.data["password"]:
-        employee.set_password(request.data["password"])
+        employee.change_password(request.data["password"])
 
     employee.save()
     return Response({"message": f"{employee.role.capitalize()} updated successfully"}, status=status.HTTP_200_OK)
 
 # ---------------- Delete ----------------
 @api_view(['DELETE'])
-@permission_classes([IsAuthenticated])
+@permission_classes([RoleRequired.of(message="Only admin/hr/manager can delete users")])
 def delete_employee(request, employee_id):
-    if request.user.role not in ["admin", "hr", "manager"]:
-        return Response({"error": "Only admin/hr/manager can delete users"}, status=status.HTTP_403_FORBIDDEN)
-
     try:
         employee = EmployeeUser.objects.get(employee_id=employee_id, role__in=["employee", "hr", "manager"])
     except EmployeeUser.DoesNotExist:
@@ -111,96 +243,179 @@ def update_profile(request):
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 # ----------------- Clock / Break / Lunch -----------------
-def get_or_create_today_attendance(user):
-    attendance, created = Attendance.objects.get_or_create(user=user, date=timezone.localdate())
-    return attendance
-
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def clock_in(request):
-    attendance = get_or_create_today_attendance(request.user)
-    attendance.clock_in = timezone.now()
-    attendance.save()
-    return Response({"message": "Clocked in successfully"})
+    when = timezone.now()
+    day = record_punch(request.user, "clock_in", when)
+    return Response(_clock_in_body(request.user, day, when))
+
+def _clock_in_body(user, day, when):
+    # Served from the roster index the punch just used, no extra query
+    shift = rostered_shifts([(user.pk, day)]).get((user.pk, day))
+    return {
+        "message": "Clocked in successfully",
+        "date": day,
+        "shift": shift.shift if shift else None,
+        "shift_start": shift.starts if shift else None,
+        "shift_end": shift.ends if shift else None,
+        "late": is_late(when, shift),
+    }
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def clock_out(request):
-    attendance = get_or_create_today_attendance(request.user)
-    attendance.clock_out = timezone.now()
-    attendance.save()
+    record_punch(request.user, "clock_out")
     return Response({"message": "Clocked out successfully"})
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def break_in(request):
-    attendance = get_or_create_today_attendance(request.user)
-    attendance.break_in = timezone.now()
-    attendance.save()
+    record_punch(request.user, "break_in")
     return Response({"message": "Break started"})
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def break_out(request):
-    attendance = get_or_create_today_attendance(request.user)
-    attendance.break_out = timezone.now()
-    attendance.save()
+    record_punch(request.user, "break_out")
     return Response({"message": "Break ended"})
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def lunch_in(request):
-    attendance = get_or_create_today_attendance(request.user)
-    attendance.lunch_in = timezone.now()
-    attendance.save()
+    record_punch(request.user, "lunch_in")
     return Response({"message": "Lunch started"})
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def lunch_out(request):
-    attendance = get_or_create_today_attendance(request.user)
-    attendance.lunch_out = timezone.now()
-    attendance.save()
+    record_punch(request.user, "lunch_out")
     return Response({"message": "Lunch ended"})
 
-# views.py
-from rest_framework.decorators import api_view
-from rest_framework.response import Response
-from datetime import date
-from .models import Attendance
-from .serializers import AttendanceEmployeeSerializer
+# Bulk punch ingestion for biometric terminals / kiosks
+@api_view(['POST'])
+@permission_classes([RoleRequired.of(message="Only admin/hr/manager can submit punch batches")])
+def bulk_punch(request):
+    events = request.data.get("events") if isinstance(request.data, dict) else request.data
+    if not isinstance(events, list):
+        return Response({"error": "Expected a list of events"}, status=status.HTTP_400_BAD_REQUEST)
+    if len(events) > settings.PUNCH_BATCH_MAX_EVENTS:
+        return Response(
+            {"error": f"At most {settings.PUNCH_BATCH_MAX_EVENTS} events per batch"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    return Response({"results": ingest_punch_events(events)}, status=status.HTTP_200_OK)
+
+# Worked / break / lunch time over a date range, for payroll
+@api_view(['GET'])
+@permission_classes([RoleRequired.of(message="Only admin/hr/manager can view attendance reports")])
+def attendance_report(request):
+    query = AttendanceReportQuerySerializer(data=request.query_params)
+    if not query.is_valid():
+        return Response(query.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    if _truthy(request.query_params.get("background")):
+        return _job_accepted(enqueue("attendance_report", query.validated_data, request.user))
+    return Response({"results": build_attendance_report(**query.validated_data)}, status=status.HTTP_200_OK)
 
+# Late arrivals, overtime, missing clock-outs and break overruns per employee
 @api_view(['GET'])
-@permission_classes([IsAuthenticated])
+@permission_classes([RoleRequired.of(message="Only admin/hr/manager can view attendance reports")])
+def attendance_analytics(request):
+    query = AttendanceAnalyticsQuerySerializer(data=request.query_params)
+    if not query.is_valid():
+        return Response(query.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    if _truthy(request.query_params.get("background")):
+        return _job_accepted(enqueue("attendance_analytics", query.validated_data, request.user))
+    # In-process: spawning a worker pool costs seconds per request. Large
+    # ranges belong on the job worker, which does use the pool.
+    return Response(analyze_attendance(**query.validated_data, workers=0), status=status.HTTP_200_OK)
+
+@api_view(['POST'])
+@permission_classes([RoleRequired.of("admin", message="Only admin can rebuild attendance data")])
+def rebuild_attendance_daily_api(request):
+    serializer = RebuildAttendanceDailySerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    return _job_accepted(enqueue("rebuild_attendance_daily", serializer.validated_data, request.user))
+
+@api_view(['GET'])
+@permission_classes([RoleRequired.of(message="Only admin/hr/manager can view attendance")])
 def attendance_summary_api(request):
-    # Only allow HR / Manager / Admin
-    if request.user.role not in ["admin", "hr", "manager"]:
-        return Response({"error": "Only admin/hr/manager can view attendance"}, status=403)
-
-    today = date.today()
-
-    data = {
-        'clockin': AttendanceEmployeeSerializer(
-            Attendance.objects.filter(date=today, clock_in__isnull=False), many=True
-        ).data,
-        'clockout': AttendanceEmployeeSerializer(
-            Attendance.objects.filter(date=today, clock_out__isnull=False), many=True
-        ).data,
-        'breakin': AttendanceEmployeeSerializer(
-            Attendance.objects.filter(date=today, break_in__isnull=False), many=True
-        ).data,
-        'breakout': AttendanceEmployeeSerializer(
-            Attendance.objects.filter(date=today, break_out__isnull=False), many=True
-        ).data,
-        'lunchin': AttendanceEmployeeSerializer(
-            Attendance.objects.filter(date=today, lunch_in__isnull=False), many=True
-        ).data,
-        'lunchout': AttendanceEmployeeSerializer(
-            Attendance.objects.filter(date=today, lunch_out__isnull=False), many=True
-        ).data,
-    }
+    return Response(get_attendance_summary())
+
+# ---------------- Jobs ----------------
+# Heavy operations can run on the `run_jobs` worker instead of the web
+# worker: they answer 202 with a job the client polls at job_status.
+def _truthy(value):
+    return str(value).lower() in ["1", "true", "yes"]
+
+def _job_accepted(job):
+    location = reverse("job-status", args=[job.pk])
+    return Response(
+        {**JobSerializer(job).data, "url": location}, status=status.HTTP_202_ACCEPTED, headers={"Location": location}
+    )
 
-    return Response(data)
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def job_status(request, job_id):
+    jobs = Job.objects.all()
+    if not (request.user.role == "admin" or request.user.is_superuser):
+        jobs = jobs.filter(created_by=request.user)
+    try:
+        job = jobs.get(pk=job_id)
+    except Job.DoesNotExist:
+        return Response({"error": "Job not found"}, status=status.HTTP_404_NOT_FOUND)
+    return Response(JobSerializer(job).data)
+
+# ---------------- Async (ASGI) ----------------
+# Async twins of the punch and summary endpoints. Under an ASGI server a
+# client waiting on these holds a coroutine rather than a worker thread.
+def _async_punch_view(field, message):
+    @async_api_view(["POST"])
+    async def view(request):
+        when = timezone.now()
+        day = await arecord_punch(request.user, field, when)
+        if field == "clock_in":
+            return JsonResponse(await sync_to_async(_clock_in_body)(request.user, day, when))
+        return JsonResponse({"message": message})
+
+    view.__name__ = view.__qualname__ = f"{field}_async"
+    return view
+
+clock_in_async = _async_punch_view("clock_in", "Clocked in successfully")
+clock_out_async = _async_punch_view("clock_out", "Clocked out successfully")
+break_in_async = _async_punch_view("break_in", "Break started")
+break_out_async = _async_punch_view("break_out", "Break ended")
+lunch_in_async = _async_punch_view("lunch_in", "Lunch started")
+lunch_out_async = _async_punch_view("lunch_out", "Lunch ended")
+
+@async_api_view(["GET"], [RoleRequired.of(message="Only admin/hr/manager can view attendance")])
+async def attendance_summary_async(request):
+    return JsonResponse(await aget_attendance_summary())
+
+# Live dashboard: a summary snapshot, then one event per changed attendance
+# row. Needs ASGI; under WSGI every open stream pins a worker thread.
+@async_api_view(["GET"], [RoleRequired.of(message="Only admin/hr/manager can view attendance")])
+async def attendance_summary_stream(request):
+    async def messages():
+        # Subscribe before the snapshot so no punch falls between the two
+        async with get_broker().subscribe() as queue:
+            yield sse_message("snapshot", await aget_attendance_summary())
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), settings.ATTENDANCE_EVENTS_KEEPALIVE)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                if event["event"] == RESYNC:
+                    yield sse_message("snapshot", await aget_attendance_summary())
+                else:
+                    yield sse_message(event["event"], event["data"])
+
+    return sse_response(messages())
 
 
 from rest_framework.decorators import api_view, permission_classes
@@ -208,7 +423,11 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
 from .models import MusterRequest
-from .serializers import MusterRequestSerializer
+from .muster import filter_requested_days, review_muster_requests
+from .serializers import (
+    MusterListQuerySerializer, MusterQueueQuerySerializer, MusterQueueSerializer, MusterRequestSerializer,
+    MusterReviewSerializer,
+)
 
 # Create Muster Request
 @api_view(["POST"])
@@ -223,13 +442,32 @@ def create_muster_request(request):
         }, status=status.HTTP_201_CREATED)
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-# List Muster Requests for the logged-in employee
+# List Muster Requests for the logged-in employee (newest first)
+muster_list_pagination = KeysetPagination(ordering=("-created_at", "-id"))
+
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
 def list_muster_requests(request):
-    requests = MusterRequest.objects.filter(employee=request.user).order_by("-created_at")
-    serializer = MusterRequestSerializer(requests, many=True)
-    return Response(serializer.data)
+    query = MusterListQuerySerializer(data=request.query_params)
+    if not query.is_valid():
+        return Response(query.errors, status=status.HTTP_400_BAD_REQUEST)
+    filters = query.validated_data
+
+    # Going through the reverse manager caches request.user on every row,
+    # so the serializer's employee.employee_id costs no query per row.
+    requests = request.user.musterrequest_set.all()
+    if filters.get("status"):
+        requests = requests.filter(status=filters["status"])
+    requests = filter_requested_days(requests, filters.get("start"), filters.get("end"))
+
+    def render():
+        try:
+            rows, next_cursor = muster_list_pagination.paginate(requests, request)
+        except InvalidCursor:
+            return Response({"error": "Invalid cursor"}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({"results": MusterRequestSerializer(rows, many=True).data, "next": next_cursor})
+
+    return conditional_list(request, requests, render)
 
 # Edit / resubmit Muster Request (only if pending or rejected)
 @api_view(["PUT", "PATCH"])
@@ -251,3 +489,36 @@ def edit_muster_request(request, request_id):
             "data": serializer.data
         })
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+# Reviewer queue of muster requests (oldest first)
+muster_queue_pagination = KeysetPagination(ordering=("created_at", "id"))
+
+@api_view(["GET"])
+@permission_classes([RoleRequired.of(message="Only admin/hr/manager can review muster requests")])
+def muster_request_queue(request):
+    query = MusterQueueQuerySerializer(data=request.query_params)
+    if not query.is_valid():
+        return Response(query.errors, status=status.HTTP_400_BAD_REQUEST)
+    filters = query.validated_data
+
+    requests = MusterRequest.objects.filter(status=filters["status"]).select_related("employee")
+    requests = filter_requested_days(requests, filters.get("start"), filters.get("end"))
+    if filters.get("department"):
+        requests = requests.filter(employee__department=filters["department"])
+
+    try:
+        rows, next_cursor = muster_queue_pagination.paginate(requests, request)
+    except InvalidCursor:
+        return Response({"error": "Invalid cursor"}, status=status.HTTP_400_BAD_REQUEST)
+    return Response({"results": MusterQueueSerializer(rows, many=True).data, "next": next_cursor})
+
+# Bulk approve / reject
+@api_view(["POST"])
+@permission_classes([RoleRequired.of(message="Only admin/hr/manager can review muster requests")])
+def review_muster_requests_api(request):
+    serializer = MusterReviewSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    results = review_muster_requests(serializer.validated_data["ids"], serializer.validated_data["status"], request.user)
+    return Response({"results": results}, status=status.HTTP_200_OK)
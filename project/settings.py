@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -44,6 +45,9 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'app.middleware.QueryProfilingMiddleware',
+    'app.middleware.CompressionMiddleware',
+    'app.middleware.DatabaseRoutingMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     "corsheaders.middleware.CorsMiddleware",
@@ -76,18 +80,219 @@ AUTH_USER_MODEL = "app.EmployeeUser"
 
 CORS_ALLOW_ALL_ORIGINS = True
 
+# Per-request SQL/latency profiling (off unless PROFILING_ENABLED=1).
+# Samples are kept per URL name in a rolling window of PROFILING_WINDOW
+# requests; requests over PROFILING_QUERY_WARNING queries are logged.
+PROFILING_ENABLED = os.environ.get("PROFILING_ENABLED", "0") == "1"
+PROFILING_SAMPLE_RATE = float(os.environ.get("PROFILING_SAMPLE_RATE", "1.0"))
+PROFILING_WINDOW = 1000
+PROFILING_QUERY_WARNING = 50
+
+# Seconds the dashboard attendance summary is served from cache; punches
+# invalidate it immediately, this only bounds staleness across processes.
+ATTENDANCE_SUMMARY_CACHE_TIMEOUT = 10
+
+# Rules used for the daily attendance rollup
+ATTENDANCE_SHIFT_START = "09:00"
+ATTENDANCE_LATE_GRACE_MINUTES = 10
+ATTENDANCE_STANDARD_WORK_SECONDS = 8 * 60 * 60
+# Punches up to this many hours before a rostered shift starts, or after it
+# ends, are booked on that shift's day (see app.rosters). The in-process
+# roster index is rebuilt on roster changes and at least every
+# ROSTER_INDEX_MAX_AGE seconds, for caches not shared between processes.
+ROSTER_EARLY_PUNCH_HOURS = 3
+ROSTER_LATE_PUNCH_HOURS = 4
+ROSTER_INDEX_MAX_AGE = 60
+# Closed breaks/lunches longer than these are flagged by the analytics report
+ATTENDANCE_BREAK_ALLOWANCE_MINUTES = 15
+ATTENDANCE_LUNCH_ALLOWANCE_MINUTES = 60
+# Rows per NumPy chunk in app.analytics, which bounds its memory use, and
+# processes reading date slices in parallel for the attendance_analytics
+# command and job (None = one per CPU, 0 = in-process). The HTTP endpoint
+# always runs in-process.
+ATTENDANCE_ANALYTICS_CHUNK_SIZE = 100_000
+ATTENDANCE_ANALYTICS_WORKERS = None
+
+# Live dashboard feed (attendance-summary/stream/). The broker class fans
+# punch events out to connected dashboards; the default only reaches
+# dashboards served by the same process.
+ATTENDANCE_EVENTS_BROKER = "app.events.InProcessBroker"
+# Events buffered per dashboard before it is told to resync instead
+ATTENDANCE_EVENTS_QUEUE_SIZE = 1000
+# Seconds between keep-alive comments on an idle stream
+ATTENDANCE_EVENTS_KEEPALIVE = 15
+
+# Longest date range a single attendance report may cover
+ATTENDANCE_REPORT_MAX_DAYS = 366
+
+# Bulk employee import: rows per validation/INSERT chunk, and processes
+# used for password hashing (None = one per CPU, 0 = hash in-process)
+EMPLOYEE_IMPORT_CHUNK_SIZE = 1000
+EMPLOYEE_IMPORT_HASH_WORKERS = None
+
+# Signed bearer tokens issued by the login endpoint (seconds)
+AUTH_TOKEN_ACCESS_TTL = 15 * 60
+AUTH_TOKEN_REFRESH_TTL = 7 * 24 * 60 * 60
+# Seconds a user's role/is_active/token_version are cached for token auth.
+# EmployeeUser.save()/delete() drop the entry straight away, but only from
+# the cache they can reach: with the per-process default cache (no
+# REDIS_URL, see CACHES) other workers keep a revoked, deactivated or
+# demoted principal for up to this long.
+AUTH_PRINCIPAL_CACHE_TTL = 60
+
+# Invalidations (token principals, roster index, attendance summary) reach
+# every worker process only through a shared cache. Set REDIS_URL when
+# running more than one process; otherwise each process has its own
+# LocMemCache and `check --deploy` warns about it.
+if os.environ.get("REDIS_URL"):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": os.environ["REDIS_URL"],
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+
+# Bulk punch ingestion (terminals / kiosks)
+PUNCH_BATCH_MAX_EVENTS = 5000
+PUNCH_BATCH_SIZE = 500
+
+# Buffered punch mode (PUNCH_BUFFER_ENABLED=1): punches are acknowledged
+# once appended to a local journal and written in bulk every
+# PUNCH_BUFFER_FLUSH_INTERVAL seconds (None = only by the
+# flush_punch_journal command). Dashboards lag by up to one interval.
+PUNCH_BUFFER_ENABLED = os.environ.get("PUNCH_BUFFER_ENABLED", "0") == "1"
+PUNCH_BUFFER_DIR = os.environ.get("PUNCH_BUFFER_DIR", BASE_DIR / "punch_journal")
+PUNCH_BUFFER_FLUSH_INTERVAL = 1.0
+# fsync every append; turning it off trades crash safety for latency
+PUNCH_BUFFER_FSYNC = True
+
+# Attendance archiving (archive_attendance command): raw Attendance rows of
+# closed months older than ATTENDANCE_HOT_MONTHS are moved to one csv.gz
+# file per month. AttendanceDaily rollups are kept, so reports still cover
+# archived months.
+ATTENDANCE_HOT_MONTHS = 3
+ATTENDANCE_ARCHIVE_DIR = os.environ.get("ATTENDANCE_ARCHIVE_DIR", BASE_DIR / "attendance_archive")
+# Punches for an archived day are rolled up together with the archived
+# punches; the list of archived months is cached for this many seconds.
+ATTENDANCE_ARCHIVE_CATALOG_TTL = 60
+
+# Background jobs (app.jobs), run by `manage.py run_jobs`. A failed job is
+# retried after JOB_RETRY_DELAY seconds, doubling per attempt; a running job
+# whose worker stops heartbeating for JOB_STALE_SECONDS is queued again, or
+# failed if that was its last attempt. Workers heartbeat every
+# JOB_HEARTBEAT_INTERVAL seconds while a job runs.
+JOB_WORKERS = 2
+JOB_POLL_INTERVAL = 1.0
+JOB_MAX_ATTEMPTS = 3
+JOB_RETRY_DELAY = 5
+JOB_STALE_SECONDS = 300
+JOB_HEARTBEAT_INTERVAL = 30
+JOB_PROGRESS_INTERVAL = 1.0
+# Uploads handed to background jobs (e.g. employee imports) wait here until
+# the job ends; it must be reachable from the web and run_jobs hosts alike.
+JOB_UPLOAD_DIR = os.environ.get("JOB_UPLOAD_DIR", BASE_DIR / "job_uploads")
+
 
 
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# DB_ENGINE selects "sqlite" (default) or "postgres"; the connection itself
+# comes from the DB_* variables below.
+DB_ENGINE = os.environ.get("DB_ENGINE", "sqlite")
+
+# Production SQLite mode (SQLITE_TUNED=1) for offices that deliberately run
+# on SQLite: WAL so readers never block the writer, a busy timeout instead of
+# failing fast on "database is locked", IMMEDIATE transactions so writers
+# queue on the busy handler rather than deadlocking on a lock upgrade, and
+# persistent connections so the pragmas are not re-applied per request.
+SQLITE_TUNED = os.environ.get("SQLITE_TUNED", "0") == "1"
+SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_MMAP_SIZE = 256 * 1024 * 1024
+SQLITE_CACHE_SIZE_KIB = 64 * 1024
+
+# Postgres connection pool (psycopg[pool]); DB_POOL_MAX_SIZE=0 turns it off
+# and falls back to one connection per request.
+DB_POOL_MIN_SIZE = int(os.environ.get("DB_POOL_MIN_SIZE", "2"))
+DB_POOL_MAX_SIZE = int(os.environ.get("DB_POOL_MAX_SIZE", "10"))
+DB_POOL_TIMEOUT = float(os.environ.get("DB_POOL_TIMEOUT", "10"))
+
+if DB_ENGINE == "postgres":
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get("DB_NAME", "attendance"),
+            'USER': os.environ.get("DB_USER", ""),
+            'PASSWORD': os.environ.get("DB_PASSWORD", ""),
+            'HOST': os.environ.get("DB_HOST", ""),
+            'PORT': os.environ.get("DB_PORT", ""),
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {},
+        }
     }
-}
+    if DB_POOL_MAX_SIZE:
+        DATABASES['default']['OPTIONS']['pool'] = {
+            'min_size': DB_POOL_MIN_SIZE,
+            'max_size': DB_POOL_MAX_SIZE,
+            'timeout': DB_POOL_TIMEOUT,
+        }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ.get("DB_NAME", BASE_DIR / 'db.sqlite3'),
+        }
+    }
+    if SQLITE_TUNED:
+        DATABASES['default'].update({
+            'CONN_MAX_AGE': int(os.environ.get("SQLITE_CONN_MAX_AGE", "600")),
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {
+                'transaction_mode': 'IMMEDIATE',
+                'timeout': SQLITE_BUSY_TIMEOUT_MS / 1000,
+                'init_command': ";".join([
+                    "PRAGMA journal_mode=WAL",
+                    "PRAGMA synchronous=NORMAL",
+                    f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}",
+                    f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}",
+                    # Negative values are KiB rather than pages
+                    f"PRAGMA cache_size=-{SQLITE_CACHE_SIZE_KIB}",
+                ]),
+            },
+            # The default in-memory test database cannot be shared by threads
+            'TEST': {'NAME': BASE_DIR / 'test_db.sqlite3'},
+        })
+
+# Read replica: DB_REPLICA is the replica's host for Postgres, or a second
+# database file for SQLite (handy for trying the routing locally). GET/HEAD
+# requests read from it; see app.routers for the rules keeping clients on
+# the primary after they write.
+DB_REPLICA = os.environ.get("DB_REPLICA", "")
+if DB_REPLICA:
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'HOST' if DB_ENGINE == "postgres" else 'NAME': DB_REPLICA,
+        # Tests see a single database through both aliases
+        'TEST': {'MIRROR': 'default'},
+    }
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+DATABASE_ROUTERS = ['app.routers.PrimaryReplicaRouter']
+
+# Seconds a client keeps reading from the primary after a write, so it sees
+# its own punches while the replica catches up
+REPLICA_STICKY_SECONDS = 5
+
+# Times a write is retried after a "database is locked" error, with
+# exponential backoff starting at DB_LOCK_RETRY_DELAY seconds
+DB_LOCK_RETRIES = 3
+DB_LOCK_RETRY_DELAY = 0.05
 
 
 # Password validation
@@ -134,12 +339,28 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
+        'app.authentication.SignedTokenAuthentication',
         'rest_framework.authentication.SessionAuthentication',
+        # Kept for clients that have not moved to bearer tokens yet; every
+        # Basic request pays for a full password hash.
         'rest_framework.authentication.BasicAuthentication',
-        # For token-based auth:
-        # 'rest_framework.authentication.TokenAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.AllowAny',
-    ]
-}
\ No newline at end of file
+    ],
+    # JSON by default, MessagePack for clients that ask for it; see
+    # `manage.py benchmark_renderers` for bytes and render time of each.
+    'DEFAULT_RENDERER_CLASSES': [
+        'app.renderers.ORJSONRenderer',
+        'app.renderers.MessagePackRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+}
+
+# Response compression (app.middleware.CompressionMiddleware). Brotli
+# quality 5 / gzip level 6 trade a little ratio for far less CPU than the
+# maximum settings on per-request bodies.
+RESPONSE_COMPRESSION_MIN_BYTES = 1024
+RESPONSE_COMPRESSION_TYPES = ["application/json", "application/msgpack"]
+RESPONSE_BROTLI_QUALITY = 5
+RESPONSE_GZIP_LEVEL = 6